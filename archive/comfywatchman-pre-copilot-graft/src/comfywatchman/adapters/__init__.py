@@ -18,15 +18,19 @@ def is_package_available(package_name: str) -> bool:
 # Check for ModelScope (for optional search backend)
 MODELSCOPE_AVAILABLE = is_package_available("modelscope")
 
-# Conditionally import ModelScopeSearch when available
-if MODELSCOPE_AVAILABLE:
-    try:
-        from .modelscope_search import ModelScopeSearch
-    except ImportError:
-        ModelScopeSearch = None
-        MODELSCOPE_AVAILABLE = False
-else:
-    ModelScopeSearch = None
+
+def __getattr__(name: str):
+    """Resolve ``ModelScopeSearch`` lazily; importing it pulls in the search module."""
+    if name == "ModelScopeSearch":
+        if not MODELSCOPE_AVAILABLE:
+            return None
+        try:
+            from .modelscope_search import ModelScopeSearch
+        except ImportError:
+            return None
+        return ModelScopeSearch
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Check for SQLAlchemy (for optional SQL state backend)
 SQLALCHEMY_AVAILABLE = is_package_available("sqlalchemy")
@@ -15,7 +15,7 @@ import requests
 
 from ..config import config
 from ..logging import get_logger
-from ..search import SearchResult
+from ..search import SearchResult, _json_loads
 from ..utils import get_api_key
 
 
@@ -28,11 +28,19 @@ class DirectIDBackend:
     """
 
     def __init__(
-        self, known_models_path: str = "civitai_tools/config/known_models.json", logger=None
+        self,
+        known_models_path: str = "civitai_tools/config/known_models.json",
+        logger=None,
+        session: Optional[requests.Session] = None,
+        rate_limiter=None,
     ):
         self.known_models_path = Path(known_models_path)
         self.api_key = config.search.civitai_api_key or get_api_key()
         self.base_url = "https://civitai.com/api/v1"
+        # Keep-alive session; CivitaiSearch passes its own pooled one
+        self._session = session or requests.Session()
+        # Shared with CivitaiSearch so direct lookups count against the same budget
+        self._rate_limiter = rate_limiter
         self.logger = logger or get_logger("DirectIDBackend")
         self.known_models = self._load_known_models()
 
@@ -171,19 +179,13 @@ class DirectIDBackend:
         self.logger.info(f"Direct ID lookup for model {model_id}")
 
         try:
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            response = requests.get(
-                f"{self.base_url}/models/{model_id}", headers=headers, timeout=30
-            )
+            response = self._get_model(model_id)
 
             if response.status_code != 200:
                 self.logger.error(f"Direct ID lookup failed with status {response.status_code}")
                 return None
 
-            model_data = response.json()
+            model_data = _json_loads(response.content)
 
             # Get the specified version or latest version
             versions = model_data.get("modelVersions", [])
@@ -243,14 +245,19 @@ class DirectIDBackend:
             self.logger.error(f"Direct ID lookup error for model {model_id}: {e}")
             return None
 
-    def _fetch_model_data(self, model_id: int) -> Optional[Dict[str, Any]]:
-        """Fetch raw model data from Civitai API."""
+    def _get_model(self, model_id: int) -> requests.Response:
+        """GET ``/models/{model_id}``, waiting on the shared rate limiter if there is one."""
         headers = {}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        return self._session.get(f"{self.base_url}/models/{model_id}", headers=headers, timeout=30)
 
+    def _fetch_model_data(self, model_id: int) -> Optional[Dict[str, Any]]:
+        """Fetch raw model data from Civitai API."""
         try:
-            response = requests.get(f"{self.base_url}/models/{model_id}", headers=headers, timeout=30)
+            response = self._get_model(model_id)
         except Exception as exc:  # pragma: no cover - network guard
             self.logger.error("Failed to fetch metadata for model %s: %s", model_id, exc)
             return None
@@ -264,7 +271,7 @@ class DirectIDBackend:
             return None
 
         try:
-            return response.json()
+            return _json_loads(response.content)
         except Exception as exc:  # pragma: no cover - malformed JSON
             self.logger.error("Invalid JSON when fetching model %s: %s", model_id, exc)
             return None
@@ -23,6 +23,7 @@ Examples:
   comfywatchman workflow.json            # Analyze specific workflow file
   comfywatchman --dir /path/to/workflows  # Analyze workflows in specific directory
   comfywatchman --search civitai,huggingface  # Use specific search backends
+  comfywatchman --serve /tmp/cw.sock     # Keep a warm search server running
   comfywatchman inspect model.safetensors  # Inspect a single model file
         """,
     )
@@ -50,6 +51,18 @@ Examples:
         help="Comma-separated list of search backends (default: qwen,civitai)",
     )
 
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="Run a search server on this Unix socket (see search.server_socket)",
+    )
+
+    parser.add_argument(
+        "--refresh-negative-cache",
+        action="store_true",
+        help="Forget cached NOT_FOUND search results before analyzing",
+    )
+
     # Mode options
     parser.add_argument(
         "--v1",
@@ -320,6 +333,27 @@ def main(argv: Optional[List[str]] = None) -> int:
             [b.strip() for b in args.search.split(",")] if args.search else ["civitai"]
         )
 
+        if args.serve:
+            import asyncio
+
+            from .search_server import serve
+
+            try:
+                asyncio.run(serve(args.serve))
+            except KeyboardInterrupt:
+                logger.info("Search server stopped")
+            return 0
+
+        if args.refresh_negative_cache:
+            from .search import ModelSearch
+
+            model_search = ModelSearch(logger=logger)
+            try:
+                cleared = model_search.clear_negative_cache()
+            finally:
+                model_search.close()
+            logger.info(f"Cleared {cleared} cached NOT_FOUND results")
+
         workflow_dirs = args.workflow_dirs or [str(d) for d in config.workflow_dirs]
         scheduler_workflow_dirs = workflow_dirs if workflow_dirs else None
 
@@ -26,7 +26,11 @@ class SearchConfig:
     backend_order: List[str] = field(default_factory=list)  # Will be set dynamically
     civitai_api_key: Optional[str] = os.getenv("CIVITAI_API_KEY")
     enable_cache: bool = True
-    cache_ttl: int = 86400
+    cache_ttl: int = 86400  # seconds to serve cached results; 0 keeps them forever
+    negative_cache_ttl: int = 3600  # seconds to remember NOT_FOUND results; 0 disables
+    memory_cache_size: int = 1024  # search results kept in RAM in front of the cache file
+    max_cache_entries: int = 50000  # rows kept in the cache file, least used evicted; 0 = no cap
+    enable_warmup: bool = False  # preload the cache and connect backends in the background
     known_models_map: str = "civitai_tools/config/known_models.json"
     civitai_use_direct_id: bool = True
     min_confidence_threshold: int = 50
@@ -35,6 +39,17 @@ class SearchConfig:
     qwen_cache_ttl: int = 30 * 24 * 3600  # 30 days
     qwen_binary: str = field(default_factory=lambda: os.getenv("QWEN_BINARY", "qwen"))
     qwen_extra_args: List[str] = field(default_factory=list)
+    qwen_persistent_worker: bool = False  # reuse one long-lived qwen process
+    qwen_worker_args: List[str] = field(default_factory=lambda: ["--server-mode"])
+    qwen_batch_size: int = 1  # models per Qwen prompt when qwen leads a batch search; 1 disables
+    max_parallel_searches: int = 4  # models searched concurrently in a batch
+    backend_concurrency: int = 2  # in-flight requests allowed per backend
+    parallel_backends: bool = False  # race backends, first FOUND wins
+    adaptive_backend_order: bool = False  # try backends by past FOUND rate per model type
+    civitai_requests_per_second: int = 5  # client-side politeness limit; 0 disables
+    civitai_response_ttl: int = 300  # seconds to reuse identical strategy API responses; 0 disables
+    server_socket: str = ""  # Unix socket of a running search server; "" searches in-process
+    server_timeout: int = 1800  # seconds to wait for the search server's reply
 
 
 @dataclass
@@ -253,6 +268,10 @@ class Config:
             "QWEN_CACHE_TTL": ("qwen_cache_ttl", int),
             "QWEN_BINARY": ("qwen_binary", str),
             "QWEN_EXTRA_ARGS": ("qwen_extra_args", lambda v: shlex.split(v)),
+            "QWEN_PERSISTENT_WORKER": (
+                "qwen_persistent_worker",
+                lambda v: v.lower() in ("true", "1", "yes"),
+            ),
         }
 
         for env_key, attr_info in search_env_map.items():
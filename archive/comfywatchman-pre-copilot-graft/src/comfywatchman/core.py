@@ -14,7 +14,7 @@ Functions:
 """
 
 import os
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -24,6 +24,7 @@ from .inventory import ModelInventory
 from .logging import get_logger
 from .scanner import WorkflowScanner
 from .search import ModelSearch, SearchResult
+from .search_server import search_models_via_server
 from .state_manager import JsonStateManager
 from .utils import save_json_file, load_json_file
 from .dashboard import generate_dashboard
@@ -301,9 +302,27 @@ class ComfyFixerCore:
             backend_order = config.search.backend_order
             search_backends = list(backend_order) if backend_order else ["civitai"]
 
-        search_results = self.search.search_multiple_models(
-            missing_models, backends=search_backends, use_cache=True
-        )
+        search_results = None
+        if config.search.server_socket:
+            search_results = search_models_via_server(
+                config.search.server_socket, missing_models, backends=search_backends
+            )
+            if search_results is None:
+                self.logger.info("Search server unavailable, searching in-process")
+            else:
+                # The server searches without our state manager; record the attempts here
+                self.state_manager.mark_downloads_attempted(
+                    (
+                        model["filename"],
+                        model,
+                        result.to_dict() if result.status == "FOUND" else None,
+                    )
+                    for model, result in zip(missing_models, search_results)
+                )
+        if search_results is None:
+            search_results = self.search.search_multiple_models(
+                missing_models, backends=search_backends, use_cache=True
+            )
 
         resolved_count = sum(1 for result in search_results if result.status == "FOUND")
         self.current_run.models_resolved = resolved_count
@@ -313,7 +332,7 @@ class ComfyFixerCore:
         # Save resolutions
         if search_results:
             resolutions_file = config.output_dir / f"resolutions_{self.current_run.run_id}.json"
-            resolutions_data = [result.__dict__ for result in search_results]
+            resolutions_data = [asdict(result) for result in search_results]
             save_json_file(resolutions_file, resolutions_data)
             self.current_run.resolutions_file = str(resolutions_file)
 
@@ -339,7 +358,7 @@ class ComfyFixerCore:
         to_download = []
         for result in search_results:
             if result.status == "FOUND":
-                to_download.append(result.__dict__)
+                to_download.append(asdict(result))
             elif result.status == "UNCERTAIN":
                 self.logger.warning(f"Uncertain search result for '{result.filename}':")
                 candidates = result.metadata.get("candidates", [])
@@ -380,7 +399,7 @@ class ComfyFixerCore:
         self.logger.info("=== Generating Download Script ===")
 
         # Convert SearchResult objects to dicts
-        results_dict = [result.__dict__ for result in search_results]
+        results_dict = [asdict(result) for result in search_results]
 
         script_path = self.download_manager.generate_download_script(
             results_dict, run_id=self.current_run.run_id
@@ -17,19 +17,34 @@ Functions:
     search_with_qwen: Convenience function for Qwen search
 """
 
+import asyncio
+import atexit
+import copy
+import difflib
 import hashlib
+import inspect
 import json
 import os
+import queue
 import re
 import shlex
+import sqlite3
 import subprocess
+import tempfile
+import threading
 import time
+import uuid
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Import adapters and feature flags
 from .adapters import MODELSCOPE_AVAILABLE
@@ -38,15 +53,372 @@ from .logging import get_logger
 from .state_manager import StateManager
 from .utils import get_api_key, sanitize_filename, validate_and_sanitize_filename
 
-# Conditionally import ModelScopeSearch
+# orjson is an optional speedup for cache (de)serialization
 try:
-    from .adapters.modelscope_search import ModelScopeSearch
+    import orjson
 except ImportError:
-    ModelScopeSearch = None
+    orjson = None
 
+# rapidfuzz is an optional speedup for fuzzy filename scoring
+try:
+    from rapidfuzz import fuzz as _rapidfuzz
+except ImportError:
+    _rapidfuzz = None
+
+# Minimum 0-100 similarity for a query-search file to count as a fuzzy match
+_FUZZY_MATCH_THRESHOLD = 80
+
+# Extensions accepted for fuzzy (containment) matches against repository files
+_MODEL_FILE_EXTENSIONS = (".safetensors", ".ckpt", ".pt", ".bin", ".pth", ".onnx")
+_MODEL_FILE_EXTENSION_SET = frozenset(_MODEL_FILE_EXTENSIONS)
+
+# Extensions search_model accepts at all; anything else is INVALID_FILENAME
+_SEARCHABLE_EXTENSIONS = _MODEL_FILE_EXTENSIONS + (".gguf",)
+
+# Precompiled patterns for filename -> query normalization (hot path on every search)
+_QUERY_DELIM_RE = re.compile(r"[\\/_.]+")
+_LOOKUP_NOISE_RE = re.compile(
+    r"\.safetensors|\.ckpt|\.pt|\.bin|\.pth|v\d+\.\d+|v\d+", re.IGNORECASE
+)
+_VERSION_NOISE_RE = re.compile(r"v\d+|\d+\.\d+|_|-|\s+")
+_HF_REPO_URL_RE = re.compile(r"huggingface\.co/([^/]+)/([^/?]+)")
+_GITHUB_REPO_URL_RE = re.compile(r"github\.com/([^/]+)/([^/?]+)")
+
+# ComfyUI model folder -> Civitai ``types`` filter
+_CIVITAI_TYPE_FILTER: Dict[str, str] = {
+    "checkpoints": "Checkpoint",
+    "loras": "LORA",
+    "vae": "VAE",
+    "controlnet": "Controlnet",
+    "upscale_models": "Upscaler",
+    "clip": "TextualInversion",  # Approximation
+    "embeddings": "TextualInversion",
+    "unet": "Checkpoint",  # Approximation
+}
+
+# Civitai model ``type`` -> ComfyUI model folder
+_CIVITAI_TYPE_TO_MODEL_TYPE: Dict[str, str] = {
+    "Checkpoint": "checkpoints",
+    "LORA": "loras",
+    "VAE": "vae",
+    "Controlnet": "controlnet",
+    "Upscaler": "upscale_models",
+    "TextualInversion": "clip",
+}
+
+# ComfyUI model folder -> directory under the ComfyUI root, for the hash fallback
+_COMFYUI_MODEL_DIRS: Dict[str, str] = {
+    "checkpoints": "models/checkpoints",
+    "loras": "models/loras",
+    "vae": "models/vae",
+    "controlnet": "models/controlnet",
+    "upscale_models": "models/upscale_models",
+    "embeddings": "models/embeddings",
+    "clip": "models/clip",
+}
+
+# Query words searched as Civitai tags ahead of the other query words
+_TAG_TERMS = frozenset(
+    {
+        # Anatomical terms
+        "anatomy",
+        "anatomical",
+        "detail",
+        "details",
+        "eyes",
+        "pussy",
+        "anus",
+        "breasts",
+        "ass",
+        "thighs",
+        # Style terms
+        "realistic",
+        "high",
+        "definition",
+        "hd",
+        "detailed",
+        # Content terms
+        "nsfw",
+        "explicit",
+        "nude",
+        "naked",
+        "adult",
+    }
+)
+
+# Keywords appended to the query by the unfiltered NSFW search
+_NSFW_QUERY_KEYWORDS = ("nsfw", "adult", "explicit", "nude", "erotic")
+
+# Civitai nsfwLevel values tried by the per-level search: PG13, R, X, XXX
+_NSFW_LEVELS = (2, 4, 8, 16)
+
+# Tag queries issued per filename by the tag-search strategy
+_MAX_TAG_SEARCHES = 5
+
+# Query words never used as tags
+_TAG_STOPWORDS = frozenset({"and", "the", "for", "with", "v1", "v2", "v3", "xl"})
+
+# Backend statuses that end a sequential search instead of falling through
+_TERMINAL_STATUSES = ("FOUND", "ERROR", "INVALID_FILENAME")
+
+# Bump when the search cache table layout changes; old caches are discarded
+_CACHE_SCHEMA_VERSION = 5
+
+# Separator runs collapsed by cache aliases, so "Foo_V1" and "foo-v1" share an entry
+_CACHE_ALIAS_SEP_RE = re.compile(r"[-_.\s]+")
+
+# Filenames per batched cache query; two parameters each stay under SQLite's 999
+_CACHE_LOOKUP_CHUNK = 400
+
+# Buffered state-manager attempts written per flush during batch searches
+_STATE_FLUSH_THRESHOLD = 32
+
+# Buffered cache rows written per transaction by flush_cache()
+_CACHE_FLUSH_THRESHOLD = 64
+
+# Outcomes each backend needs for a pattern tag before search.adaptive_backend_order uses it
+_ADAPTIVE_ORDER_MIN_SAMPLES = 20
+
+# Filename substring -> pattern tag for models without a type; first match wins
+_PATTERN_TAGS: Tuple[Tuple[str, str], ...] = (
+    ("lora", "loras"),
+    ("controlnet", "controlnet"),
+    ("vae", "vae"),
+    ("upscale", "upscale_models"),
+    ("esrgan", "upscale_models"),
+    ("embed", "embeddings"),
+)
+
+# Shortest wait before retrying a Civitai request; the API limits per second
+_MIN_RETRY_BACKOFF = 1.0
+
+# Retry options added in urllib3 2.0; passed only when the installed Retry accepts them
+_RETRY_V2_OPTIONS = {"backoff_max": 8.0, "backoff_jitter": 0.5}
+_RETRY_PARAMS = frozenset(inspect.signature(Retry.__init__).parameters)
+
+# Civitai responses memoized per (query, type filter) and per strategy request
+_CIVITAI_RESPONSE_CACHE_SIZE = 256
+
+# Upper bound, in seconds, on reusing a ``sort=Newest`` listing; it changes with every upload
+_CIVITAI_NEWEST_RESPONSE_TTL = 60
+
+# Upper bound, in seconds, on reusing an empty listing, so new uploads are picked up
+_CIVITAI_EMPTY_RESPONSE_TTL = 60
+
+# Civitai requests allowed in flight at once across every CivitaiSearch
+_MAX_CONCURRENT_CIVITAI_REQUESTS = 8
+
+
+class _SlidingWindowLimiter:
+    """Thread-safe limiter allowing at most ``max_requests`` per ``period`` seconds.
+
+    The effective limit adapts to the server's advertised headroom (see
+    ``observe_remaining``) but never exceeds ``max_requests``.
+    """
+
+    def __init__(self, max_requests: int, period: float = 1.0):
+        self.max_requests = max_requests
+        self.period = period
+        self.limit = max_requests
+        self._timestamps: deque = deque()
+        self._lock = threading.Lock()
+
+    def observe_remaining(self, remaining: int) -> None:
+        """Halve the limit while the server reports fewer than ``max_requests`` left.
+
+        Once the headroom recovers the limit doubles back towards ``max_requests``.
+        """
+        if self.max_requests <= 0:
+            return
+        with self._lock:
+            if remaining < self.max_requests:
+                self.limit = max(1, self.limit // 2)
+            else:
+                self.limit = min(self.max_requests, self.limit * 2)
+
+    def acquire(self) -> None:
+        """Block until another request fits in the window."""
+        if self.max_requests <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self.period:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < self.limit:
+                    self._timestamps.append(now)
+                    return
+                wait = self.period - (now - self._timestamps[0])
+            time.sleep(wait)
+
+
+class _CivitaiRetry(Retry):
+    """Retry whose backoff never drops below ``_MIN_RETRY_BACKOFF``.
+
+    An immediate retry of a 429 lands in the same one-second rate-limit bucket,
+    so even the first retry waits. Retry-After, when sent, still takes precedence.
+    """
+
+    def get_backoff_time(self) -> float:
+        return max(_MIN_RETRY_BACKOFF, super().get_backoff_time())
+
+
+class _CivitaiSupervisor:
+    """Civitai client state shared by every ``CivitaiSearch`` in the process.
 
+    Backends are created per ModelSearch and per ``search_civitai`` logger, so
+    the keep-alive sessions, rate limiter, strategy pool, response caches and
+    in-flight request map live here rather than on each instance. Members are
+    created on first use, after the configuration has been loaded.
+    """
 
-@dataclass
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[Optional[str], requests.Session] = {}
+        self._rate_limiter: Optional[_SlidingWindowLimiter] = None
+        self._strategy_pool: Optional[ThreadPoolExecutor] = None
+        # Caps concurrent requests; the rate limiter only spaces their starts
+        self.request_slots = threading.BoundedSemaphore(_MAX_CONCURRENT_CIVITAI_REQUESTS)
+        # Guards the caches and in-flight map below
+        self.cache_lock = threading.Lock()
+        # (query, type filter) -> (expires_at, items, lowercase file-name index)
+        self.response_cache: OrderedDict = OrderedDict()
+        # (path, sorted params) -> (expires_at, payload) for the strategy searches
+        self.json_cache: OrderedDict = OrderedDict()
+        # (path, sorted params) -> (payload, file index) built from that payload
+        self.index_cache: OrderedDict = OrderedDict()
+        # (query, type filter) keys with a request in progress -> completion event
+        self.in_flight: Dict[Tuple[str, Optional[str]], threading.Event] = {}
+
+    def session(self, api_key: Optional[str]) -> requests.Session:
+        """Return the pooled session authenticating with ``api_key``."""
+        with self._lock:
+            session = self._sessions.get(api_key)
+            if session is None:
+                session = self._sessions[api_key] = self._build_session(api_key)
+            return session
+
+    @staticmethod
+    def _build_session(api_key: Optional[str]) -> requests.Session:
+        """Create a pooled keep-alive session with jittered retries for transient errors."""
+        session = requests.Session()
+        if api_key:
+            session.headers["Authorization"] = f"Bearer {api_key}"
+        retry = _CivitaiRetry(
+            total=4,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            **{k: v for k, v in _RETRY_V2_OPTIONS.items() if k in _RETRY_PARAMS},
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=_MAX_CONCURRENT_CIVITAI_REQUESTS * 2,
+            max_retries=retry,
+        )
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def rate_limiter(self) -> _SlidingWindowLimiter:
+        with self._lock:
+            if self._rate_limiter is None:
+                self._rate_limiter = _SlidingWindowLimiter(
+                    config.search.civitai_requests_per_second
+                )
+            return self._rate_limiter
+
+    @property
+    def strategy_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._strategy_pool is None:
+                self._strategy_pool = ThreadPoolExecutor(
+                    max_workers=_MAX_CONCURRENT_CIVITAI_REQUESTS,
+                    thread_name_prefix="civitai-strategy",
+                )
+            return self._strategy_pool
+
+    def close(self) -> None:
+        """Close the sessions and stop the strategy threads (registered with atexit)."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            pool, self._strategy_pool = self._strategy_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for session in sessions:
+            session.close()
+
+
+_CIVITAI_SUPERVISOR = _CivitaiSupervisor()
+atexit.register(_CIVITAI_SUPERVISOR.close)
+
+
+def _pattern_tag(model_info: Dict[str, Any]) -> str:
+    """Bucket a model for backend outcome statistics: its type, else a filename guess."""
+    model_type = model_info.get("type")
+    if model_type:
+        return str(model_type).lower()
+    filename = model_info["filename"].lower()
+    for substring, tag in _PATTERN_TAGS:
+        if substring in filename:
+            return tag
+    return "other"
+
+
+def _cache_alias(key: str) -> str:
+    """Alias of a sanitized cache key: lowercase stem, separator runs as one ``_``, extension.
+
+    Separators are collapsed rather than dropped, so ``model-v1.5`` and
+    ``model_v15`` (or ``sd_xl`` and ``sdxl``) stay distinct. The extension is
+    kept so that, e.g., a ``.ckpt`` result is never served for the
+    ``.safetensors`` file of the same name.
+    """
+    stem, ext = os.path.splitext(key.lower())
+    return _CACHE_ALIAS_SEP_RE.sub("_", stem) + ext
+
+
+def _name_similarity(a: str, b: str) -> float:
+    """0-100 token-set similarity of two normalized names, using RapidFuzz when available."""
+    if _rapidfuzz is not None:
+        return _rapidfuzz.token_set_ratio(a, b)
+
+    # Same scheme as token_set_ratio: compare the sorted shared tokens with
+    # each side's shared-plus-remaining tokens, and keep the best ratio
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    if not tokens_a or not tokens_b:
+        return 0.0
+    shared = tokens_a & tokens_b
+    if shared and (tokens_a <= tokens_b or tokens_b <= tokens_a):
+        return 100.0
+    sect = " ".join(sorted(shared))
+    rest_a = " ".join(sorted(tokens_a - shared))
+    rest_b = " ".join(sorted(tokens_b - shared))
+    combined_a = f"{sect} {rest_a}" if sect else rest_a
+    combined_b = f"{sect} {rest_b}" if sect else rest_b
+    pairs = [(combined_a, combined_b)]
+    if sect:
+        pairs += [(sect, combined_a), (sect, combined_b)]
+    return max(difflib.SequenceMatcher(None, x, y).ratio() for x, y in pairs) * 100
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize ``obj`` to compact JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(data: Any) -> Any:
+    """Parse JSON from ``str`` or ``bytes``, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass(slots=True)
 class SearchResult:
     """Result of a model search operation.
 
@@ -68,6 +440,28 @@ class SearchResult:
     metadata: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow field dict; unlike ``asdict`` the metadata dict is shared, not copied."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _result_bytes(result: SearchResult) -> bytes:
+    """``_json_dumps(result.to_dict())``, without building the dict when orjson is available."""
+    if orjson is not None:
+        # orjson encodes dataclass fields natively, in definition order
+        return orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+    return _json_dumps(result.to_dict())
+
+
+@dataclass(frozen=True, slots=True)
+class _SearchTarget:
+    """Per-filename values every Civitai strategy search derives from a model ref."""
+
+    filename: str
+    model_type: str
+    query: str
+    type_filter: Optional[str]
+
 
 class SearchBackend(ABC):
     """Abstract base class for search backends."""
@@ -87,18 +481,190 @@ class SearchBackend(ABC):
 
 
 class CivitaiSearch(SearchBackend):
-    """Civitai API search backend."""
+    """Civitai API search backend.
 
-    def __init__(self, logger=None):
+    Sessions, rate limiting, the strategy pool and response caches come from
+    ``supervisor`` (the process-wide one by default), so separately created
+    backends share warm connections and each other's responses.
+    """
+
+    def __init__(self, logger=None, supervisor: Optional[_CivitaiSupervisor] = None):
         super().__init__(logger)
         self.api_key = (
             config.search.civitai_api_key or get_api_key()
         )  # Fallback for old method
         self.base_url = "https://civitai.com/api/v1"
+        self._supervisor = supervisor or _CIVITAI_SUPERVISOR
+        self._session = self._supervisor.session(self.api_key)
+        self._rate_limiter = self._supervisor.rate_limiter
+        # Filenames that normalize to the same query share one API response
+        # (items plus their lowercase file-name index)
+        self._response_cache = self._supervisor.response_cache
+        self._response_cache_lock = self._supervisor.cache_lock
+        # (path, sorted params) -> (expires_at, payload) for the strategy searches
+        self._json_cache = self._supervisor.json_cache
+        # (path, sorted params) -> (payload, file index) built from that payload
+        self._index_cache = self._supervisor.index_cache
+        # (query, type filter) keys with a request in progress -> completion event
+        self._in_flight = self._supervisor.in_flight
+        # Known-model lookup, created on first use and sharing the session
+        self._direct_backend = None
 
     def get_name(self) -> str:
         return "civitai"
 
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """GET a Civitai API path (relative to ``base_url``) on the shared session."""
+        self._rate_limiter.acquire()
+        with self._supervisor.request_slots:
+            response = self._session.get(
+                f"{self.base_url}{path}", params=params, timeout=config.civitai_api_timeout
+            )
+        remaining = getattr(response, "headers", {}).get("X-RateLimit-Remaining")
+        if isinstance(remaining, str) and remaining.isdigit():
+            self._rate_limiter.observe_remaining(int(remaining))
+        return response
+
+    def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """GET a Civitai API path and return its JSON payload, or None if not 200.
+
+        Payloads are memoized per (path, params) for
+        ``config.search.civitai_response_ttl`` seconds, so the cascade strategies
+        and neighbouring filenames that repeat a request share one round-trip.
+        ``sort=Newest`` listings are kept for at most
+        ``_CIVITAI_NEWEST_RESPONSE_TTL`` seconds. Callers must treat the
+        returned payload as read-only.
+        """
+        ttl = config.search.civitai_response_ttl
+        if params and params.get("sort") == "Newest":
+            ttl = min(ttl, _CIVITAI_NEWEST_RESPONSE_TTL)
+        key = (path, tuple(sorted((params or {}).items())))
+        if ttl > 0:
+            with self._response_cache_lock:
+                entry = self._json_cache.get(key)
+                if entry is not None:
+                    if time.monotonic() < entry[0]:
+                        self._json_cache.move_to_end(key)
+                        return entry[1]
+                    del self._json_cache[key]
+
+        response = self._get(path, params=params)
+        if response.status_code != 200:
+            return None
+        payload = _json_loads(response.content)
+
+        if ttl > 0:
+            with self._response_cache_lock:
+                self._json_cache[key] = (time.monotonic() + ttl, payload)
+                self._json_cache.move_to_end(key)
+                if len(self._json_cache) > _CIVITAI_RESPONSE_CACHE_SIZE:
+                    self._json_cache.popitem(last=False)
+        return payload
+
+    def _get_indexed(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Tuple[List[Dict], Dict[str, Tuple[Dict, Dict]]]]:
+        """``_get_json`` for ``/models`` listings, returning (items, ``_index_files(items)``).
+
+        The index is kept for as long as ``_get_json`` hands back the same
+        memoized payload, so strategies repeating a request skip the
+        items -> versions -> files walk as well as the round-trip.
+        """
+        data = self._get_json(path, params=params)
+        if data is None:
+            return None
+        if config.search.civitai_response_ttl <= 0:
+            # Payloads are not memoized, so an identity-keyed entry could never hit
+            items = data.get("items") or []
+            return items, self._index_files(items)
+        key = (path, tuple(sorted((params or {}).items())))
+        with self._response_cache_lock:
+            entry = self._index_cache.get(key)
+            if entry is not None and entry[0] is data:
+                self._index_cache.move_to_end(key)
+                return data.get("items") or [], entry[1]
+
+        items = data.get("items") or []
+        file_index = self._index_files(items)
+        with self._response_cache_lock:
+            self._index_cache[key] = (data, file_index)
+            self._index_cache.move_to_end(key)
+            if len(self._index_cache) > _CIVITAI_RESPONSE_CACHE_SIZE:
+                self._index_cache.popitem(last=False)
+        return items, file_index
+
+    def close(self) -> None:
+        """No-op: connections and threads belong to the shared supervisor."""
+
+    def warmup(self) -> None:
+        """Open a pooled connection (DNS + TLS) to the API ahead of the first search."""
+        self._session.head(self.base_url, timeout=2)
+
+    def _get_direct_backend(self):
+        """Return the DirectIDBackend, loading known_models.json once per instance."""
+        if self._direct_backend is None:
+            from .civitai_tools.direct_id_backend import DirectIDBackend
+
+            self._direct_backend = DirectIDBackend(
+                session=self._session, rate_limiter=self._rate_limiter
+            )
+        return self._direct_backend
+
+    def _cached_items(
+        self, key: Tuple[str, Optional[str]]
+    ) -> Optional[Tuple[List[Dict], Dict[str, Tuple[Dict, Dict]]]]:
+        """Return memoized ``/models`` items and file index for a (query, type filter) key."""
+        with self._response_cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[0]:
+                del self._response_cache[key]
+                return None
+            self._response_cache.move_to_end(key)
+            return entry[1], entry[2]
+
+    def _claim_fetch(self, key: Tuple[str, Optional[str]]) -> Optional[threading.Event]:
+        """Register the caller as the fetcher for ``key``.
+
+        Returns None when the caller should fetch (and later call ``_finish_fetch``),
+        or the event of a fetch already in progress to wait on.
+        """
+        with self._response_cache_lock:
+            event = self._in_flight.get(key)
+            if event is None:
+                self._in_flight[key] = threading.Event()
+            return event
+
+    def _finish_fetch(self, key: Tuple[str, Optional[str]]) -> None:
+        """Wake searches waiting on the fetch for ``key``."""
+        with self._response_cache_lock:
+            event = self._in_flight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _store_items(
+        self, key: Tuple[str, Optional[str]], items: List[Dict]
+    ) -> Tuple[List[Dict], Dict[str, Tuple[Dict, Dict]]]:
+        """Index ``/models`` items and memoize them, evicting the least recently used entry.
+
+        Entries live for ``config.search.civitai_response_ttl`` seconds, empty
+        listings for at most ``_CIVITAI_EMPTY_RESPONSE_TTL``; a TTL of 0
+        disables memoizing.
+        """
+        entry = (items, self._index_files(items))
+        ttl = config.search.civitai_response_ttl
+        if not items:
+            ttl = min(ttl, _CIVITAI_EMPTY_RESPONSE_TTL)
+        if ttl <= 0:
+            return entry
+        with self._response_cache_lock:
+            self._response_cache[key] = (time.monotonic() + ttl, *entry)
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > _CIVITAI_RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+        return entry
+
     def search(self, model_info: Dict[str, Any]) -> SearchResult:
         """Search Civitai API for a model."""
         raw_filename = model_info["filename"]
@@ -128,9 +694,7 @@ class CivitaiSearch(SearchBackend):
 
         # NEW: Try DirectIDBackend first
         try:
-            from .civitai_tools.direct_id_backend import DirectIDBackend
-
-            direct_backend = DirectIDBackend()
+            direct_backend = self._get_direct_backend()
 
             # Extract name for lookup (remove file extension)
             name = filename.rsplit(".", 1)[0] if "." in filename else filename
@@ -166,151 +730,168 @@ class CivitaiSearch(SearchBackend):
 
         self.logger.info(f"Searching Civitai API: {query}")
 
-        try:
-            # Build search parameters
-            params = {"query": query, "limit": 10, "sort": "Highest Rated"}
-
-            # Add type filtering if applicable
-            type_filter = self._get_type_filter(model_type)
-            if type_filter:
-                params["types"] = type_filter
-
-            response = requests.get(
-                f"{self.base_url}/models",
-                params=params,
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                timeout=30,
-            )
-
-            if response.status_code != 200:
+        # Build search parameters
+        params = {"query": query, "limit": 10, "sort": "Highest Rated"}
+
+        # Add type filtering if applicable
+        type_filter = self._get_type_filter(model_type)
+        if type_filter:
+            params["types"] = type_filter
+
+        cache_key = (query.casefold(), type_filter)
+        entry = self._cached_items(cache_key)
+        in_flight = None
+        if entry is None:
+            # Concurrent searches for the same query share one request
+            in_flight = self._claim_fetch(cache_key)
+            if in_flight is not None:
+                in_flight.wait()
+                entry = self._cached_items(cache_key)
+        if entry is None:
+            # Only the network round trip and decoding are guarded; anything
+            # raised by the matching logic below is a bug and should surface
+            try:
+                response = self._get("/models", params=params)
+                if response.status_code != 200:
+                    return SearchResult(
+                        status="ERROR",
+                        filename=filename,
+                        type=model_type,
+                        error_message=f"API error: {response.status_code}",
+                    )
+                payload = _json_loads(response.content)
+            except requests.Timeout:
+                self.logger.error("Civitai search timed out for %s", filename)
                 return SearchResult(
-                    status="ERROR",
-                    filename=filename,
-                    error_message=f"API error: {response.status_code}",
+                    status="ERROR", filename=filename, type=model_type, error_message="timeout"
+                )
+            except (requests.RequestException, ValueError) as e:
+                self.logger.error(f"Civitai search error: {e}")
+                return SearchResult(
+                    status="ERROR", filename=filename, type=model_type, error_message=str(e)
+                )
+            else:
+                items = payload.get("items", []) if isinstance(payload, dict) else []
+                entry = self._store_items(cache_key, items)
+            finally:
+                if in_flight is None:
+                    self._finish_fetch(cache_key)
+        results, file_index = entry
+        if not results:
+            self.logger.info(
+                "Simple Civitai search returned zero results, attempting multi-strategy cascade"
+            )
+            cascade_results = self.search_multi_strategy(model_info)
+            if cascade_results:
+                best_result = cascade_results[0]
+                best_result.filename = filename
+                if not best_result.type:
+                    best_result.type = model_type
+                if best_result.metadata is None:
+                    best_result.metadata = {}
+                best_result.metadata["search_attempts"] = max(
+                    2, best_result.metadata.get("search_attempts", 1)
                 )
-
-            results = response.json().get("items", [])
-            if not results:
                 self.logger.info(
-                    "Simple Civitai search returned zero results, attempting multi-strategy cascade"
+                    "Multi-strategy found result after empty simple search: %s (ID: %s)",
+                    best_result.civitai_name,
+                    best_result.civitai_id,
                 )
-                cascade_results = self.search_multi_strategy(model_info)
-                if cascade_results:
-                    best_result = cascade_results[0]
-                    best_result.filename = filename
-                    if not best_result.type:
-                        best_result.type = model_type
-                    if best_result.metadata is None:
-                        best_result.metadata = {}
-                    best_result.metadata["search_attempts"] = max(
-                        2, best_result.metadata.get("search_attempts", 1)
-                    )
-                    self.logger.info(
-                        "Multi-strategy found result after empty simple search: %s (ID: %s)",
-                        best_result.civitai_name,
-                        best_result.civitai_id,
-                    )
-                    return best_result
-
-                # Hash fallback: Try to find local file and use its hash for lookup
-                hash_result = self._try_hash_fallback(model_info)
-                if hash_result:
-                    hash_result.filename = filename
-                    if not hash_result.type:
-                        hash_result.type = model_type
-                    if hash_result.metadata is None:
-                        hash_result.metadata = {}
-                    hash_result.metadata["search_attempts"] = max(
-                        3, hash_result.metadata.get("search_attempts", 1)
-                    )
-                    self.logger.info(
-                        "Hash fallback found result after empty simple + multi-strategy search: %s (ID: %s)",
-                        hash_result.civitai_name,
-                        hash_result.civitai_id,
-                    )
-                    return hash_result
-
-                return SearchResult(
-                    status="NOT_FOUND",
-                    filename=filename,
-                    type=model_type,
-                    metadata={
-                        "search_attempts": 3,
-                        "reason": "Simple + multi-strategy + hash fallback search returned no results",
-                    },
+                return best_result
+
+            # Hash fallback: Try to find local file and use its hash for lookup
+            hash_result = self._try_hash_fallback(model_info)
+            if hash_result:
+                hash_result.filename = filename
+                if not hash_result.type:
+                    hash_result.type = model_type
+                if hash_result.metadata is None:
+                    hash_result.metadata = {}
+                hash_result.metadata["search_attempts"] = max(
+                    3, hash_result.metadata.get("search_attempts", 1)
+                )
+                self.logger.info(
+                    "Hash fallback found result after empty simple + multi-strategy search: %s (ID: %s)",
+                    hash_result.civitai_name,
+                    hash_result.civitai_id,
                 )
+                return hash_result
+
+            return SearchResult(
+                status="NOT_FOUND",
+                filename=filename,
+                type=model_type,
+                metadata={
+                    "search_attempts": 3,
+                    "reason": "Simple + multi-strategy + hash fallback search returned no results",
+                },
+            )
 
-            # Find best match
-            best_match = self._find_best_match(results, filename)
+        # Find best match
+        best_match = self._find_best_match(results, filename, file_index)
 
-            if best_match:
-                result_obj, version = best_match
-                return self._create_result_from_match(
-                    result_obj, version, filename, model_type, "exact"
+        if best_match:
+            result_obj, version = best_match
+            return self._create_result_from_match(
+                result_obj, version, filename, model_type, "exact"
+            )
+        else:
+            self.logger.info(
+                "Simple Civitai search returned candidates but no exact filename match; "
+                "attempting multi-strategy cascade"
+            )
+            cascade_results = self.search_multi_strategy(model_info)
+
+            if cascade_results:
+                best_result = cascade_results[0]
+                best_result.filename = filename
+                if not best_result.type:
+                    best_result.type = model_type
+                if best_result.metadata is None:
+                    best_result.metadata = {}
+                best_result.metadata["search_attempts"] = max(
+                    2, best_result.metadata.get("search_attempts", 1)
                 )
-            else:
                 self.logger.info(
-                    "Simple Civitai search returned candidates but no exact filename match; "
-                    "attempting multi-strategy cascade"
+                    "Multi-strategy found result after no exact match: %s (ID: %s)",
+                    best_result.civitai_name,
+                    best_result.civitai_id,
                 )
-                cascade_results = self.search_multi_strategy(model_info)
-
-                if cascade_results:
-                    best_result = cascade_results[0]
-                    best_result.filename = filename
-                    if not best_result.type:
-                        best_result.type = model_type
-                    if best_result.metadata is None:
-                        best_result.metadata = {}
-                    best_result.metadata["search_attempts"] = max(
-                        2, best_result.metadata.get("search_attempts", 1)
-                    )
-                    self.logger.info(
-                        "Multi-strategy found result after no exact match: %s (ID: %s)",
-                        best_result.civitai_name,
-                        best_result.civitai_id,
-                    )
-                    return best_result
-
-                # Hash fallback: Try to find local file and use its hash for lookup
-                hash_result = self._try_hash_fallback(model_info)
-                if hash_result:
-                    hash_result.filename = filename
-                    if not hash_result.type:
-                        hash_result.type = model_type
-                    if hash_result.metadata is None:
-                        hash_result.metadata = {}
-                    hash_result.metadata["search_attempts"] = max(
-                        3, hash_result.metadata.get("search_attempts", 1)
-                    )
-                    self.logger.info(
-                        "Hash fallback found result after no exact match: %s (ID: %s)",
-                        hash_result.civitai_name,
-                        hash_result.civitai_id,
-                    )
-                    return hash_result
-
-                top = results[0]
-                meta = {
-                    "search_attempts": 3,
-                    "reason": "No exact filename match after simple + multi-strategy + hash fallback search",
-                    "top_candidate": {
-                        "id": top.get("id"),
-                        "name": top.get("name"),
-                        "type": top.get("type"),
-                    },
-                }
-                return SearchResult(
-                    status="NOT_FOUND",
-                    filename=filename,
-                    type=model_type,
-                    metadata=meta,
+                return best_result
+
+            # Hash fallback: Try to find local file and use its hash for lookup
+            hash_result = self._try_hash_fallback(model_info)
+            if hash_result:
+                hash_result.filename = filename
+                if not hash_result.type:
+                    hash_result.type = model_type
+                if hash_result.metadata is None:
+                    hash_result.metadata = {}
+                hash_result.metadata["search_attempts"] = max(
+                    3, hash_result.metadata.get("search_attempts", 1)
                 )
-
-        except Exception as e:
-            self.logger.error(f"Civitai search error: {e}")
+                self.logger.info(
+                    "Hash fallback found result after no exact match: %s (ID: %s)",
+                    hash_result.civitai_name,
+                    hash_result.civitai_id,
+                )
+                return hash_result
+
+            top = results[0]
+            meta = {
+                "search_attempts": 3,
+                "reason": "No exact filename match after simple + multi-strategy + hash fallback search",
+                "top_candidate": {
+                    "id": top.get("id"),
+                    "name": top.get("name"),
+                    "type": top.get("type"),
+                },
+            }
             return SearchResult(
-                status="ERROR", filename=filename, type=model_type, error_message=str(e)
+                status="NOT_FOUND",
+                filename=filename,
+                type=model_type,
+                metadata=meta,
             )
 
     def search_by_id(self, model_id: int) -> Optional[SearchResult]:
@@ -322,19 +903,13 @@ class CivitaiSearch(SearchBackend):
         self.logger.info(f"Searching by direct ID: {model_id}")
 
         try:
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            response = requests.get(
-                f"{self.base_url}/models/{model_id}", headers=headers, timeout=30
-            )
+            response = self._get(f"/models/{model_id}")
 
             if response.status_code != 200:
                 self.logger.error(f"Direct ID lookup failed: {response.status_code}")
                 return None
 
-            model_data = response.json()
+            model_data = _json_loads(response.content)
 
             # Get the first version for download (typically the latest)
             versions = model_data.get("modelVersions", [])
@@ -395,31 +970,22 @@ class CivitaiSearch(SearchBackend):
         Enhanced cascade through multiple search strategies for 100% NSFW model discovery:
         1. Check known_models.json for direct ID
         2. Try NSFW-specific multi-level search strategies
-        3. Try query search with different NSFW parameter combinations
+        3. Try query search with and without the NSFW parameter
         4. Try advanced tag-based search with NSFW tags
         5. Try creator-based search (if creator known)
-        6. Try fallback mechanisms for hidden NSFW content
-        Return scored candidates sorted by confidence.
+        Strategies 3-5 run concurrently, as do the independent requests within
+        steps 2.2 and 2.3. Return scored candidates sorted by confidence.
         """
         results = []
 
         # Strategy 1: Check known_models.json for direct ID using DirectIDBackend
-        from .civitai_tools.direct_id_backend import DirectIDBackend
-
-        direct_backend = DirectIDBackend()
+        direct_backend = self._get_direct_backend()
 
         # Try to find by model name first
         filename = model_ref.get("filename", "")
         if filename:
             # Extract model name from filename for lookup
-            import re
-
-            name_for_lookup = re.sub(
-                r"\.safetensors|\.ckpt|\.pt|\.bin|\.pth|v\d+\.\d+|v\d+",
-                "",
-                filename,
-                flags=re.IGNORECASE,
-            )
+            name_for_lookup = _LOOKUP_NOISE_RE.sub("", filename)
             name_for_lookup = (
                 name_for_lookup.replace("_", " ").replace("-", " ").strip()
             )
@@ -434,42 +1000,71 @@ class CivitaiSearch(SearchBackend):
                     reverse=True,
                 )
 
+        # Every remaining strategy searches for the same normalized query
+        target = self._search_target(model_ref)
+
         # Strategy 2: Enhanced NSFW-specific multi-level search
-        nsfw_results = self._search_nsfw_multi_level(model_ref)
+        nsfw_results = self._search_nsfw_multi_level(model_ref, target=target)
         results.extend(nsfw_results)
 
         if not results:
-            # Strategy 3: Try query search with different NSFW parameter combinations
-            nsfw_param_results = self._search_nsfw_parameter_combinations(model_ref)
-            results.extend(nsfw_param_results)
-
-        if not results:
-            # Strategy 4: Try advanced NSFW tag-based search
-            tag_results = self._search_by_nsfw_tags(model_ref)
-            results.extend(tag_results)
-
-        if not results and model_ref.get("creator"):
-            # Strategy 5: Try creator-based search (if creator known)
-            creator_results = self._search_by_creator(model_ref)
-            results.extend(creator_results)
-
-        if not results:
-            # Strategy 6: Try fallback mechanisms for hidden NSFW content
-            fallback_results = self._search_hidden_nsfw_fallbacks(model_ref)
-            results.extend(fallback_results)
+            # Strategies 3-5 are independent requests, so they run concurrently
+            # and cost the slowest round-trip instead of the sum of all of them
+            strategies: List[Callable[[], List[SearchResult]]] = [
+                # Strategy 3: query search with and without the NSFW parameter
+                lambda: self._search_with_nsfw_param(model_ref, nsfw=True, target=target),
+                lambda: self._search_with_nsfw_param(model_ref, nsfw=False, target=target),
+                # Strategy 4: tag-based search
+                lambda: self._search_by_tags(model_ref, target=target),
+            ]
+            if model_ref.get("creator"):
+                # Strategy 5: creator-based search (if creator known)
+                strategies.append(lambda: self._search_by_creator(model_ref, target=target))
+            for strategy_results in self._run_strategies(strategies):
+                results.extend(strategy_results)
 
         # Sort results by confidence or relevance
         return sorted(
             results, key=lambda x: self._calculate_confidence_score(x), reverse=True
         )
 
-    def _search_nsfw_multi_level(self, model_ref: Dict[str, Any]) -> List[SearchResult]:
+    async def asearch_multi_strategy(self, model_ref: Dict[str, Any]) -> List[SearchResult]:
+        """
+        ``search_multi_strategy`` for callers running an event loop.
+
+        The cascade runs in a worker thread, so the loop is not blocked. Its
+        independent strategies still fan out concurrently over the pooled
+        keep-alive session.
+        """
+        return await asyncio.to_thread(self.search_multi_strategy, model_ref)
+
+    def _search_target(self, model_ref: Dict[str, Any]) -> _SearchTarget:
+        """Normalize a model ref once for all the strategy searches of one cascade."""
+        filename = model_ref["filename"]
+        model_type = model_ref.get("type", "")
+        return _SearchTarget(
+            filename=filename,
+            model_type=model_type,
+            query=self._prepare_search_query(filename),
+            type_filter=self._get_type_filter(model_type),
+        )
+
+    def _run_strategies(
+        self, strategies: List[Callable[[], List[SearchResult]]]
+    ) -> List[List[SearchResult]]:
+        """Run independent strategy searches on the shared pool, results in input order."""
+        pool = self._supervisor.strategy_pool
+        futures = [pool.submit(strategy) for strategy in strategies]
+        return [future.result() for future in futures]
+
+    def _search_nsfw_multi_level(
+        self, model_ref: Dict[str, Any], target: Optional[_SearchTarget] = None
+    ) -> List[SearchResult]:
         """Enhanced NSFW search with multiple strategies for 100% discovery reliability."""
         results = []
-        filename = model_ref["filename"]
-        query = self._prepare_search_query(filename)
+        target = target or self._search_target(model_ref)
 
-        self.logger.info(f"Starting enhanced NSFW multi-level search for: {query}")
+        self.logger.info(f"Starting enhanced NSFW multi-level search for: {target.query}")
 
         # Strategy 2.1: Search with explicit NSFW=true and different sort orders
         nsfw_strategies = [
@@ -480,7 +1075,7 @@ class CivitaiSearch(SearchBackend):
         ]
 
         for strategy in nsfw_strategies:
-            strategy_results = self._search_with_nsfw_strategy(model_ref, strategy)
+            strategy_results = self._search_with_nsfw_strategy(model_ref, strategy, target)
             results.extend(strategy_results)
             if (
                 results
@@ -489,27 +1084,30 @@ class CivitaiSearch(SearchBackend):
 
         # Strategy 2.2: If no results, try without NSFW filter but with NSFW tags
         if not results:
-            no_filter_results = self._search_without_nsfw_filter_with_tags(model_ref)
+            no_filter_results = self._search_without_nsfw_filter_with_tags(model_ref, target)
             results.extend(no_filter_results)
 
         # Strategy 2.3: Try with different NSFW levels if available
         if not results:
-            nsfw_level_results = self._search_by_nsfw_levels(model_ref)
+            nsfw_level_results = self._search_by_nsfw_levels(model_ref, target)
             results.extend(nsfw_level_results)
 
         return results
 
     def _search_with_nsfw_strategy(
-        self, model_ref: Dict[str, Any], strategy: Dict[str, str]
+        self,
+        model_ref: Dict[str, Any],
+        strategy: Dict[str, str],
+        target: Optional[_SearchTarget] = None,
     ) -> List[SearchResult]:
         """Search using specific NSFW strategy parameters."""
-        filename = model_ref["filename"]
-        model_type = model_ref.get("type", "")
-        query = self._prepare_search_query(filename)
+        target = target or self._search_target(model_ref)
+        filename, model_type = target.filename, target.model_type
+        matches_target = self._filename_matcher(filename)
 
         try:
             params = {
-                "query": query,
+                "query": target.query,
                 "limit": 20,  # Increased limit for better coverage
                 "sort": strategy.get("sort", "Highest Rated"),
             }
@@ -517,46 +1115,26 @@ class CivitaiSearch(SearchBackend):
             if strategy.get("nsfw"):
                 params["nsfw"] = strategy["nsfw"]
 
-            type_filter = self._get_type_filter(model_type)
-            if type_filter:
-                params["types"] = type_filter
+            if target.type_filter:
+                params["types"] = target.type_filter
 
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            response = requests.get(
-                f"{self.base_url}/models", params=params, headers=headers, timeout=30
-            )
-
-            if response.status_code != 200:
+            listing = self._get_indexed("/models", params=params)
+            if listing is None:
                 return []
 
-            data = response.json()
             results = []
 
-            for item in data.get("items", []):
+            for name, (item, version) in listing[1].items():
                 # Check if model has NSFW content
                 nsfw_level = item.get("nsfwLevel", 1)
-                if nsfw_level >= 2:  # PG13 or higher
-                    for version in item.get("modelVersions", []):
-                        for file_info in version.get("files", []):
-                            if self._filename_matches(
-                                file_info.get("name", ""), filename
-                            ):
-                                result = self._create_result_from_match(
-                                    item, version, filename, model_type, "fuzzy"
-                                )
-                                # Add NSFW metadata
-                                if result.metadata:
-                                    result.metadata["nsfw_level"] = nsfw_level
-                                    result.metadata["search_strategy"] = strategy
-                                else:
-                                    result.metadata = {
-                                        "nsfw_level": nsfw_level,
-                                        "search_strategy": strategy,
-                                    }
-                                results.append(result)
+                if nsfw_level >= 2 and matches_target(name):  # PG13 or higher
+                    result = self._create_result_from_match(
+                        item, version, filename, model_type, "fuzzy"
+                    )
+                    # Add NSFW metadata
+                    result.metadata["nsfw_level"] = nsfw_level
+                    result.metadata["search_strategy"] = strategy
+                    results.append(result)
 
             return results
 
@@ -565,179 +1143,145 @@ class CivitaiSearch(SearchBackend):
             return []
 
     def _search_without_nsfw_filter_with_tags(
-        self, model_ref: Dict[str, Any]
+        self, model_ref: Dict[str, Any], target: Optional[_SearchTarget] = None
     ) -> List[SearchResult]:
         """Search without NSFW filter but include NSFW-related tags in query."""
-        filename = model_ref["filename"]
-        model_type = model_ref.get("type", "")
-        base_query = self._prepare_search_query(filename)
+        target = target or self._search_target(model_ref)
+        filename, model_type = target.filename, target.model_type
+        base_query = target.query
+        matches_target = self._filename_matcher(filename)
 
         # Add NSFW-related keywords to broaden search
-        nsfw_keywords = ["nsfw", "adult", "explicit", "nude", "erotic"]
-        enhanced_queries = [base_query] + [f"{base_query} {kw}" for kw in nsfw_keywords]
+        enhanced_queries = [base_query] + [f"{base_query} {kw}" for kw in _NSFW_QUERY_KEYWORDS]
+        type_filter = target.type_filter
 
-        results = []
-        for query in enhanced_queries:
+        def search_query(query: str) -> List[SearchResult]:
+            query_results = []
             try:
                 params = {"query": query, "limit": 15, "sort": "Highest Rated"}
-
-                type_filter = self._get_type_filter(model_type)
                 if type_filter:
                     params["types"] = type_filter
 
-                headers = {}
-                if self.api_key:
-                    headers["Authorization"] = f"Bearer {self.api_key}"
-
-                response = requests.get(
-                    f"{self.base_url}/models",
-                    params=params,
-                    headers=headers,
-                    timeout=30,
-                )
-
-                if response.status_code != 200:
-                    continue
+                listing = self._get_indexed("/models", params=params)
+                if listing is None:
+                    return query_results
 
-                data = response.json()
-                for item in data.get("items", []):
+                for name, (item, version) in listing[1].items():
                     nsfw_level = item.get("nsfwLevel", 1)
-                    if nsfw_level >= 2:  # Only include potentially NSFW content
-                        for version in item.get("modelVersions", []):
-                            for file_info in version.get("files", []):
-                                if self._filename_matches(
-                                    file_info.get("name", ""), filename
-                                ):
-                                    result = self._create_result_from_match(
-                                        item, version, filename, model_type, "fuzzy"
-                                    )
-                                    if result.metadata:
-                                        result.metadata["nsfw_level"] = nsfw_level
-                                        result.metadata["enhanced_query"] = query
-                                    else:
-                                        result.metadata = {
-                                            "nsfw_level": nsfw_level,
-                                            "enhanced_query": query,
-                                        }
-                                    results.append(result)
+                    # Only include potentially NSFW content
+                    if nsfw_level >= 2 and matches_target(name):
+                        result = self._create_result_from_match(
+                            item, version, filename, model_type, "fuzzy"
+                        )
+                        result.metadata["nsfw_level"] = nsfw_level
+                        result.metadata["enhanced_query"] = query
+                        query_results.append(result)
 
             except Exception as e:
                 self.logger.error(f"Enhanced query search failed for '{query}': {e}")
-                continue
+            return query_results
 
+        # The queries are independent requests, so they run concurrently
+        results = []
+        for query_results in self._run_strategies(
+            [lambda query=query: search_query(query) for query in enhanced_queries]
+        ):
+            results.extend(query_results)
         return results
 
-    def _search_by_nsfw_levels(self, model_ref: Dict[str, Any]) -> List[SearchResult]:
+    def _search_by_nsfw_levels(
+        self, model_ref: Dict[str, Any], target: Optional[_SearchTarget] = None
+    ) -> List[SearchResult]:
         """Search specifically targeting different NSFW levels."""
-        filename = model_ref["filename"]
-        model_type = model_ref.get("type", "")
-        query = self._prepare_search_query(filename)
-
-        results = []
+        target = target or self._search_target(model_ref)
+        filename, model_type = target.filename, target.model_type
+        query = target.query
+        matches_target = self._filename_matcher(filename)
 
-        # Try different NSFW level combinations
-        nsfw_level_strategies = [
-            {"nsfwLevel": 2},  # PG13
-            {"nsfwLevel": 4},  # R
-            {"nsfwLevel": 8},  # X
-            {"nsfwLevel": 16},  # XXX
-        ]
+        type_filter = target.type_filter
 
-        for level_strategy in nsfw_level_strategies:
+        def search_level(nsfw_level: int) -> List[SearchResult]:
+            level_results = []
             try:
                 params = {
                     "query": query,
                     "limit": 10,
                     "sort": "Highest Rated",
-                    **level_strategy,
+                    "nsfwLevel": nsfw_level,
                 }
-
-                type_filter = self._get_type_filter(model_type)
                 if type_filter:
                     params["types"] = type_filter
 
-                headers = {}
-                if self.api_key:
-                    headers["Authorization"] = f"Bearer {self.api_key}"
-
-                response = requests.get(
-                    f"{self.base_url}/models",
-                    params=params,
-                    headers=headers,
-                    timeout=30,
-                )
-
-                if response.status_code != 200:
-                    continue
+                listing = self._get_indexed("/models", params=params)
+                if listing is None:
+                    return level_results
 
-                data = response.json()
-                for item in data.get("items", []):
-                    for version in item.get("modelVersions", []):
-                        for file_info in version.get("files", []):
-                            if self._filename_matches(
-                                file_info.get("name", ""), filename
-                            ):
-                                result = self._create_result_from_match(
-                                    item, version, filename, model_type, "fuzzy"
-                                )
-                                if result.metadata:
-                                    result.metadata["target_nsfw_level"] = (
-                                        level_strategy["nsfwLevel"]
-                                    )
-                                    result.metadata["actual_nsfw_level"] = item.get(
-                                        "nsfwLevel", 1
-                                    )
-                                else:
-                                    result.metadata = {
-                                        "target_nsfw_level": level_strategy[
-                                            "nsfwLevel"
-                                        ],
-                                        "actual_nsfw_level": item.get("nsfwLevel", 1),
-                                    }
-                                results.append(result)
+                for name, (item, version) in listing[1].items():
+                    if matches_target(name):
+                        result = self._create_result_from_match(
+                            item, version, filename, model_type, "fuzzy"
+                        )
+                        result.metadata["target_nsfw_level"] = nsfw_level
+                        result.metadata["actual_nsfw_level"] = item.get("nsfwLevel", 1)
+                        level_results.append(result)
 
             except Exception as e:
-                self.logger.error(
-                    f"NSFW level search failed for level {level_strategy}: {e}"
-                )
-                continue
+                self.logger.error(f"NSFW level search failed for level {nsfw_level}: {e}")
+            return level_results
 
+        # Try different NSFW level combinations, concurrently
+        results = []
+        for level_results in self._run_strategies(
+            [lambda level=level: search_level(level) for level in _NSFW_LEVELS]
+        ):
+            results.extend(level_results)
         return results
 
     def _filename_matches(self, candidate: str, target: str) -> bool:
         """Enhanced filename matching for NSFW models."""
-        candidate_lower = candidate.lower()
-        target_lower = target.lower()
+        return self._filename_matcher(target)(candidate)
 
-        # Exact match
-        if candidate_lower == target_lower:
-            return True
+    @staticmethod
+    def _filename_matcher(target: str) -> Callable[[str], bool]:
+        """Build a ``_filename_matches`` predicate with the target side precomputed.
 
-        # Starts with same prefix (more lenient for NSFW models)
-        candidate_prefix = candidate_lower.split(".")[0]
+        The strategy searches test every file of every version against one
+        target, so its lowercase, prefix and cleaned forms are derived once.
+        """
+        target_lower = target.lower()
         target_prefix = target_lower.split(".")[0]
+        target_clean = _VERSION_NOISE_RE.sub("", target_prefix)
 
-        if candidate_prefix.startswith(target_prefix) or target_prefix.startswith(
-            candidate_prefix
-        ):
-            return True
+        def matches(candidate: str) -> bool:
+            candidate_lower = candidate.lower()
+
+            # Exact match
+            if candidate_lower == target_lower:
+                return True
 
-        # Fuzzy matching for common NSFW naming patterns
-        import re
+            # Starts with same prefix (more lenient for NSFW models)
+            candidate_prefix = candidate_lower.split(".")[0]
+            if candidate_prefix.startswith(target_prefix) or target_prefix.startswith(
+                candidate_prefix
+            ):
+                return True
 
-        # Remove version numbers and common separators
-        candidate_clean = re.sub(r"v\d+|\d+\.\d+|_|-|\s+", "", candidate_prefix)
-        target_clean = re.sub(r"v\d+|\d+\.\d+|_|-|\s+", "", target_prefix)
+            # Fuzzy matching for common NSFW naming patterns:
+            # remove version numbers and common separators
+            return _VERSION_NOISE_RE.sub("", candidate_prefix) == target_clean
 
-        return candidate_clean == target_clean
+        return matches
 
     def _search_with_nsfw_param(
-        self, model_ref: Dict[str, Any], nsfw: bool = True
+        self,
+        model_ref: Dict[str, Any],
+        nsfw: bool = True,
+        target: Optional[_SearchTarget] = None,
     ) -> List[SearchResult]:
         """Helper method to search with nsfw parameter."""
-        filename = model_ref["filename"]
-        model_type = model_ref.get("type", "")
-        query = self._prepare_search_query(filename)
+        target = target or self._search_target(model_ref)
+        filename, model_type = target.filename, target.model_type
+        query = target.query
 
         self.logger.info(f"Searching with nsfw={nsfw}: {query}")
 
@@ -747,36 +1291,24 @@ class CivitaiSearch(SearchBackend):
             if nsfw:
                 params["nsfw"] = "true"
 
-            type_filter = self._get_type_filter(model_type)
-            if type_filter:
-                params["types"] = type_filter
-
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            response = requests.get(
-                f"{self.base_url}/models", params=params, headers=headers, timeout=30
-            )
+            if target.type_filter:
+                params["types"] = target.type_filter
 
-            if response.status_code != 200:
+            listing = self._get_indexed("/models", params=params)
+            if listing is None:
                 return []
 
-            data = response.json()
             results = []
 
-            for item in data.get("items", []):
-                for version in item.get("modelVersions", []):
-                    for file_info in version.get("files", []):
-                        if (
-                            file_info.get("name", "")
-                            .lower()
-                            .startswith(query.lower().split()[0])
-                        ):
-                            result = self._create_result_from_match(
-                                item, version, filename, model_type, "fuzzy"
-                            )
-                            results.append(result)
+            # Score each file's normalized stem against the query
+            wanted = query.lower()
+            for name, (item, version) in listing[1].items():
+                candidate = self._prepare_search_query(name)
+                if _name_similarity(candidate, wanted) >= _FUZZY_MATCH_THRESHOLD:
+                    result = self._create_result_from_match(
+                        item, version, filename, model_type, "fuzzy"
+                    )
+                    results.append(result)
 
             return results
 
@@ -784,54 +1316,64 @@ class CivitaiSearch(SearchBackend):
             self.logger.error(f"Search with nsfw={nsfw} failed: {e}")
             return []
 
-    def _search_by_tags(self, model_ref: Dict[str, Any]) -> List[SearchResult]:
+    def _search_by_tags(
+        self, model_ref: Dict[str, Any], target: Optional[_SearchTarget] = None
+    ) -> List[SearchResult]:
         """
         Extract potential tags from filename.
         Search using /api/v1/models?tag={tag}&types={type}&nsfw=true
+
+        At most ``_MAX_TAG_SEARCHES`` tags are tried, longest (most specific)
+        first. Models already returned for an earlier tag are skipped, and the
+        search stops at the first model listing the exact filename.
         """
-        filename = model_ref["filename"]
-        model_type = model_ref.get("type", "")
-        query = self._prepare_search_query(filename)
+        target = target or self._search_target(model_ref)
+        filename, model_type = target.filename, target.model_type
+        basename = self._normalize_filename(filename)
 
         # Extract potential tags from the query
-        potential_tags = self._extract_tags_from_query(query)
+        potential_tags = sorted(
+            self._extract_tags_from_query(target.query), key=len, reverse=True
+        )
+        type_filter = target.type_filter
+        seen_model_ids = set()
         results = []
 
-        for tag in potential_tags:
+        for tag in potential_tags[:_MAX_TAG_SEARCHES]:
             try:
                 params = {"tag": tag, "limit": 5, "nsfw": "true"}
-
-                type_filter = self._get_type_filter(model_type)
                 if type_filter:
                     params["types"] = type_filter
 
-                headers = {}
-                if self.api_key:
-                    headers["Authorization"] = f"Bearer {self.api_key}"
-
-                response = requests.get(
-                    f"{self.base_url}/models",
-                    params=params,
-                    headers=headers,
-                    timeout=30,
-                )
-
-                if response.status_code != 200:
+                data = self._get_json("/models", params=params)
+                if data is None:
                     continue
 
-                data = response.json()
+                new_items = []
                 for item in data.get("items", []):
-                    for version in item.get("modelVersions", []):
-                        for file_info in version.get("files", []):
-                            result = self._create_result_from_match(
-                                item, version, filename, model_type, "fuzzy"
-                            )
-                            # Add tag-based source metadata
-                            if result.metadata:
-                                result.metadata["tag_source"] = tag
-                            else:
-                                result.metadata = {"tag_source": tag}
-                            results.append(result)
+                    model_id = item.get("id")
+                    if model_id in seen_model_ids:
+                        continue
+                    seen_model_ids.add(model_id)
+                    new_items.append(item)
+
+                file_index = self._index_files(new_items)
+                exact = self._find_best_match(new_items, basename, file_index)
+                if exact is not None:
+                    result = self._create_result_from_match(
+                        *exact, filename, model_type, "exact"
+                    )
+                    result.metadata["tag_source"] = tag
+                    results.append(result)
+                    break
+
+                for item, version in file_index.values():
+                    result = self._create_result_from_match(
+                        item, version, filename, model_type, "fuzzy"
+                    )
+                    # Add tag-based source metadata
+                    result.metadata["tag_source"] = tag
+                    results.append(result)
 
             except Exception as e:
                 self.logger.error(f"Tag search failed for tag '{tag}': {e}")
@@ -839,13 +1381,15 @@ class CivitaiSearch(SearchBackend):
 
         return results
 
-    def _search_by_creator(self, model_ref: Dict[str, Any]) -> List[SearchResult]:
+    def _search_by_creator(
+        self, model_ref: Dict[str, Any], target: Optional[_SearchTarget] = None
+    ) -> List[SearchResult]:
         """
         Search models by creator username.
         Uses /api/v1/models?username={username}&types={type}&nsfw=true
         """
-        filename = model_ref["filename"]
-        model_type = model_ref.get("type", "")
+        target = target or self._search_target(model_ref)
+        filename, model_type = target.filename, target.model_type
         creator = model_ref.get("creator", "")
 
         if not creator:
@@ -856,22 +1400,13 @@ class CivitaiSearch(SearchBackend):
         try:
             params = {"username": creator, "limit": 10, "nsfw": "true"}
 
-            type_filter = self._get_type_filter(model_type)
-            if type_filter:
-                params["types"] = type_filter
-
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            response = requests.get(
-                f"{self.base_url}/models", params=params, headers=headers, timeout=30
-            )
+            if target.type_filter:
+                params["types"] = target.type_filter
 
-            if response.status_code != 200:
+            data = self._get_json("/models", params=params)
+            if data is None:
                 return []
 
-            data = response.json()
             results = []
 
             for item in data.get("items", []):
@@ -892,48 +1427,19 @@ class CivitaiSearch(SearchBackend):
             return []
 
     def _extract_tags_from_query(self, query: str) -> List[str]:
-        """Extract potential tags from search query."""
-        # Simple extraction - could be enhanced with NLP
-        # Common tags for NSFW model search
-        anatomical_terms = [
-            "anatomy",
-            "anatomical",
-            "detail",
-            "details",
-            "eyes",
-            "pussy",
-            "anus",
-            "breasts",
-            "ass",
-            "thighs",
+        """Extract potential tags from search query.
+
+        Known NSFW/style terms come first, then the remaining query words
+        (longer than two characters, minus stopwords), each once, in query order.
+        """
+        words = dict.fromkeys(query.lower().split())
+        known = [word for word in words if word in _TAG_TERMS]
+        other = [
+            word
+            for word in words
+            if len(word) > 2 and word not in _TAG_STOPWORDS and word not in _TAG_TERMS
         ]
-        style_terms = ["realistic", "high", "definition", "hd", "detailed", "detail"]
-        content_terms = ["nsfw", "explicit", "nude", "naked", "adult"]
-
-        all_terms = anatomical_terms + style_terms + content_terms
-        found_tags = []
-
-        query_lower = query.lower()
-        for term in all_terms:
-            if term in query_lower:
-                found_tags.append(term)
-
-        # Also add individual words from query as potential tags
-        for word in query_lower.split():
-            if len(word) > 2 and word not in [
-                "and",
-                "the",
-                "for",
-                "with",
-                "v1",
-                "v2",
-                "v3",
-                "xl",
-            ]:
-                if word not in found_tags:
-                    found_tags.append(word)
-
-        return found_tags
+        return known + other
 
     def _calculate_confidence_score(self, result: SearchResult) -> int:
         """Calculate confidence score for a search result."""
@@ -953,52 +1459,55 @@ class CivitaiSearch(SearchBackend):
 
     def _infer_model_type_from_data(self, model_data: Dict[str, Any]) -> str:
         """Infer model type from model data."""
-        model_type = model_data.get("type", "Unknown")
-        type_mapping = {
-            "Checkpoint": "checkpoints",
-            "LORA": "loras",
-            "VAE": "vae",
-            "Controlnet": "controlnet",
-            "Upscaler": "upscale_models",
-            "TextualInversion": "clip",
-        }
-        return type_mapping.get(model_type, "unknown")
+        return _CIVITAI_TYPE_TO_MODEL_TYPE.get(model_data.get("type", "Unknown"), "unknown")
 
     def _prepare_search_query(self, filename: str) -> str:
         """Prepare filename for search query."""
         # Normalize separators and remove extension
         base = self._normalize_filename(filename)
         # Remove common extensions
-        base = re.sub(
-            r"\.(safetensors|ckpt|pth|pt|bin|onnx)$", "", base, flags=re.IGNORECASE
-        )
+        stem, ext = os.path.splitext(base)
+        if ext.lower() in _MODEL_FILE_EXTENSION_SET:
+            base = stem
         # Replace underscores, backslashes, forward slashes, and dots with spaces
-        query = re.sub(r"[\\/_.]+", " ", base)
-        return query.strip()
+        return _QUERY_DELIM_RE.sub(" ", base).strip()
 
     def _get_type_filter(self, model_type: str) -> Optional[str]:
         """Get Civitai type filter from model type."""
-        type_mapping = {
-            "checkpoints": "Checkpoint",
-            "loras": "LORA",
-            "vae": "VAE",
-            "controlnet": "Controlnet",
-            "upscale_models": "Upscaler",
-            "clip": "TextualInversion",  # Approximation
-            "embeddings": "TextualInversion",
-            "unet": "Checkpoint",  # Approximation
-        }
-        return type_mapping.get(model_type)
+        return _CIVITAI_TYPE_FILTER.get(model_type) if model_type else None
+
+    @staticmethod
+    def _index_files(results: List[Dict]) -> Dict[str, Tuple[Dict, Dict]]:
+        """Map lowercase file names to the first (result, version) that contains them."""
+        index: Dict[str, Tuple[Dict, Dict]] = {}
+        for result in results:
+            for version in result.get("modelVersions") or ():
+                for file_info in version.get("files") or ():
+                    name = file_info.get("name")
+                    if name:
+                        index.setdefault(name.lower(), (result, version))
+        return index
 
     def _find_best_match(
-        self, results: List[Dict], target_filename: str
+        self,
+        results: List[Dict],
+        target_filename: str,
+        file_index: Optional[Dict[str, Tuple[Dict, Dict]]] = None,
     ) -> Optional[Tuple[Dict, Dict]]:
-        """Find the best matching result with the exact modelVersion that contains the file."""
-        target_lower = target_filename.lower()
+        """Find the best matching result with the exact modelVersion that contains the file.
+
+        ``file_index`` is the precomputed ``_index_files(results)``, if available;
+        without one, the results are scanned until the first match instead of
+        indexing every file for a single lookup.
+        """
+        target = target_filename.lower()
+        if file_index is not None:
+            return file_index.get(target)
         for result in results:
-            for version in result.get("modelVersions", []):
-                for file_info in version.get("files", []):
-                    if file_info.get("name", "").lower() == target_lower:
+            for version in result.get("modelVersions") or ():
+                for file_info in version.get("files") or ():
+                    name = file_info.get("name")
+                    if name and name.lower() == target:
                         return result, version
         return None
 
@@ -1011,15 +1520,16 @@ class CivitaiSearch(SearchBackend):
         confidence: str,
     ) -> SearchResult:
         """Create SearchResult from an exact Civitai API match and its specific version."""
+        version_id = version.get("id")
         return SearchResult(
             status="FOUND",
             filename=filename,
             source="civitai",
             civitai_id=result.get("id"),
-            version_id=version.get("id"),
+            version_id=version_id,
             civitai_name=result.get("name"),
             version_name=version.get("name"),
-            download_url=f"https://civitai.com/api/download/models/{version.get('id')}",
+            download_url=f"https://civitai.com/api/download/models/{version_id}",
             confidence=confidence,
             type=model_type,
             metadata={"search_attempts": 1},
@@ -1028,9 +1538,8 @@ class CivitaiSearch(SearchBackend):
     def _normalize_filename(self, name: str) -> str:
         """Normalize a possibly path-like filename using both separators and return the basename."""
         try:
-            parts = re.split(r"[\\/]+", name)
-            return parts[-1] if parts else name
-        except Exception:
+            return name.replace("\\", "/").rpartition("/")[2]
+        except AttributeError:
             return name
 
     def _calculate_file_hash(self, file_path: str) -> Optional[str]:
@@ -1076,19 +1585,11 @@ class CivitaiSearch(SearchBackend):
         self.logger.info(f"Calculated SHA256 hash: {file_hash[:16]}... for {filename}")
 
         try:
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
             # Use the Civitai hash lookup endpoint
-            response = requests.get(
-                f"{self.base_url}/model-versions/by-hash/{file_hash}",
-                headers=headers,
-                timeout=30,
-            )
+            response = self._get(f"/model-versions/by-hash/{file_hash}")
 
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
 
                 # Extract model information from hash lookup result
                 model_id = data.get("modelId")
@@ -1162,43 +1663,406 @@ class CivitaiSearch(SearchBackend):
             )
             model_type = model_info.get("type", "checkpoints")
 
-            # Map model types to their directory structure in ComfyUI
-            type_to_dir = {
-                "checkpoints": "models/checkpoints",
-                "loras": "models/loras",
-                "vae": "models/vae",
-                "controlnet": "models/controlnet",
-                "upscale_models": "models/upscale_models",
-                "embeddings": "models/embeddings",
-                "clip": "models/clip",
-            }
-
-            model_dir = type_to_dir.get(model_type, "models/checkpoints")
+            model_dir = _COMFYUI_MODEL_DIRS.get(model_type, "models/checkpoints")
             local_path = f"{comfyui_root}/{model_dir}/{filename}"
 
         self.logger.info(f"Attempting hash fallback for local file: {local_path}")
 
-        # Check if file exists
-        if not os.path.exists(local_path):
+        # One stat call both checks existence and gets the size
+        try:
+            file_size = os.stat(local_path).st_size
+        except FileNotFoundError:
             self.logger.debug(f"Local file not found for hash lookup: {local_path}")
             return None
+        except OSError as e:
+            self.logger.warning(f"Could not get file size for {local_path}: {e}")
+            return None
 
-        # Check file size - skip very small files that are unlikely to be model files
-        try:
-            file_size = os.path.getsize(local_path)
-            if file_size < 1024 * 1024:  # Less than 1MB
-                self.logger.debug(
-                    f"File too small for hash lookup ({file_size} bytes): {local_path}"
-                )
-                return None
-        except OSError as e:
-            self.logger.warning(f"Could not get file size for {local_path}: {e}")
+        # Skip very small files that are unlikely to be model files
+        if file_size < 1024 * 1024:  # Less than 1MB
+            self.logger.debug(f"File too small for hash lookup ({file_size} bytes): {local_path}")
             return None
 
         # Attempt hash lookup
         return self.search_by_hash(local_path, filename)
 
 
+@lru_cache(maxsize=1)
+def _load_knowledge_base() -> str:
+    """Concatenate the bundled knowledge/*.md primers (read once per process)."""
+    knowledge_dir = Path(__file__).parent / "knowledge"
+    if not knowledge_dir.exists():
+        return ""
+    return "".join(f.read_text() + "\n\n" for f in knowledge_dir.glob("*.md"))
+
+
+# Pattern-recognition sections of the agentic prompt ({skip_reason} filled per file)
+_QWEN_PATTERN_SKIP_CIVITAI = """
+SMART PATTERN RECOGNITION RESULTS:
+- Pattern Recognition: ACTIVE - Model detected as likely HuggingFace-hosted
+- Early Termination Decision: SKIP Civitai search
+- Reason: {skip_reason}
+- Recommended Strategy: Go directly to HuggingFace search (Phase 2 only)
+- Expected Success Rate: HIGH for HuggingFace-hosted models
+
+IMPORTANT: Based on pattern recognition, do NOT search Civitai (Phase 1). 
+Proceed directly to Phase 2: HUGGINGFACE SEARCH ONLY.
+"""
+
+_QWEN_PATTERN_SEARCH_CIVITAI = """
+SMART PATTERN RECOGNITION RESULTS:
+- Pattern Recognition: ACTIVE - No HF patterns detected
+- Early Termination Decision: SEARCH Civitai (normal workflow)
+- Reason: {skip_reason}
+- Recommended Strategy: Full Civitai + HuggingFace search (Phase 1 + Phase 2)
+"""
+
+_QWEN_PATTERN_DISABLED = """
+SMART PATTERN RECOGNITION: DISABLED
+- Proceeding with standard search workflow
+- Will search both Civitai and HuggingFace
+"""
+
+# Static body of the Qwen agentic prompt. Filled with str.format using named
+# fields only (knowledge_base, pattern_info, filename, model_type, node_type,
+# web_search_context); keep new fields named and escape literal braces as {{ }}.
+_QWEN_PROMPT_TEMPLATE = """{knowledge_base}You are an autonomous AI model discovery agent. Your task is to find the correct download source for a ComfyUI model file using intelligent search strategies.{pattern_info}
+
+INPUT DATA:
+- Filename: {filename}
+- Model Type: {model_type}
+- Node Type: {node_type}
+
+ENVIRONMENT:
+- CIVITAI_API_KEY is available in environment (from ~/.secrets)
+- You have access to: bash, web_search, web_fetch tools
+
+YOUR MISSION:
+Find where to download this EXACT file, or confirm it doesn't exist on Civitai/HuggingFace.{web_search_context}
+
+SEARCH STRATEGY (Execute in order):
+
+=== PHASE 1: CIVITAI API SEARCH (Max 5 attempts) ===
+
+1. Extract search keywords from filename:
+   - Remove extensions: .pth, .pt, .safetensors, .ckpt, .bin
+   - Split on delimiters: _, -, .
+   - Identify: version numbers, model types, keywords
+
+   Examples:
+   "rife49.pth" → ["rife", "49", "frame interpolation"]
+   "4xNMKDSuperscale.pt" → ["nmkd", "superscale", "4x", "upscale"]
+
+2. Try Civitai API with these queries (stop when found):
+   a) Exact name without extension
+   b) Main keyword only
+   c) Alternative terms based on model type
+   d) Broader category search
+
+3. API endpoint: https://civitai.com/api/v1/models
+   Parameters: ?query=<term>&limit=10&sort=Highest+Rated
+   Headers: Authorization: Bearer $CIVITAI_API_KEY
+
+4. For EACH result:
+   - Fetch full details: https://civitai.com/api/v1/models/{{id}}
+   - Check ALL modelVersions[].files[].name for EXACT match to "{filename}"
+   - Log: "Checked model {{id}} '{{name}}': {{files found}}"
+
+5. CRITICAL: Match must be EXACT filename (case-sensitive)
+
+=== PHASE 2: WEB SEARCH + HUGGINGFACE (If Civitai fails) ===
+
+### **Hugging Face Primer for an AI Agent**
+
+You have access to the `hf` command-line tool to interact with the Hugging Face Hub. Here is your guide on how to use it to find and download models.
+
+**Your primary workflow for Hugging Face will be:**
+1.  Use `web_search` to find the correct repository ID (`repo_id`).
+2.  Use the `hf` tool to list the files in that repository to find the exact filename.
+3.  Use the `hf` tool to download the specific file you need.
+
+---
+
+#### **Step 1: Find the Repository ID (`repo_id`)**
+
+The `hf` tool does not have a search command. You must first use `web_search` to find the `repo_id`, which is in the format `author/repository_name`.
+
+**Example Web Search Queries:**
+*   To find the SDXL base model: `"sd_xl_base_1.0.safetensors" site:huggingface.co`
+*   To find a RIFE model: `"rife frame interpolation" model huggingface`
+
+Your goal is to find the official repository, for example: `stabilityai/stable-diffusion-xl-base-1.0`.
+
+---
+
+#### **Step 2: List Files in the Repository**
+
+Once you have the `repo_id`, you must verify that the file you need exists in the repository and get its exact path. Use the `hf download` command with the `--dry-run` flag for this.
+
+**Command:**
+```bash
+hf download --dry-run <repo_id>
+```
+
+**Example:** To list all files in the `stabilityai/stable-diffusion-xl-base-1.0` repository:
+```bash
+hf download --dry-run stabilityai/stable-diffusion-xl-base-1.0
+```
+The output will be a list of all files in that repository. Look through this list to find the exact filename you need, for example, `sd_xl_base_1.0.safetensors`.
+
+---
+
+#### **Step 3: Download the Specific File**
+
+After you have the `repo_id` and the exact `path/to/file/in/repo`, you can download it.
+
+**Command:**
+```bash
+hf download <repo_id> <path/to/file/in/repo> --local-dir <your/local/directory>
+```
+
+**Example:** To download the `sd_xl_base_1.0.safetensors` file to the `/tmp/models` directory:
+```bash
+hf download stabilityai/stable-diffusion-xl-base-1.0 sd_xl_base_1.0.safetensors --local-dir /tmp/models
+```
+
+This command will download the specified file into the directory you provide. Always use the `--local-dir` flag to control where the file is saved.
+
+---
+
+1. Use your web_search tool with smart patterns:
+   - If "rife*.pth" → "rife frame interpolation huggingface"
+   - If "sam_*.pth" → "facebook sam segment anything huggingface"
+   - If "*NMKD*" → "nmkd upscaler huggingface github"
+   - Otherwise → "{filename} site:huggingface.co OR site:github.com"
+
+2. Extract repos from results:
+   - Look for: huggingface.co/<user>/<repo>/blob/main/<path>
+   - Look for: github.com/<user>/<repo>/releases
+
+3. Verify file exists:
+   - HuggingFace: Use `hf` CLI or web_fetch to check repo files
+   - GitHub: Check releases or repo files
+
+4. If found, construct download URL:
+   - HF: https://huggingface.co/<user>/<repo>/resolve/main/<path>
+   - GitHub: Use release asset URL or raw.githubusercontent.com
+
+=== PHASE 3: OUTPUT RESULT ===
+
+SUCCESS - Found on Civitai:
+{{{{
+  "status": "FOUND",
+  "source": "civitai",
+  "civitai_id": <model_id>,
+  "version_id": <version_id>,
+  "civitai_name": "<model_name>",
+  "version_name": "<version_name>",
+  "download_url": "https://civitai.com/api/download/models/<version_id>",
+  "confidence": "exact",
+  "metadata": {{{{
+    "search_attempts": <count>,
+    "reasoning": "brief explanation"
+  }}}}
+}}}}
+
+SUCCESS - Found on HuggingFace:
+{{{{
+  "status": "FOUND",
+  "source": "huggingface",
+  "repo": "<user>/<repo>",
+  "file_path": "<path>",
+  "download_url": "<url>",
+  "confidence": "high",
+  "metadata": {{{{
+    "search_attempts": <count>,
+    "reasoning": "brief explanation"
+  }}}}
+}}}}
+
+UNCERTAIN - Need Human Review:
+{{{{
+  "status": "UNCERTAIN",
+  "candidates": [
+    {{{{"source": "...", "name": "...", "url": "...", "match_score": 0.7}}}}
+  ],
+  "reason": "Multiple candidates found, need manual verification",
+  "metadata": {{{{
+    "search_attempts": <count>
+  }}}}
+}}}}
+
+NOT FOUND:
+{{{{
+  "status": "NOT_FOUND",
+  "metadata": {{{{
+    "civitai_searches": <count>,
+    "web_searches": <count>,
+    "reason": "detailed explanation of where you looked"
+  }}}}
+}}}}
+
+INVALID:
+{{{{
+  "status": "INVALID_FILENAME",
+  "reason": "Filename contains invalid characters or is malformed",
+  "metadata": {{{{
+    "reason": "explanation"
+  }}}}
+}}}}
+
+CRITICAL RULES:
+1. Filename validation must be EXACT match
+2. Try multiple strategies before giving up
+3. Return EXACTLY ONE JSON object as your final output with no additional commentary
+4. If uncertain, return UNCERTAIN status with candidates
+5. Maximum 15 minutes timeout
+
+BEGIN AGENTIC SEARCH NOW. Think step by step and log your progress."""
+
+
+# Prompt for resolving several files in one Qwen run (see QwenSearch.prefetch)
+_QWEN_BATCH_PROMPT_TEMPLATE = """{knowledge_base}You are an autonomous AI model discovery agent. Find the correct download source for EACH of the following ComfyUI model files. Search for each file independently, with the same strategies you would use for a single file: Civitai first (unless a file is marked as likely HuggingFace-hosted), then HuggingFace.
+
+FILES:
+{file_list}
+
+OUTPUT FORMAT:
+Return EXACTLY ONE JSON object as your final output with no additional commentary. Its keys are the filenames above, exactly as listed; each value is that file's result object with the usual fields:
+- "status": "FOUND", "UNCERTAIN", "NOT_FOUND" or "INVALID_FILENAME"
+- for Civitai: "source": "civitai", "civitai_id", "version_id", "civitai_name", "version_name", "download_url", "confidence"
+- for HuggingFace: "source": "huggingface", "repo", "file_path", "download_url", "confidence"
+- for UNCERTAIN: "candidates" and "reason"
+- "metadata": {{"search_attempts": <count>, "reasoning": "brief explanation"}}
+
+CRITICAL RULES:
+1. Filename validation must be EXACT match
+2. Give every listed file its own entry; do not merge files
+3. If uncertain about a file, return UNCERTAIN for it with candidates
+
+BEGIN AGENTIC SEARCH NOW. Think step by step and log your progress."""
+
+
+class _QwenWorker:
+    """Long-lived qwen process serving prompts over newline-delimited JSON.
+
+    Each request is one ``{"id", "prompt"}`` line on stdin, answered by one
+    ``{"id", "output"}`` line on stdout. Requests are serialized by a lock.
+    A worker that breaks the protocol is disabled for the rest of the run.
+
+    Replies are read by a daemon thread per process and handed over through a
+    queue, so a worker that stalls mid-line still times out (and no pipe
+    ``select``, which is POSIX-only, is needed).
+    """
+
+    def __init__(self, command: List[str], logger):
+        self.command = command
+        self.logger = logger
+        self._proc: Optional[subprocess.Popen] = None
+        # Lines read from the current process's stdout; None marks EOF
+        self._replies: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.disabled = False
+        atexit.register(self.close)
+
+    def start(self) -> None:
+        """Start the process ahead of the first request, unless the worker is disabled."""
+        with self._lock:
+            if not self.disabled:
+                self._ensure_started()
+
+    def _ensure_started(self) -> subprocess.Popen:
+        """Start the process if it is not running; caller must hold ``_lock``."""
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+            )
+            # A fresh queue per process, so replies of a stopped one never leak
+            self._replies = queue.Queue()
+            threading.Thread(
+                target=self._read_replies,
+                args=(self._proc.stdout, self._replies),
+                name="qwen-worker-reader",
+                daemon=True,
+            ).start()
+        return self._proc
+
+    @staticmethod
+    def _read_replies(stdout, replies: "queue.Queue[Optional[str]]") -> None:
+        """Forward complete stdout lines to ``replies`` until EOF."""
+        try:
+            for line in stdout:
+                replies.put(line)
+        except (OSError, ValueError):
+            pass
+        replies.put(None)
+
+    def request(self, prompt: str, timeout: float) -> Optional[str]:
+        """Send one prompt; return the agent output, or None if the worker is unusable.
+
+        Raises:
+            subprocess.TimeoutExpired: No reply arrived within ``timeout`` seconds.
+        """
+        if self.disabled:
+            return None
+        request_id = uuid.uuid4().hex
+        with self._lock:
+            try:
+                proc = self._ensure_started()
+                proc.stdin.write(
+                    json.dumps({"id": request_id, "prompt": prompt}) + "\n"
+                )
+                proc.stdin.flush()
+                try:
+                    line = self._replies.get(timeout=timeout)
+                except queue.Empty:
+                    self._stop()
+                    raise subprocess.TimeoutExpired(self.command, timeout) from None
+            except (OSError, ValueError) as exc:
+                self.logger.warning("Qwen worker unavailable: %s", exc)
+                self._disable()
+                return None
+
+            try:
+                reply = _json_loads(line) if line else None
+            except ValueError:
+                reply = None
+            if not isinstance(reply, dict) or reply.get("id") != request_id:
+                self.logger.warning(
+                    "Qwen worker did not answer request %s; disabling it", request_id
+                )
+                self._disable()
+                return None
+        output = reply.get("output")
+        return output if isinstance(output, str) else None
+
+    def _stop(self) -> None:
+        """Terminate the process; caller must hold ``_lock`` or own the worker."""
+        proc, self._proc = self._proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    def _disable(self) -> None:
+        """Stop the process and stop offering requests to it."""
+        self.disabled = True
+        self._stop()
+
+    def close(self) -> None:
+        """Shut the worker down (also registered with atexit)."""
+        with self._lock:
+            self._stop()
+
+
 class QwenSearch(SearchBackend):
     """Qwen-based agentic search backend with smart pattern recognition."""
 
@@ -1215,17 +2079,27 @@ class QwenSearch(SearchBackend):
             Path(cache_dir) if cache_dir else Path(config.temp_dir) / "qwen_cache"
         )
         self.cache_dir.mkdir(exist_ok=True, parents=True)
+        self._cache_prefix = os.path.join(str(self.cache_dir), "")
+        # Names of existing cache files, snapshotted with one scandir on first lookup
+        self._cache_index: Optional[set] = None
         self.qwen_binary = config.search.qwen_binary or os.environ.get(
             "QWEN_BINARY", "qwen"
         )
+        self._worker: Optional[_QwenWorker] = None
 
         # Smart pattern recognition for known HF models
         self.hf_model_patterns = self._init_hf_patterns()
+        self._hf_matchers = self._compile_hf_patterns(self.hf_model_patterns)
         self.enable_pattern_recognition = True
 
     def get_name(self) -> str:
         return "qwen"
 
+    def close(self) -> None:
+        """Stop the persistent Qwen worker, if one was started."""
+        if self._worker is not None:
+            self._worker.close()
+
     def _init_hf_patterns(self) -> Dict[str, List[str]]:
         """Initialize known HuggingFace model patterns for smart recognition."""
         return {
@@ -1296,6 +2170,20 @@ class QwenSearch(SearchBackend):
             ],
         }
 
+    @staticmethod
+    def _compile_hf_patterns(
+        hf_model_patterns: Dict[str, List[str]],
+    ) -> Tuple[Tuple[Tuple[str, "re.Pattern[str]"], ...], Tuple[str, ...]]:
+        """Precompile the ``*_patterns`` regexes and lowercase the HF prefixes."""
+        regexes = tuple(
+            (pattern_type, re.compile(pattern, re.IGNORECASE))
+            for pattern_type, patterns in hf_model_patterns.items()
+            if pattern_type.endswith("_patterns")
+            for pattern in patterns
+        )
+        prefixes = tuple(p.lower() for p in hf_model_patterns.get("hf_prefixes", []))
+        return regexes, prefixes
+
     def _detect_hf_pattern(self, filename: str) -> Optional[str]:
         """Detect if filename matches known HuggingFace model patterns.
 
@@ -1303,21 +2191,19 @@ class QwenSearch(SearchBackend):
             Pattern name if matched, None otherwise
         """
         filename_lower = filename.lower()
+        regexes, hf_prefixes = self._hf_matchers
 
         # Check against regex patterns
-        for pattern_type, patterns in self.hf_model_patterns.items():
-            if pattern_type.endswith("_patterns"):
-                for pattern in patterns:
-                    if re.match(pattern, filename_lower, re.IGNORECASE):
-                        self.logger.info(
-                            f"Pattern match: {filename} matches {pattern_type} pattern: {pattern}"
-                        )
-                        return pattern_type
+        for pattern_type, regex in regexes:
+            if regex.match(filename_lower):
+                self.logger.info(
+                    f"Pattern match: {filename} matches {pattern_type} pattern: {regex.pattern}"
+                )
+                return pattern_type
 
         # Check against prefixes
-        hf_prefixes = self.hf_model_patterns.get("hf_prefixes", [])
         for prefix in hf_prefixes:
-            if filename_lower.startswith(prefix.lower()):
+            if filename_lower.startswith(prefix):
                 self.logger.info(
                     f"Prefix match: {filename} starts with HF prefix: {prefix}"
                 )
@@ -1348,7 +2234,7 @@ class QwenSearch(SearchBackend):
             # Look for HuggingFace repository URLs
             if "huggingface.co" in url:
                 # Extract repo information from URL
-                repo_match = re.search(r"huggingface\.co/([^/]+)/([^/?]+)", url)
+                repo_match = _HF_REPO_URL_RE.search(url)
                 if repo_match:
                     username = repo_match.group(1)
                     repo_name = repo_match.group(2)
@@ -1374,7 +2260,7 @@ class QwenSearch(SearchBackend):
             # Look for GitHub repository URLs
             elif "github.com" in url:
                 # Extract repo information from GitHub URL
-                repo_match = re.search(r"github\.com/([^/]+)/([^/?]+)", url)
+                repo_match = _GITHUB_REPO_URL_RE.search(url)
                 if repo_match:
                     username = repo_match.group(1)
                     repo_name = repo_match.group(2)
@@ -1644,7 +2530,8 @@ class QwenSearch(SearchBackend):
                     },
                 )
 
-        cached_result = self._load_cached_result(filename)
+        node_type = model_info.get("node_type", "")
+        cached_result = self._load_cached_result(filename, model_type, node_type)
         if cached_result:
             # Add pattern recognition info to cached result
             if self.enable_pattern_recognition:
@@ -1672,15 +2559,7 @@ class QwenSearch(SearchBackend):
         self.logger.info(f"Executing Qwen search via: {' '.join(command)}")
 
         try:
-            completed = subprocess.run(
-                command,
-                check=False,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=config.search.qwen_timeout,
-                text=True,
-                input=prompt,
-            )
+            completed = self._run_qwen(command, prompt)
         except FileNotFoundError:
             self.logger.error("Qwen binary not found: %s", self.qwen_binary)
             return SearchResult(
@@ -1713,7 +2592,16 @@ class QwenSearch(SearchBackend):
                 },
             )
 
-        qwen_payload = self._parse_qwen_stdout(completed.stdout)
+        stdout = completed.stdout
+        if not stdout or stdout.isspace():
+            self.logger.warning("Qwen agent produced no output for %s", filename)
+            return SearchResult(
+                status="NOT_FOUND",
+                filename=filename,
+                metadata={"reason": "Qwen agent produced no output"},
+            )
+
+        qwen_payload = self._parse_qwen_stdout(stdout)
         if qwen_payload is None:
             self.logger.warning(
                 "Qwen agent produced no consumable output for %s", filename
@@ -1721,16 +2609,99 @@ class QwenSearch(SearchBackend):
             return SearchResult(
                 status="NOT_FOUND",
                 filename=filename,
-                metadata={"reason": "Qwen agent produced no output"},
+                metadata={
+                    "reason": "Qwen agent output was not a JSON object",
+                    "stdout_tail": stdout[-500:],
+                },
             )
 
         parsed_result = self._annotate_result(
             self._parse_qwen_result(qwen_payload, filename),
             cached=False,
         )
-        self._store_cached_result(filename, qwen_payload)
+        self._store_cached_result(filename, qwen_payload, model_type, node_type)
         return parsed_result
 
+    def prefetch(self, models: List[Dict[str, Any]]) -> int:
+        """
+        Resolve several uncached models with one Qwen run per batch.
+
+        Models are grouped ``config.search.qwen_batch_size`` at a time into one
+        prompt. Each per-file answer is written to the Qwen result cache, where
+        the following ``search`` calls pick it up. Files that are invalid,
+        cached, answered by pattern recognition, or left out of the batch
+        answer are searched one at a time as before.
+
+        Args:
+            models: List of model info dictionaries
+
+        Returns:
+            Number of models whose results were cached
+        """
+        batch_size = config.search.qwen_batch_size
+        if batch_size <= 1 or not config.search.enable_qwen:
+            return 0
+
+        pending = []
+        for model_info in models:
+            is_valid, filename, _ = validate_and_sanitize_filename(model_info["filename"])
+            if not is_valid:
+                continue
+            model_type = model_info.get("type", "")
+            node_type = model_info.get("node_type", "")
+            if self._should_skip_civitai(filename, model_type)[0]:
+                continue
+            if self._load_cached_result(filename, model_type, node_type) is not None:
+                continue
+            pending.append((filename, model_type, node_type))
+
+        stored = 0
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            # A lone leftover model gets the full single-file prompt instead
+            if len(batch) > 1:
+                stored += self._run_batch(batch)
+        return stored
+
+    def _run_batch(self, batch: List[Tuple[str, str, str]]) -> int:
+        """Run one batch prompt and cache each answered file; returns the count cached."""
+        file_list = "\n".join(
+            f"- {filename} (model type: {model_type or 'unknown'}, "
+            f"node type: {node_type or 'unknown'})"
+            for filename, model_type, node_type in batch
+        )
+        prompt = _QWEN_BATCH_PROMPT_TEMPLATE.format(
+            knowledge_base=_load_knowledge_base(), file_list=file_list
+        )
+        command = [self.qwen_binary] + self._collect_extra_args()
+        self.logger.info(f"Executing Qwen batch search for {len(batch)} models")
+
+        try:
+            completed = self._run_qwen(command, prompt)
+        except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+            self.logger.warning(f"Qwen batch search failed: {e}")
+            return 0
+        if completed.returncode != 0:
+            self.logger.warning(
+                "Qwen batch search exited with %s: %s",
+                completed.returncode,
+                completed.stderr.strip(),
+            )
+            return 0
+
+        payload = self._parse_qwen_stdout(completed.stdout)
+        if payload is None:
+            self.logger.warning("Qwen batch search output was not a JSON object")
+            return 0
+
+        stored = 0
+        for filename, model_type, node_type in batch:
+            entry = payload.get(filename)
+            if isinstance(entry, dict) and "status" in entry:
+                self._store_cached_result(filename, entry, model_type, node_type)
+                stored += 1
+        return stored
+
     def _build_agentic_prompt(
         self,
         model_info: Dict[str, Any],
@@ -1739,47 +2710,21 @@ class QwenSearch(SearchBackend):
         # Added by Gemini on 2025-10-30
         # This primer was added to give the Qwen agent more detailed instructions on how to use the Hugging Face CLI.
         """Build comprehensive agentic search prompt for Qwen with pattern recognition."""
-        knowledge_base = ""
-        knowledge_dir = Path(__file__).parent / "knowledge"
-        if knowledge_dir.exists():
-            for f in knowledge_dir.glob("*.md"):
-                knowledge_base += f.read_text() + "\n\n"
         filename = model_info.get("filename", "")
         model_type = model_info.get("type", "")
         node_type = model_info.get("node_type", "")
 
         # Smart pattern recognition for HF models
-        pattern_info = ""
         if self.enable_pattern_recognition:
             should_skip_civitai, skip_reason = self._should_skip_civitai(
                 filename, model_type
             )
-            if should_skip_civitai:
-                pattern_info = f"""
-SMART PATTERN RECOGNITION RESULTS:
-- Pattern Recognition: ACTIVE - Model detected as likely HuggingFace-hosted
-- Early Termination Decision: SKIP Civitai search
-- Reason: {skip_reason}
-- Recommended Strategy: Go directly to HuggingFace search (Phase 2 only)
-- Expected Success Rate: HIGH for HuggingFace-hosted models
-
-IMPORTANT: Based on pattern recognition, do NOT search Civitai (Phase 1). 
-Proceed directly to Phase 2: HUGGINGFACE SEARCH ONLY.
-"""
-            else:
-                pattern_info = f"""
-SMART PATTERN RECOGNITION RESULTS:
-- Pattern Recognition: ACTIVE - No HF patterns detected
-- Early Termination Decision: SEARCH Civitai (normal workflow)
-- Reason: {skip_reason}
-- Recommended Strategy: Full Civitai + HuggingFace search (Phase 1 + Phase 2)
-"""
+            pattern_template = (
+                _QWEN_PATTERN_SKIP_CIVITAI if should_skip_civitai else _QWEN_PATTERN_SEARCH_CIVITAI
+            )
+            pattern_info = pattern_template.format(skip_reason=skip_reason)
         else:
-            pattern_info = f"""
-SMART PATTERN RECOGNITION: DISABLED
-- Proceeding with standard search workflow
-- Will search both Civitai and HuggingFace
-"""
+            pattern_info = _QWEN_PATTERN_DISABLED
 
         # Add web search context if available
         web_search_context = ""
@@ -1814,201 +2759,16 @@ A high-confidence match was found via web search but requires Qwen verification:
 Repository: {web_search_results.get('metadata', {}).get('repository', 'Unknown')}
 Score: {web_search_results.get('metadata', {}).get('web_search_score', 0)}
 You should prioritize verifying this result.
-"""
-
-        return f"""{knowledge_base}You are an autonomous AI model discovery agent. Your task is to find the correct download source for a ComfyUI model file using intelligent search strategies.{pattern_info}
-
-INPUT DATA:
-- Filename: {filename}
-- Model Type: {model_type}
-- Node Type: {node_type}
-
-ENVIRONMENT:
-- CIVITAI_API_KEY is available in environment (from ~/.secrets)
-- You have access to: bash, web_search, web_fetch tools
-
-YOUR MISSION:
-Find where to download this EXACT file, or confirm it doesn't exist on Civitai/HuggingFace.{web_search_context}
-
-SEARCH STRATEGY (Execute in order):
-
-=== PHASE 1: CIVITAI API SEARCH (Max 5 attempts) ===
-
-1. Extract search keywords from filename:
-   - Remove extensions: .pth, .pt, .safetensors, .ckpt, .bin
-   - Split on delimiters: _, -, .
-   - Identify: version numbers, model types, keywords
-
-   Examples:
-   "rife49.pth" → ["rife", "49", "frame interpolation"]
-   "4xNMKDSuperscale.pt" → ["nmkd", "superscale", "4x", "upscale"]
-
-2. Try Civitai API with these queries (stop when found):
-   a) Exact name without extension
-   b) Main keyword only
-   c) Alternative terms based on model type
-   d) Broader category search
-
-3. API endpoint: https://civitai.com/api/v1/models
-   Parameters: ?query=<term>&limit=10&sort=Highest+Rated
-   Headers: Authorization: Bearer $CIVITAI_API_KEY
-
-4. For EACH result:
-   - Fetch full details: https://civitai.com/api/v1/models/{{id}}
-   - Check ALL modelVersions[].files[].name for EXACT match to "{filename}"
-   - Log: "Checked model {{id}} '{{name}}': {{files found}}"
-
-5. CRITICAL: Match must be EXACT filename (case-sensitive)
-
-=== PHASE 2: WEB SEARCH + HUGGINGFACE (If Civitai fails) ===
-
-### **Hugging Face Primer for an AI Agent**
-
-You have access to the `hf` command-line tool to interact with the Hugging Face Hub. Here is your guide on how to use it to find and download models.
-
-**Your primary workflow for Hugging Face will be:**
-1.  Use `web_search` to find the correct repository ID (`repo_id`).
-2.  Use the `hf` tool to list the files in that repository to find the exact filename.
-3.  Use the `hf` tool to download the specific file you need.
-
----
-
-#### **Step 1: Find the Repository ID (`repo_id`)**
-
-The `hf` tool does not have a search command. You must first use `web_search` to find the `repo_id`, which is in the format `author/repository_name`.
-
-**Example Web Search Queries:**
-*   To find the SDXL base model: `"sd_xl_base_1.0.safetensors" site:huggingface.co`
-*   To find a RIFE model: `"rife frame interpolation" model huggingface`
-
-Your goal is to find the official repository, for example: `stabilityai/stable-diffusion-xl-base-1.0`.
-
----
-
-#### **Step 2: List Files in the Repository**
-
-Once you have the `repo_id`, you must verify that the file you need exists in the repository and get its exact path. Use the `hf download` command with the `--dry-run` flag for this.
-
-**Command:**
-```bash
-hf download --dry-run <repo_id>
-```
-
-**Example:** To list all files in the `stabilityai/stable-diffusion-xl-base-1.0` repository:
-```bash
-hf download --dry-run stabilityai/stable-diffusion-xl-base-1.0
-```
-The output will be a list of all files in that repository. Look through this list to find the exact filename you need, for example, `sd_xl_base_1.0.safetensors`.
-
----
-
-#### **Step 3: Download the Specific File**
-
-After you have the `repo_id` and the exact `path/to/file/in/repo`, you can download it.
-
-**Command:**
-```bash
-hf download <repo_id> <path/to/file/in/repo> --local-dir <your/local/directory>
-```
-
-**Example:** To download the `sd_xl_base_1.0.safetensors` file to the `/tmp/models` directory:
-```bash
-hf download stabilityai/stable-diffusion-xl-base-1.0 sd_xl_base_1.0.safetensors --local-dir /tmp/models
-```
-
-This command will download the specified file into the directory you provide. Always use the `--local-dir` flag to control where the file is saved.
-
----
-
-1. Use your web_search tool with smart patterns:
-   - If "rife*.pth" → "rife frame interpolation huggingface"
-   - If "sam_*.pth" → "facebook sam segment anything huggingface"
-   - If "*NMKD*" → "nmkd upscaler huggingface github"
-   - Otherwise → "{filename} site:huggingface.co OR site:github.com"
-
-2. Extract repos from results:
-   - Look for: huggingface.co/<user>/<repo>/blob/main/<path>
-   - Look for: github.com/<user>/<repo>/releases
-
-3. Verify file exists:
-   - HuggingFace: Use `hf` CLI or web_fetch to check repo files
-   - GitHub: Check releases or repo files
-
-4. If found, construct download URL:
-   - HF: https://huggingface.co/<user>/<repo>/resolve/main/<path>
-   - GitHub: Use release asset URL or raw.githubusercontent.com
-
-=== PHASE 3: OUTPUT RESULT ===
-
-SUCCESS - Found on Civitai:
-{{{{
-  "status": "FOUND",
-  "source": "civitai",
-  "civitai_id": <model_id>,
-  "version_id": <version_id>,
-  "civitai_name": "<model_name>",
-  "version_name": "<version_name>",
-  "download_url": "https://civitai.com/api/download/models/<version_id>",
-  "confidence": "exact",
-  "metadata": {{{{
-    "search_attempts": <count>,
-    "reasoning": "brief explanation"
-  }}}}
-}}}}
-
-SUCCESS - Found on HuggingFace:
-{{{{
-  "status": "FOUND",
-  "source": "huggingface",
-  "repo": "<user>/<repo>",
-  "file_path": "<path>",
-  "download_url": "<url>",
-  "confidence": "high",
-  "metadata": {{{{
-    "search_attempts": <count>,
-    "reasoning": "brief explanation"
-  }}}}
-}}}}
-
-UNCERTAIN - Need Human Review:
-{{{{
-  "status": "UNCERTAIN",
-  "candidates": [
-    {{{{"source": "...", "name": "...", "url": "...", "match_score": 0.7}}}}
-  ],
-  "reason": "Multiple candidates found, need manual verification",
-  "metadata": {{{{
-    "search_attempts": <count>
-  }}}}
-}}}}
-
-NOT FOUND:
-{{{{
-  "status": "NOT_FOUND",
-  "metadata": {{{{
-    "civitai_searches": <count>,
-    "web_searches": <count>,
-    "reason": "detailed explanation of where you looked"
-  }}}}
-}}}}
-
-INVALID:
-{{{{
-  "status": "INVALID_FILENAME",
-  "reason": "Filename contains invalid characters or is malformed",
-  "metadata": {{{{
-    "reason": "explanation"
-  }}}}
-}}}}
-
-CRITICAL RULES:
-1. Filename validation must be EXACT match
-2. Try multiple strategies before giving up
-3. Return EXACTLY ONE JSON object as your final output with no additional commentary
-4. If uncertain, return UNCERTAIN status with candidates
-5. Maximum 15 minutes timeout
+"""
 
-BEGIN AGENTIC SEARCH NOW. Think step by step and log your progress."""
+        return _QWEN_PROMPT_TEMPLATE.format(
+            knowledge_base=_load_knowledge_base(),
+            pattern_info=pattern_info,
+            filename=filename,
+            model_type=model_type,
+            node_type=node_type,
+            web_search_context=web_search_context,
+        )
 
     def _build_qwen_prompt(self, model_info: Dict[str, Any]) -> str:
         """Simplified prompt builder used by tests."""
@@ -2078,6 +2838,38 @@ BEGIN AGENTIC SEARCH NOW. Think step by step and log your progress."""
             error_message=qwen_result.get("error_message"),
         )
 
+    def _get_worker(self, command: List[str]) -> _QwenWorker:
+        """Return the persistent worker, created (not yet started) on first use."""
+        if self._worker is None:
+            self._worker = _QwenWorker(
+                command + list(config.search.qwen_worker_args), self.logger
+            )
+        return self._worker
+
+    def warmup(self) -> None:
+        """Start the persistent worker process ahead of the first search, if enabled."""
+        if not config.search.qwen_persistent_worker:
+            return
+        self._get_worker([self.qwen_binary] + self._collect_extra_args()).start()
+
+    def _run_qwen(self, command: List[str], prompt: str) -> subprocess.CompletedProcess:
+        """Run one prompt, via the persistent worker when enabled."""
+        if config.search.qwen_persistent_worker:
+            output = self._get_worker(command).request(prompt, config.search.qwen_timeout)
+            if output is not None:
+                return subprocess.CompletedProcess(command, 0, stdout=output, stderr="")
+            self.logger.info("Falling back to a one-shot Qwen run")
+
+        return subprocess.run(
+            command,
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=config.search.qwen_timeout,
+            text=True,
+            input=prompt,
+        )
+
     def _collect_extra_args(self) -> List[str]:
         """Collect additional CLI arguments from config and environment."""
         args: List[str] = []
@@ -2091,33 +2883,60 @@ BEGIN AGENTIC SEARCH NOW. Think step by step and log your progress."""
                 self.logger.warning("Failed to parse QWEN_EXTRA_ARGS: %s", exc)
         return args
 
-    def _cache_file_path(self, filename: str) -> Path:
-        return self.cache_dir / f"{sanitize_filename(filename)}-qwen.json"
+    def _cache_file_name(self, filename: str, model_type: str = "", node_type: str = "") -> str:
+        """Name the cache entry after a digest of every input the prompt is built from."""
+        key = hashlib.blake2b(
+            f"{filename}\x00{model_type}\x00{node_type}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return f"{key}-qwen.json"
+
+    def _cache_file_path(self, filename: str, model_type: str = "", node_type: str = "") -> str:
+        return f"{self._cache_prefix}{self._cache_file_name(filename, model_type, node_type)}"
 
-    def _load_cached_result(self, filename: str) -> Optional[SearchResult]:
+    def _cached_names(self) -> set:
+        """Return the set of cache file names, reading the directory only once."""
+        if self._cache_index is None:
+            try:
+                with os.scandir(self.cache_dir) as entries:
+                    self._cache_index = {entry.name for entry in entries}
+            except OSError:
+                self._cache_index = set()
+        return self._cache_index
+
+    def _discard_cache_file(self, cache_name: str) -> None:
+        try:
+            os.unlink(f"{self._cache_prefix}{cache_name}")
+        except OSError:
+            pass
+        self._cached_names().discard(cache_name)
+
+    def _load_cached_result(
+        self, filename: str, model_type: str = "", node_type: str = ""
+    ) -> Optional[SearchResult]:
         """Load cached Qwen result if within TTL."""
-        cache_file = self._cache_file_path(filename)
-        if not cache_file.exists():
+        cache_name = self._cache_file_name(filename, model_type, node_type)
+        if cache_name not in self._cached_names():
+            return None
+
+        cache_file = f"{self._cache_prefix}{cache_name}"
+        try:
+            mtime = os.stat(cache_file).st_mtime
+        except OSError:
+            self._cached_names().discard(cache_name)
             return None
 
         ttl = max(config.search.qwen_cache_ttl, 0)
-        age = time.time() - cache_file.stat().st_mtime
+        age = time.time() - mtime
         if ttl and age > ttl:
-            try:
-                cache_file.unlink()
-            except OSError:
-                pass
+            self._discard_cache_file(cache_name)
             return None
 
         try:
-            with open(cache_file, encoding="utf-8") as fh:
-                payload = json.load(fh)
+            with open(cache_file, "rb") as fh:
+                payload = _json_loads(fh.read())
         except Exception as exc:
             self.logger.warning("Failed to read Qwen cache for %s: %s", filename, exc)
-            try:
-                cache_file.unlink()
-            except OSError:
-                pass
+            self._discard_cache_file(cache_name)
             return None
 
         qwen_result = payload.get("result") if isinstance(payload, dict) else None
@@ -2127,16 +2946,36 @@ BEGIN AGENTIC SEARCH NOW. Think step by step and log your progress."""
         parsed = self._parse_qwen_result(qwen_result, filename)
         return self._annotate_result(parsed, cached=True)
 
-    def _store_cached_result(self, filename: str, payload: Dict[str, Any]) -> None:
-        """Persist raw Qwen payload for future reuse."""
-        cache_file = self._cache_file_path(filename)
+    def _store_cached_result(
+        self,
+        filename: str,
+        payload: Dict[str, Any],
+        model_type: str = "",
+        node_type: str = "",
+    ) -> None:
+        """Persist raw Qwen payload for future reuse.
+
+        The file is written under a temporary name and renamed into place, so
+        readers (and a later run after a crash) never see a partial entry.
+        """
+        cache_name = self._cache_file_name(filename, model_type, node_type)
         envelope = {"cached_at": time.time(), "result": payload}
+        tmp_path = None
         try:
-            with open(cache_file, "w", encoding="utf-8") as fh:
-                json.dump(envelope, fh, indent=2, ensure_ascii=False)
-                fh.write("\n")
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=cache_name, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(_json_dumps(envelope))
+            os.replace(tmp_path, f"{self._cache_prefix}{cache_name}")
+            tmp_path = None
+            self._cached_names().add(cache_name)
         except Exception as exc:
             self.logger.warning("Unable to store Qwen cache for %s: %s", filename, exc)
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
 
     def _annotate_result(self, result: SearchResult, cached: bool) -> SearchResult:
         """Ensure metadata flags that Qwen handled the lookup."""
@@ -2150,16 +2989,17 @@ BEGIN AGENTIC SEARCH NOW. Think step by step and log your progress."""
         return result
 
     def _parse_qwen_stdout(self, stdout: str) -> Optional[Dict[str, Any]]:
-        """Parse the Qwen CLI stdout as JSON."""
-        output = stdout.strip()
-        if not output:
+        """Parse the Qwen CLI stdout as a JSON object."""
+        if not stdout or stdout.isspace():
             return None
 
+        # Both decoders skip surrounding whitespace, so no strip() copy is needed
         try:
-            return json.loads(output)
-        except json.JSONDecodeError:
-            self.logger.debug("Qwen stdout is not valid JSON; length=%s", len(output))
+            payload = _json_loads(stdout)
+        except ValueError:
+            self.logger.debug("Qwen stdout is not valid JSON; length=%s", len(stdout))
             return None
+        return payload if isinstance(payload, dict) else None
 
 
 class HuggingFaceSearch(SearchBackend):
@@ -2244,7 +3084,7 @@ class HuggingFaceSearch(SearchBackend):
                 # Extract repo name from URL
                 # Expected format: https://huggingface.co/username/repo-name/tree/main/path/to/file
                 # or: https://huggingface.co/username/repo-name
-                match = re.search(r"huggingface\.co/([^/]+)/([^/?]+)", url)
+                match = _HF_REPO_URL_RE.search(url)
                 if match:
                     repo_name = f"{match.group(1)}/{match.group(2)}"
 
@@ -2354,7 +3194,7 @@ class HuggingFaceSearch(SearchBackend):
                 # Check if file name matches our target (with common model extensions)
                 if self._is_matching_model_file(file_name, target_base):
                     file_size = getattr(file_info, "size", 0)
-                    matching_files.append((file_path, file_size))
+                    matching_files.append((file_path, file_size, file_name.lower()))
 
             if not matching_files:
                 return None
@@ -2364,7 +3204,7 @@ class HuggingFaceSearch(SearchBackend):
             if not best_file:
                 return None
 
-            file_path, file_size = best_file
+            file_path, file_size, file_name_lower = best_file
 
             # Construct download URL
             download_url = hf_hub_url(
@@ -2373,9 +3213,7 @@ class HuggingFaceSearch(SearchBackend):
 
             # Determine confidence based on filename match
             confidence = (
-                "exact"
-                if os.path.basename(file_path).lower() == target_filename.lower()
-                else "fuzzy"
+                "exact" if file_name_lower == target_filename.lower() else "fuzzy"
             )
 
             return SearchResult(
@@ -2412,29 +3250,25 @@ class HuggingFaceSearch(SearchBackend):
         target_lower = target_base.lower()
 
         # Remove extension for comparison
-        file_base = file_lower.rsplit(".", 1)[0] if "." in file_lower else file_lower
+        file_base = file_lower.rsplit(".", 1)[0]
 
         # Exact match
         if file_base == target_lower:
             return True
 
-        # Check for common model extensions
-        valid_extensions = [".safetensors", ".ckpt", ".pt", ".bin", ".pth", ".onnx"]
-        if any(file_lower.endswith(ext) for ext in valid_extensions):
-            # Check if target is contained in filename or vice versa
-            if target_lower in file_base or file_base in target_lower:
-                return True
-
-        return False
+        # Containment only counts for recognised model files
+        return file_lower.endswith(_MODEL_FILE_EXTENSIONS) and (
+            target_lower in file_base or file_base in target_lower
+        )
 
     def _select_best_file(
-        self, matching_files: List[Tuple[str, int]], target_filename: str
-    ) -> Optional[Tuple[str, int]]:
+        self, matching_files: List[Tuple[str, int, str]], target_filename: str
+    ) -> Optional[Tuple[str, int, str]]:
         """
         Select the best matching file from a list of candidates.
 
         Args:
-            matching_files: List of (file_path, file_size) tuples
+            matching_files: List of (file_path, file_size, lowercase_basename) tuples
             target_filename: Target filename
 
         Returns:
@@ -2444,16 +3278,16 @@ class HuggingFaceSearch(SearchBackend):
             return None
 
         target_base = target_filename.lower()
+        exact_names = (
+            target_base,
+            target_base + ".safetensors",
+            target_base + ".ckpt",
+        )
 
         # First, try to find exact name match
-        for file_path, file_size in matching_files:
-            file_name = os.path.basename(file_path).lower()
-            if (
-                file_name == target_base
-                or file_name == target_base + ".safetensors"
-                or file_name == target_base + ".ckpt"
-            ):
-                return (file_path, file_size)
+        for candidate in matching_files:
+            if candidate[2] in exact_names:
+                return candidate
 
         # If no exact match, prefer larger files (likely to be main model)
         return max(matching_files, key=lambda x: x[1])
@@ -2489,6 +3323,19 @@ class HuggingFaceSearch(SearchBackend):
             return "checkpoints"
 
 
+@lru_cache(maxsize=1)
+def _load_modelscope_search() -> Optional[type]:
+    """Import the ModelScope backend class on first use, or None if it cannot load.
+
+    The adapter imports this module, so it cannot be imported at module level.
+    """
+    try:
+        from .adapters.modelscope_search import ModelScopeSearch
+    except ImportError:
+        return None
+    return ModelScopeSearch
+
+
 class ModelSearch:
     """
     Unified model search coordinator.
@@ -2513,120 +3360,434 @@ class ModelSearch:
         """
         self.logger = logger or get_logger("ModelSearch")
         self.state_manager = state_manager
+        self._state_lock = threading.Lock()
+        # (filename, model_info, civitai_info) attempts awaiting flush_state()
+        self._state_buffer: List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]] = []
 
-        # Initialize available backends dynamically
+        # Register available backends; each is constructed on first use
         # Qwen is the PRIMARY agentic search backend that handles all sources
-        self.backends: Dict[str, SearchBackend] = {
-            "qwen": QwenSearch(logger=self.logger),  # PRIMARY - agentic search
-            "civitai": CivitaiSearch(logger=self.logger),  # FALLBACK - direct API
-            "huggingface": HuggingFaceSearch(logger=self.logger),  # Placeholder backend
+        self._backend_factories: Dict[str, Callable[[], SearchBackend]] = {
+            "qwen": lambda: QwenSearch(logger=self.logger),  # PRIMARY - agentic search
+            "civitai": lambda: CivitaiSearch(logger=self.logger),  # FALLBACK - direct API
+            "huggingface": lambda: HuggingFaceSearch(logger=self.logger),  # Placeholder backend
         }
-
-        # Conditionally register ModelScope backend
-        if (
-            MODELSCOPE_AVAILABLE
-            and ModelScopeSearch
-            and config.copilot.enable_modelscope
-        ):
-            self.logger.info(
-                "ModelScope backend enabled and available, adding to search backends."
-            )
-            self.backends["modelscope"] = ModelScopeSearch(logger=self.logger)
-        elif (
-            MODELSCOPE_AVAILABLE
-            and ModelScopeSearch
-            and not config.copilot.enable_modelscope
-        ):
+        self.backends: Dict[str, SearchBackend] = {}
+        self._backends_lock = threading.Lock()
+        # Shared by every parallel_backends race; see _get_race_pool
+        self._race_pool: Optional[ThreadPoolExecutor] = None
+
+        # Conditionally register ModelScope backend. The adapter is only
+        # imported once it is enabled, since it can pull in heavy dependencies.
+        if not MODELSCOPE_AVAILABLE:
+            self.logger.info("ModelScope backend not available.")
+        elif not config.copilot.enable_modelscope:
             self.logger.info(
                 "ModelScope backend available but disabled in configuration."
             )
-        elif MODELSCOPE_AVAILABLE and not ModelScopeSearch:
-            self.logger.warning(
-                "ModelScope package available but ModelScopeSearch import failed."
-            )
         else:
-            self.logger.info("ModelScope backend not available.")
+            modelscope_search = _load_modelscope_search()
+            if modelscope_search is None:
+                self.logger.warning(
+                    "ModelScope package available but ModelScopeSearch import failed."
+                )
+            else:
+                self.logger.info(
+                    "ModelScope backend enabled and available, adding to search backends."
+                )
+                self._backend_factories["modelscope"] = lambda: modelscope_search(
+                    logger=self.logger
+                )
 
         # Validate and set backend order
         self._validate_backend_order()
 
-        # Setup caching
+        # Backend searches in progress, keyed by (filename, backend override)
+        self._inflight: Dict[Tuple[str, Optional[Tuple[str, ...]]], Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        # Per-backend rate limiting for concurrent batch searches
+        self._backend_semaphores: Dict[str, threading.BoundedSemaphore] = {
+            name: threading.BoundedSemaphore(max(config.search.backend_concurrency, 1))
+            for name in self._backend_factories
+        }
+
+        # Setup caching: a single SQLite file keyed by sanitized filename
         self.cache_dir = Path(cache_dir or config.temp_dir) / "search_cache"
         self.cache_dir.mkdir(exist_ok=True)
+        self._cache_db = self._open_cache_db(self.cache_dir / "cache.sqlite")
+        self._cache_lock = threading.Lock()
+        # LRU of sanitized filename -> (expires_at, result), guarded by _cache_lock
+        self._mem_cache_size = max(config.search.memory_cache_size, 0)
+        self._mem_cache: "OrderedDict[str, Tuple[float, SearchResult]]" = OrderedDict()
+        # Rows awaiting flush_cache(), keyed by sanitized filename; guarded by _cache_lock
+        self._cache_buffer: Dict[str, Tuple[str, str, str, float, bytes]] = {}
+        # Hits per cache row awaiting flush_cache(), for LFU eviction; guarded by _cache_lock
+        self._cache_hit_counts: Dict[str, int] = {}
+        # Lookup outcomes since construction, guarded by _cache_lock
+        self._cache_hits = 0
+        self._cache_memory_hits = 0
+        self._cache_misses = 0
+        # (backend, pattern tag) -> [found, total] backend outcomes, and the part of
+        # them awaiting flush_cache(); guarded by _cache_lock
+        self._backend_outcomes: Dict[Tuple[str, str], List[int]] = {
+            (backend, tag): [found, total]
+            for backend, tag, found, total in self._cache_db.execute(
+                "SELECT backend, tag, found, total FROM backend_stats"
+            )
+        }
+        self._backend_outcome_deltas: Dict[Tuple[str, str], List[int]] = {}
+        self._import_legacy_cache()
+
+        if config.search.enable_warmup:
+            threading.Thread(target=self._warmup, name="search-warmup", daemon=True).start()
 
     def search_model(
         self,
         model_info: Dict[str, Any],
         use_cache: bool = True,
         backends: Optional[List[str]] = None,
+        flush_state: bool = True,
     ) -> SearchResult:
         """
         Search for a model using the configured backend order.
 
+        Filenames rejected by ``validate_and_sanitize_filename``, or without a
+        model file extension, return INVALID_FILENAME immediately, without
+        touching the cache or any backend, so callers need not pre-validate.
+
         Args:
             model_info: Dictionary with model information
             use_cache: Whether to use cached results
+            backends: Backend names to try instead of the order resolved from
+                ``config.search.backend_order`` (see ``reload_backends``)
+            flush_state: Write recorded attempts to the state manager, and
+                buffered cache rows to the cache, before returning; batch
+                callers pass False and call ``flush_state()``/``flush_cache()``
 
         Returns:
             SearchResult object
         """
+        try:
+            return self._search_model(
+                model_info, use_cache and config.search.enable_cache, backends
+            )
+        finally:
+            if flush_state:
+                self.flush_state()
+                self.flush_cache()
+
+    def _resolve_locally(
+        self,
+        model_info: Dict[str, Any],
+        use_cache: bool,
+        cached: Optional[Dict[str, SearchResult]] = None,
+    ) -> Optional[SearchResult]:
+        """Return the result for ``model_info`` if no backend is needed, else None.
+
+        Covers invalid filenames and cache hits. Here and in the helpers below,
+        ``use_cache`` already includes ``config.search.enable_cache``. Batch
+        callers pass ``cached``, the ``_get_cached_results`` of all their
+        filenames, instead of having each model looked up on its own.
+        """
         filename = model_info["filename"]
 
+        is_valid, _, error_reason = validate_and_sanitize_filename(filename)
+        if is_valid and not filename.lower().endswith(_SEARCHABLE_EXTENSIONS):
+            is_valid, error_reason = False, "Unsupported model file extension"
+        if not is_valid:
+            self.logger.warning(f"Invalid filename detected: {filename} - {error_reason}")
+            return SearchResult(
+                status="INVALID_FILENAME",
+                filename=filename,
+                type=model_info.get("type"),
+                error_message=error_reason,
+                metadata={
+                    "validation_reason": error_reason,
+                    "original_filename": filename,
+                },
+            )
+
         # Check cache first
-        if use_cache and config.search.enable_cache:
-            cached_result = self._get_cached_result(filename)
+        if use_cache:
+            if cached is None:
+                cached_result = self._get_cached_result(filename)
+            else:
+                cached_result = cached.get(filename)
+                if cached_result is not None:
+                    # The same filename may occur more than once in a batch
+                    cached_result = replace(
+                        cached_result, metadata=dict(cached_result.metadata)
+                    )
             if cached_result:
                 self.logger.info(f"Using cached result for {filename}")
                 return cached_result
+        return None
+
+    def _search_model(
+        self,
+        model_info: Dict[str, Any],
+        use_cache: bool,
+        backends: Optional[List[str]],
+    ) -> SearchResult:
+        result = self._resolve_locally(model_info, use_cache)
+        if result is not None:
+            return result
+        return self._search_backends(model_info, use_cache, backends)
+
+    def _search_backends(
+        self,
+        model_info: Dict[str, Any],
+        use_cache: bool,
+        backends: Optional[List[str]],
+    ) -> SearchResult:
+        """Run the backends for a model that ``_resolve_locally`` did not answer.
+
+        Concurrent calls for the same filename and backend list share one search;
+        callers that joined an in-flight search get their own copy of its result.
+        """
+        key = (model_info["filename"], tuple(backends) if backends else None)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                owner = False
+            else:
+                owner = True
+                future = self._inflight[key] = Future()
+        if not owner:
+            result = future.result()
+            return replace(result, metadata=dict(result.metadata or {}))
+        try:
+            result = self._run_backends(model_info, use_cache, backends)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    def _run_backends(
+        self,
+        model_info: Dict[str, Any],
+        use_cache: bool,
+        backends: Optional[List[str]],
+    ) -> SearchResult:
+        filename = model_info["filename"]
 
         # Determine backend order (override if explicit list provided)
-        backends_to_try = backends if backends else config.search.backend_order
+        if backends:
+            backends_to_try = backends
+        elif config.search.adaptive_backend_order:
+            backends_to_try = self._learned_backend_order(model_info)
+        else:
+            backends_to_try = self._backend_order
 
-        # Try each backend in the configured order
+        available = []
         for backend_name in backends_to_try:
-            if backend_name not in self.backends:
+            backend = self._get_backend(backend_name)
+            if backend is None:
                 self.logger.warning(
                     f"Configured backend '{backend_name}' is not available or unknown."
                 )
                 continue
+            available.append((backend_name, backend))
 
-            backend = self.backends[backend_name]
-            self.logger.info(f"Trying '{backend_name}' search for '{filename}'")
-
-            result = backend.search(model_info)
-
-            # Attach model type for downstream placement if backend didn't set it
-            if getattr(result, "type", None) is None:
-                try:
-                    result.type = model_info.get("type")
-                except Exception:
-                    pass
-
-            # Cache successful results
-            if result.status == "FOUND" and use_cache and config.search.enable_cache:
-                self._cache_result(result)
-
-            # Mark attempt in state manager
-            if self.state_manager:
-                self.state_manager.mark_download_attempted(
-                    filename,
-                    model_info,
-                    result.__dict__ if result.status == "FOUND" else None,
-                )
-
-            # Return if found or if it's a critical error (don't try other backends)
-            if result.status in ["FOUND", "ERROR", "INVALID_FILENAME"]:
+        if config.search.parallel_backends and len(available) > 1:
+            result = self._race_backends(available, model_info, use_cache)
+            if result is not None:
                 return result
+        else:
+            # Try each backend in the configured order
+            for backend_name, backend in available:
+                result = self._run_backend(backend_name, backend, model_info, use_cache)
+
+                # Return if found or if it's a critical error (don't try other backends)
+                if result.status in _TERMINAL_STATUSES:
+                    return result
 
         # If all backends returned NOT_FOUND
-        return SearchResult(
+        result = SearchResult(
             status="NOT_FOUND",
             filename=filename,
             metadata={
-                "backends_tried": backends_to_try,
+                "backends_tried": list(backends_to_try),
                 "reason": "No results from configured backends",
             },
         )
+        if use_cache and config.search.negative_cache_ttl > 0:
+            self._cache_result(result)
+        return result
+
+    def _run_backend(
+        self,
+        backend_name: str,
+        backend: SearchBackend,
+        model_info: Dict[str, Any],
+        use_cache: bool,
+    ) -> SearchResult:
+        """Run one backend search and record its outcome (cache + state)."""
+        result = self._query_backend(backend_name, backend, model_info)
+        self._record_result(backend_name, model_info, result, use_cache)
+        return result
+
+    def _query_backend(
+        self, backend_name: str, backend: SearchBackend, model_info: Dict[str, Any]
+    ) -> SearchResult:
+        """Run one backend search, within its concurrency limit, without recording it."""
+        self.logger.info(f"Trying '{backend_name}' search for '{model_info['filename']}'")
+
+        with self._backend_semaphores[backend_name]:
+            result = backend.search(model_info)
+
+        # Attach model type for downstream placement if backend didn't set it
+        if result.type is None:
+            result.type = model_info.get("type")
+        return result
+
+    def _record_result(
+        self,
+        backend_name: str,
+        model_info: Dict[str, Any],
+        result: SearchResult,
+        use_cache: bool,
+    ) -> None:
+        """Record a backend's result: outcome statistics, cache row and state attempt."""
+        filename = model_info["filename"]
+        if result.status in ("FOUND", "NOT_FOUND"):
+            self._record_backend_outcome(backend_name, model_info, result.status == "FOUND")
+
+        # Serialize a FOUND result once: the bytes are the cache row, and decoding
+        # them gives the state manager its own copy (no aliasing of metadata)
+        blob = None
+        if result.status == "FOUND" and (use_cache or self.state_manager):
+            try:
+                blob = _result_bytes(result)
+            except Exception as e:
+                self.logger.warning(f"Failed to serialize result for {filename}: {e}")
+
+        # Cache successful results
+        if blob is not None and use_cache:
+            self._cache_result(result, blob)
+
+        # Queue the attempt for the state manager; written by flush_state()
+        if self.state_manager:
+            civitai_info = None
+            if result.status == "FOUND":
+                civitai_info = _json_loads(blob) if blob is not None else asdict(result)
+            attempt = (filename, model_info, civitai_info)
+            with self._state_lock:
+                self._state_buffer.append(attempt)
+                full = len(self._state_buffer) >= _STATE_FLUSH_THRESHOLD
+            if full:
+                self.flush_state()
+
+    def _record_backend_outcome(
+        self, backend_name: str, model_info: Dict[str, Any], found: bool
+    ) -> None:
+        """Count a FOUND/NOT_FOUND outcome for ``search.adaptive_backend_order``."""
+        key = (backend_name, _pattern_tag(model_info))
+        with self._cache_lock:
+            for counts in (
+                self._backend_outcomes.setdefault(key, [0, 0]),
+                self._backend_outcome_deltas.setdefault(key, [0, 0]),
+            ):
+                counts[0] += found
+                counts[1] += 1
+
+    def _learned_backend_order(self, model_info: Dict[str, Any]) -> Tuple[str, ...]:
+        """Return the configured backends ordered by their FOUND rate for this kind of model.
+
+        Models are bucketed by ``_pattern_tag``. The configured order is kept
+        (and breaks ties) until every backend has ``_ADAPTIVE_ORDER_MIN_SAMPLES``
+        outcomes for the model's tag.
+        """
+        tag = _pattern_tag(model_info)
+        with self._cache_lock:
+            outcomes = [self._backend_outcomes.get((name, tag)) for name in self._backend_order]
+        if any(o is None or o[1] < _ADAPTIVE_ORDER_MIN_SAMPLES for o in outcomes):
+            return self._backend_order
+        rates = {name: found / total for name, (found, total) in zip(self._backend_order, outcomes)}
+        return tuple(sorted(self._backend_order, key=lambda name: -rates[name]))
+
+    def flush_state(self) -> None:
+        """Write buffered search attempts to the state manager in one batch."""
+        if not self.state_manager:
+            return
+        # Holding the lock across the write keeps flushes ordered across threads
+        with self._state_lock:
+            if not self._state_buffer:
+                return
+            pending, self._state_buffer = self._state_buffer, []
+            self.state_manager.mark_downloads_attempted(pending)
+
+    def _race_backends(
+        self,
+        available: List[Tuple[str, SearchBackend]],
+        model_info: Dict[str, Any],
+        use_cache: bool,
+    ) -> Optional[SearchResult]:
+        """
+        Query all backends at once and return the first FOUND result.
+
+        Without a FOUND result, the terminal result (ERROR/INVALID_FILENAME) of the
+        highest-priority backend is returned, matching the sequential semantics.
+
+        Searches run on the shared ``_get_race_pool``; results are recorded
+        (cache, statistics, state) here, on the caller's thread, as they are
+        consumed. Backends that have not started when a winner arrives are
+        cancelled; ones already running finish in the background, but their
+        results are discarded, so nothing is written after this returns.
+
+        Returns:
+            The winning SearchResult, or None if every backend came back NOT_FOUND
+        """
+        pool = self._get_race_pool()
+        futures = {
+            pool.submit(self._query_backend, name, backend, model_info): rank
+            for rank, (name, backend) in enumerate(available)
+        }
+        terminal: Dict[int, SearchResult] = {}
+        try:
+            for future in as_completed(futures):
+                rank = futures[future]
+                name = available[rank][0]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.error(f"Backend '{name}' failed: {e}")
+                    result = SearchResult(
+                        status="ERROR",
+                        filename=model_info["filename"],
+                        type=model_info.get("type"),
+                        error_message=str(e),
+                    )
+                else:
+                    self._record_result(name, model_info, result, use_cache)
+                if result.status == "FOUND":
+                    return result
+                if result.status in _TERMINAL_STATUSES:
+                    terminal[rank] = result
+        finally:
+            for future in futures:
+                future.cancel()
+
+        return terminal[min(terminal)] if terminal else None
+
+    def _get_race_pool(self) -> ThreadPoolExecutor:
+        """Return the pool ``_race_backends`` runs on, created on first use.
+
+        It has a worker per backend for each of ``search.max_parallel_searches``
+        concurrent searches; ``backend_concurrency`` still bounds each backend.
+        """
+        with self._backends_lock:
+            if self._race_pool is None:
+                self._race_pool = ThreadPoolExecutor(
+                    max_workers=max(config.search.max_parallel_searches, 1)
+                    * max(len(self._backend_factories), 1),
+                    thread_name_prefix="backend-race",
+                )
+            return self._race_pool
 
     def search_multiple_models(
         self,
@@ -2635,7 +3796,12 @@ class ModelSearch:
         use_cache: bool = True,
     ) -> List[SearchResult]:
         """
-        Search for multiple models.
+        Search for multiple models concurrently.
+
+        Invalid filenames and cache hits are resolved inline; the remaining
+        distinct filenames are searched once each on a thread pool of up to
+        ``config.search.max_parallel_searches`` workers. Results are returned in
+        the same order as ``models``.
 
         Args:
             models: List of model info dictionaries
@@ -2645,43 +3811,446 @@ class ModelSearch:
         Returns:
             List of SearchResult objects
         """
-        original_order = list(config.search.backend_order)
-        try:
-            if backends:
-                config.search.backend_order = backends
 
-            results = []
-            for model in models:
-                result = self.search_model(model, use_cache)
-                results.append(result)
-                time.sleep(0.5)
+        def search(model: Dict[str, Any]) -> SearchResult:
+            return self._search_backends(model, use_cache, backends)
+
+        use_cache = use_cache and config.search.enable_cache
+        cached = (
+            self._get_cached_results([model["filename"] for model in models])
+            if use_cache
+            else None
+        )
+        results = [self._resolve_locally(model, use_cache, cached) for model in models]
+        # Repeated filenames (e.g. a shared base model) are searched once
+        misses: Dict[str, List[int]] = {}
+        for i, result in enumerate(results):
+            if result is None:
+                misses.setdefault(models[i]["filename"], []).append(i)
+        first = [indices[0] for indices in misses.values()]
+        workers = min(max(config.search.max_parallel_searches, 1), len(first))
+        try:
+            self._prefetch_qwen([models[i] for i in first], backends)
+            if workers <= 1:
+                found = [search(models[i]) for i in first]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    found = list(executor.map(search, [models[i] for i in first]))
+            for indices, result in zip(misses.values(), found):
+                results[indices[0]] = result
+                for i in indices[1:]:
+                    results[i] = replace(result, metadata=dict(result.metadata or {}))
             return results
         finally:
-            # Restore original order to avoid side-effects
-            config.search.backend_order = original_order
+            self.flush_state()
+            self.flush_cache()
+
+    async def search_multiple_models_async(
+        self,
+        models: List[Dict[str, Any]],
+        backends: Optional[List[str]] = None,
+        use_cache: bool = True,
+    ) -> List[SearchResult]:
+        """
+        Search for multiple models from within an event loop.
+
+        Each search runs in a worker thread (backends use blocking HTTP clients),
+        with at most ``config.search.max_parallel_searches`` in flight. Results
+        are returned in the same order as ``models``.
+
+        Args:
+            models: List of model info dictionaries
+            backends: List of backend names to try
+            use_cache: Whether to use cached results
+
+        Returns:
+            List of SearchResult objects
+        """
+        semaphore = asyncio.Semaphore(max(config.search.max_parallel_searches, 1))
+
+        async def search(model: Dict[str, Any]) -> SearchResult:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self.search_model, model, use_cache, backends, False
+                )
+
+        try:
+            await asyncio.to_thread(self._prefetch_qwen, models, backends)
+            return list(await asyncio.gather(*(search(model) for model in models)))
+        finally:
+            await asyncio.to_thread(self.flush_state)
+            await asyncio.to_thread(self.flush_cache)
+
+    def _prefetch_qwen(
+        self, models: List[Dict[str, Any]], backends: Optional[List[str]]
+    ) -> None:
+        """Batch models into shared Qwen runs when Qwen is the first backend tried."""
+        order = backends if backends else self._backend_order
+        if len(models) < 2 or not order or order[0] != "qwen":
+            return
+        if config.search.qwen_batch_size <= 1:
+            return
+        prefetch = getattr(self._get_backend("qwen"), "prefetch", None)
+        if prefetch is not None:
+            prefetch(models)
+
+    def _warmup(self) -> None:
+        """Pay cold-start costs in the background (see ``search.enable_warmup``).
+
+        Loads the most recent cache entries into the in-memory LRU, then
+        constructs the configured backends and calls their optional ``warmup``
+        hook. Failures are logged and otherwise ignored.
+        """
+        try:
+            self._preload_memory_cache()
+        except Exception as e:
+            self.logger.debug(f"Search cache warmup failed: {e}")
+        for name in self._backend_order:
+            try:
+                warmup = getattr(self._get_backend(name), "warmup", None)
+                if callable(warmup):
+                    warmup()
+            except Exception as e:
+                self.logger.debug(f"Warmup of '{name}' backend failed: {e}")
+
+    def _preload_memory_cache(self) -> None:
+        """Fill the in-memory LRU with the newest unexpired cache rows."""
+        if self._mem_cache_size <= 0:
+            return
+        now = time.time()
+        with self._cache_lock:
+            self._flush_cache_locked()
+            rows = self._cache_db.execute(
+                "SELECT filename, status, cached_at, blob FROM cache "
+                "ORDER BY cached_at DESC LIMIT ?",
+                (self._mem_cache_size,),
+            ).fetchall()
+            # Oldest first, so the newest rows end up most recently used; entries
+            # that searches remembered in the meantime are left alone
+            for key, status, cached_at, blob in reversed(rows):
+                expires_at = self._cache_expiry(status, cached_at)
+                if now < expires_at and key not in self._mem_cache:
+                    self._remember(key, (expires_at, SearchResult(**_json_loads(blob))))
+
+    def _open_cache_db(self, db_path: Path) -> sqlite3.Connection:
+        """Open (or create) the SQLite search cache."""
+        conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # The cache is disposable: rebuild it rather than migrate on schema changes
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        if version != _CACHE_SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS cache")
+            conn.execute(f"PRAGMA user_version = {_CACHE_SCHEMA_VERSION}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "filename TEXT PRIMARY KEY, alias TEXT NOT NULL, status TEXT NOT NULL, "
+            "cached_at REAL NOT NULL, blob BLOB NOT NULL, hit_count INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_alias ON cache (alias)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS backend_stats ("
+            "backend TEXT NOT NULL, tag TEXT NOT NULL, found INTEGER NOT NULL, "
+            "total INTEGER NOT NULL, PRIMARY KEY (backend, tag))"
+        )
+        return conn
+
+    def _import_legacy_cache(self) -> None:
+        """Move results from the old one-JSON-file-per-model cache into SQLite.
+
+        Files are dated by mtime so the usual TTLs apply, never overwrite newer
+        rows, and are deleted afterwards (unreadable ones included).
+        """
+        legacy: List[str] = []
+        rows = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not (entry.name.endswith(".json") and entry.is_file()):
+                    continue
+                legacy.append(entry.path)
+                try:
+                    with open(entry.path, "rb") as f:
+                        result = SearchResult(**_json_loads(f.read()))
+                    cached_at = entry.stat().st_mtime
+                except (OSError, TypeError, ValueError) as e:
+                    self.logger.debug(f"Skipping unreadable legacy cache file {entry.name}: {e}")
+                    continue
+                key = sanitize_filename(result.filename)
+                rows.append(
+                    (
+                        key,
+                        _cache_alias(key),
+                        result.status,
+                        cached_at,
+                        _result_bytes(result),
+                    )
+                )
+        if not legacy:
+            return
+
+        with self._cache_lock:
+            self._cache_db.execute("BEGIN")
+            self._cache_db.executemany(
+                "INSERT OR IGNORE INTO cache (filename, alias, status, cached_at, blob) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._cache_db.execute("COMMIT")
+        for path in legacy:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self.logger.info(f"Imported {len(rows)} legacy search cache entries into SQLite")
 
     def _get_cached_result(self, filename: str) -> Optional[SearchResult]:
-        """Get cached search result."""
-        cache_file = self.cache_dir / f"{sanitize_filename(filename)}.json"
-        if not cache_file.exists():
-            return None
+        """Get cached search result.
+
+        Entries expire after ``config.search.cache_ttl`` seconds (0 keeps them
+        forever); NOT_FOUND entries after ``config.search.negative_cache_ttl``
+        so that newly published models are eventually picked up.
 
+        Without an entry for the filename itself, the newest FOUND entry with
+        the same ``_cache_alias`` is served, renamed to the requested filename
+        and tagged with ``cache_alias_of``. NOT_FOUND entries are never served
+        for an alias.
+        """
+        key = sanitize_filename(filename)
+        now = time.time()
+        alias_of = None
         try:
-            with open(cache_file) as f:
-                data = json.load(f)
-            return SearchResult(**data)
+            with self._cache_lock:
+                entry = self._mem_cache.get(key)
+                if entry is not None:
+                    if now >= entry[0]:
+                        del self._mem_cache[key]
+                        self._cache_misses += 1
+                        return None
+                    self._mem_cache.move_to_end(key)
+                    self._cache_memory_hits += 1
+                else:
+                    self._flush_cache_locked()
+                    # The filename's own row wins over its aliases, then the newest
+                    row = self._cache_db.execute(
+                        "SELECT filename, status, cached_at, blob FROM cache "
+                        "WHERE filename = ? OR (alias = ? AND status = 'FOUND') "
+                        "ORDER BY filename = ? DESC, cached_at DESC LIMIT 1",
+                        (key, _cache_alias(key), key),
+                    ).fetchone()
+                    if row is None:
+                        self._cache_misses += 1
+                        return None
+                    row_key, status, cached_at, blob = row
+                    # Expired rows are skipped without decoding the blob
+                    expires_at = self._cache_expiry(status, cached_at)
+                    if now >= expires_at:
+                        self._cache_misses += 1
+                        return None
+                    entry = (expires_at, SearchResult(**_json_loads(blob)))
+                    # Alias hits are not remembered: a later write for either
+                    # filename would leave the in-memory copy stale
+                    if row_key == key:
+                        self._remember(key, entry)
+                    else:
+                        alias_of = row_key
+                self._cache_hits += 1
+                self._count_hit(alias_of or key)
+            return self._cached_copy(entry[1], filename, alias_of)
         except Exception:
             return None
 
-    def _cache_result(self, result: SearchResult) -> None:
-        """Cache a search result."""
-        cache_file = self.cache_dir / f"{sanitize_filename(result.filename)}.json"
+    def _get_cached_results(self, filenames: List[str]) -> Dict[str, SearchResult]:
+        """``_get_cached_result`` for many filenames, with one query per chunk of them.
+
+        Returns the hits keyed by filename (as given); misses are left out.
+        """
+        names_by_key: Dict[str, List[str]] = {}
+        for filename in filenames:
+            names_by_key.setdefault(sanitize_filename(filename), []).append(filename)
+        now = time.time()
+        # sanitized key -> (key of the row served, (expires_at, result))
+        found: Dict[str, Tuple[str, Tuple[float, SearchResult]]] = {}
+        try:
+            with self._cache_lock:
+                pending = []
+                for key in names_by_key:
+                    entry = self._mem_cache.get(key)
+                    if entry is None:
+                        pending.append(key)
+                    elif now >= entry[0]:
+                        del self._mem_cache[key]
+                    else:
+                        self._mem_cache.move_to_end(key)
+                        self._cache_memory_hits += 1
+                        found[key] = (key, entry)
+
+                if pending:
+                    self._flush_cache_locked()
+                for start in range(0, len(pending), _CACHE_LOOKUP_CHUNK):
+                    chunk = pending[start : start + _CACHE_LOOKUP_CHUNK]
+                    aliases = {key: _cache_alias(key) for key in chunk}
+                    distinct_aliases = list(set(aliases.values()))
+                    rows = self._cache_db.execute(
+                        "SELECT filename, alias, status, cached_at, blob FROM cache "
+                        f"WHERE filename IN ({','.join('?' * len(chunk))}) "
+                        f"OR (alias IN ({','.join('?' * len(distinct_aliases))}) "
+                        "AND status = 'FOUND')",
+                        (*chunk, *distinct_aliases),
+                    ).fetchall()
+                    # Same preference as _get_cached_result: own row, then newest alias
+                    own = {row[0]: row for row in rows}
+                    newest: Dict[str, tuple] = {}
+                    for row in rows:
+                        if row[2] != "FOUND":
+                            continue
+                        if row[1] not in newest or row[3] > newest[row[1]][3]:
+                            newest[row[1]] = row
+                    for key in chunk:
+                        row = own.get(key) or newest.get(aliases[key])
+                        if row is None:
+                            continue
+                        row_key, _, status, cached_at, blob = row
+                        expires_at = self._cache_expiry(status, cached_at)
+                        if now >= expires_at:
+                            continue
+                        entry = (expires_at, SearchResult(**_json_loads(blob)))
+                        if row_key == key:
+                            self._remember(key, entry)
+                        found[key] = (row_key, entry)
+
+                self._cache_hits += len(found)
+                self._cache_misses += len(names_by_key) - len(found)
+                for row_key, _ in found.values():
+                    self._count_hit(row_key)
+        except Exception:
+            return {}
+        return {
+            filename: self._cached_copy(
+                entry[1], filename, None if row_key == key else row_key
+            )
+            for key, (row_key, entry) in found.items()
+            for filename in names_by_key[key]
+        }
+
+    @staticmethod
+    def _cached_copy(
+        result: SearchResult, filename: str, alias_of: Optional[str]
+    ) -> SearchResult:
+        """Copy a cache entry's result (metadata included) for a caller asking for ``filename``.
+
+        Deep copies keep callers from mutating the in-memory entry, nested
+        values included. Results served for an alias take the requested
+        filename and record the entry's own.
+        """
+        metadata = copy.deepcopy(result.metadata) if result.metadata else {}
+        metadata["cached"] = True
+        if alias_of is None:
+            return replace(result, metadata=metadata)
+        metadata["cache_alias_of"] = alias_of
+        return replace(result, filename=filename, metadata=metadata)
+
+    @staticmethod
+    def _cache_expiry(status: str, cached_at: float) -> float:
+        """Return the timestamp at which a cache entry stops being served."""
+        if status == "NOT_FOUND":
+            return cached_at + config.search.negative_cache_ttl
+        if config.search.cache_ttl <= 0:
+            return float("inf")
+        return cached_at + config.search.cache_ttl
+
+    def _count_hit(self, key: str) -> None:
+        """Record a hit on cache row ``key``; caller must hold ``_cache_lock``."""
+        self._cache_hit_counts[key] = self._cache_hit_counts.get(key, 0) + 1
+
+    def _remember(self, key: str, entry: Tuple[float, SearchResult]) -> None:
+        """Insert into the in-memory LRU; caller must hold ``_cache_lock``."""
+        self._mem_cache[key] = entry
+        self._mem_cache.move_to_end(key)
+        if len(self._mem_cache) > self._mem_cache_size:
+            self._mem_cache.popitem(last=False)
+
+    def _cache_result(self, result: SearchResult, blob: Optional[bytes] = None) -> None:
+        """Cache a search result; ``blob`` is its already-serialized JSON, if any.
+
+        The row is buffered and written by ``flush_cache()``; lookups flush the
+        buffer before querying, so they always see it.
+        """
+        key = sanitize_filename(result.filename)
+        cached_at = time.time()
         try:
-            with open(cache_file, "w") as f:
-                json.dump(result.__dict__, f, indent=2)
+            if blob is None:
+                blob = _result_bytes(result)
+            with self._cache_lock:
+                self._cache_buffer[key] = (
+                    key, _cache_alias(key), result.status, cached_at, blob
+                )
+                # A deep copy: the caller keeps (and may mutate) ``result.metadata``
+                stored = replace(result, metadata=copy.deepcopy(result.metadata))
+                self._remember(key, (self._cache_expiry(result.status, cached_at), stored))
+                if len(self._cache_buffer) >= _CACHE_FLUSH_THRESHOLD:
+                    self._flush_cache_locked(full=True)
         except Exception as e:
             self.logger.warning(f"Failed to cache result: {e}")
 
+    def flush_cache(self) -> None:
+        """Write buffered cache rows and hit counts to the database in one transaction.
+
+        Afterwards the cache is trimmed to ``config.search.max_cache_entries``
+        rows, evicting the least used (then oldest) first.
+        """
+        with self._cache_lock:
+            self._flush_cache_locked(full=True)
+
+    def _flush_cache_locked(self, full: bool = False) -> None:
+        """``flush_cache`` body; caller must hold ``_cache_lock``.
+
+        Lookups pass ``full=False`` to write just the buffered rows, leaving hit
+        counts and eviction to the next full flush.
+        """
+        rows, self._cache_buffer = list(self._cache_buffer.values()), {}
+        hits: List[Tuple[int, str]] = []
+        outcomes: List[Tuple[str, str, int, int]] = []
+        if full:
+            hits = [(count, key) for key, count in self._cache_hit_counts.items()]
+            self._cache_hit_counts = {}
+            outcomes = [(*key, *counts) for key, counts in self._backend_outcome_deltas.items()]
+            self._backend_outcome_deltas = {}
+        if not rows and not hits and not outcomes:
+            return
+        try:
+            self._cache_db.execute("BEGIN")
+            # Upsert so that a re-cached result keeps the hits of the row it replaces
+            self._cache_db.executemany(
+                "INSERT INTO cache (filename, alias, status, cached_at, blob) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (filename) DO UPDATE SET "
+                "alias = excluded.alias, status = excluded.status, "
+                "cached_at = excluded.cached_at, blob = excluded.blob",
+                rows,
+            )
+            self._cache_db.executemany(
+                "UPDATE cache SET hit_count = hit_count + ? WHERE filename = ?", hits
+            )
+            self._cache_db.executemany(
+                "INSERT INTO backend_stats (backend, tag, found, total) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (backend, tag) DO UPDATE SET "
+                "found = found + excluded.found, total = total + excluded.total",
+                outcomes,
+            )
+            limit = config.search.max_cache_entries
+            if full and rows and limit > 0:
+                (count,) = self._cache_db.execute("SELECT COUNT(*) FROM cache").fetchone()
+                if count > limit:
+                    self._cache_db.execute(
+                        "DELETE FROM cache WHERE filename IN (SELECT filename FROM cache "
+                        "ORDER BY hit_count, cached_at LIMIT ?)",
+                        (count - limit,),
+                    )
+            self._cache_db.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self._cache_db.in_transaction:
+                self._cache_db.execute("ROLLBACK")
+            self.logger.warning(f"Failed to write {len(rows)} cached results: {e}")
+
     def clear_cache(self, filename: Optional[str] = None) -> None:
         """
         Clear search cache.
@@ -2689,27 +4258,95 @@ class ModelSearch:
         Args:
             filename: Specific filename to clear, or None for all
         """
-        if filename:
-            cache_file = self.cache_dir / f"{sanitize_filename(filename)}.json"
-            if cache_file.exists():
-                cache_file.unlink()
-        else:
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink()
+        with self._cache_lock:
+            if filename:
+                key = sanitize_filename(filename)
+                self._cache_buffer.pop(key, None)
+                self._cache_hit_counts.pop(key, None)
+                self._cache_db.execute("DELETE FROM cache WHERE filename = ?", (key,))
+                self._mem_cache.pop(key, None)
+            else:
+                self._cache_buffer.clear()
+                self._cache_hit_counts.clear()
+                self._cache_db.execute("DELETE FROM cache")
+                self._mem_cache.clear()
+
+    def clear_negative_cache(self) -> int:
+        """
+        Forget cached NOT_FOUND results so those models are searched again.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._cache_lock:
+            self._flush_cache_locked()
+            removed = self._cache_db.execute(
+                "DELETE FROM cache WHERE status = 'NOT_FOUND'"
+            ).rowcount
+            for key in [k for k, (_, r) in self._mem_cache.items() if r.status == "NOT_FOUND"]:
+                del self._mem_cache[key]
+        return removed
+
+    def close(self) -> None:
+        """Flush pending state, release backend resources and close the cache."""
+        self.flush_state()
+        self.flush_cache()
+        with self._backends_lock:
+            backends = list(self.backends.values())
+            pool, self._race_pool = self._race_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for backend in backends:
+            close = getattr(backend, "close", None)
+            if callable(close):
+                close()
+        with self._cache_lock:
+            self._cache_db.close()
 
     def get_search_stats(self) -> Dict[str, Any]:
-        """Get search statistics."""
-        cache_files = list(self.cache_dir.glob("*.json"))
+        """Get search statistics.
+
+        ``cache_hits`` counts every lookup answered from the cache, of which
+        ``cache_memory_hits`` came from the in-memory LRU without a query.
+        """
+        with self._cache_lock:
+            self._flush_cache_locked()
+            cached_results, negative_results = self._cache_db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(status = 'NOT_FOUND'), 0) FROM cache"
+            ).fetchone()
+            hits, memory_hits, misses = (
+                self._cache_hits,
+                self._cache_memory_hits,
+                self._cache_misses,
+            )
         return {
-            "cached_results": len(cache_files),
+            "cached_results": cached_results,
+            "negative_cached_results": negative_results,
+            "cache_hits": hits,
+            "cache_memory_hits": memory_hits,
+            "cache_misses": misses,
             "cache_dir": str(self.cache_dir),
-            "backends_available": list(self.backends.keys()),
+            "backends_available": list(self._backend_factories.keys()),
         }
 
+    def _get_backend(self, name: str) -> Optional[SearchBackend]:
+        """Return the named backend, constructing it on first use."""
+        backend = self.backends.get(name)
+        if backend is not None:
+            return backend
+        factory = self._backend_factories.get(name)
+        if factory is None:
+            return None
+        with self._backends_lock:
+            backend = self.backends.get(name)
+            if backend is None:
+                backend = self.backends[name] = factory()
+        return backend
+
     def _validate_backend_order(self):
         """Validate the configured backend order against available backends."""
         configured_order = config.search.backend_order
-        available_backends = set(self.backends.keys())
+        available_backends = set(self._backend_factories.keys())
 
         # Filter out invalid backends
         valid_order = [
@@ -2733,13 +4370,31 @@ class ModelSearch:
                 "No valid backends in configured order, falling back to all available backends"
             )
 
-        # Update the config with the validated order
+        # Update the config with the validated order; search_model iterates the
+        # resolved tuple, the config list is kept as a read-only mirror
         config.search.backend_order = valid_order
+        self._backend_order: Tuple[str, ...] = tuple(valid_order)
 
         self.logger.info(f"Using backend order: {valid_order}")
 
+    def reload_backends(self) -> None:
+        """Re-resolve the backend order after ``config.search.backend_order`` changes."""
+        self._validate_backend_order()
+
 
 # Convenience functions for backward compatibility
+@lru_cache(maxsize=8)
+def _convenience_civitai(logger) -> CivitaiSearch:
+    """CivitaiSearch reused by ``search_civitai`` calls passing the same logger."""
+    return CivitaiSearch(logger)
+
+
+@lru_cache(maxsize=8)
+def _convenience_qwen(temp_dir, logger) -> QwenSearch:
+    """QwenSearch (and its worker process) reused by ``search_with_qwen`` calls."""
+    return QwenSearch(temp_dir, logger=logger)
+
+
 def search_civitai(model, api_key=None, logger=None):
     """
     Convenience function for Civitai search (backward compatibility).
@@ -2752,8 +4407,7 @@ def search_civitai(model, api_key=None, logger=None):
     Returns:
         SearchResult object
     """
-    backend = CivitaiSearch(logger)
-    return backend.search(model)
+    return _convenience_civitai(logger).search(model)
 
 
 def search_with_qwen(model, temp_dir=None, logger=None):
@@ -2768,5 +4422,4 @@ def search_with_qwen(model, temp_dir=None, logger=None):
     Returns:
         SearchResult object
     """
-    backend = QwenSearch(temp_dir, logger)
-    return backend.search(model)
+    return _convenience_qwen(temp_dir, logger).search(model)
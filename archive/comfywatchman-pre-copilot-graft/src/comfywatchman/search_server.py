@@ -0,0 +1,180 @@
+"""
+Search server for ComfyFixerSmart
+
+Keeps one warm ModelSearch (caches, HTTP sessions, backend instances) alive
+across CLI runs and answers batch searches over a Unix socket.
+
+Functions:
+    serve: Serve searches from one warm ModelSearch over a Unix socket
+    search_models_via_server: Client for ``serve``
+"""
+
+import asyncio
+import errno
+import os
+import socket
+import stat
+import struct
+from typing import Any
+
+from .config import config
+from .search import ModelSearch, SearchResult, _json_dumps, _json_loads
+
+# Frame header for the search server protocol: payload length, big-endian
+_FRAME_HEADER = struct.Struct(">I")
+
+# Seconds a client waits to reach the server before searching in-process
+_CONNECT_TIMEOUT = 5.0
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Any:
+    """Read one length-prefixed JSON frame from ``reader``."""
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    (length,) = _FRAME_HEADER.unpack(header)
+    return _json_loads(await reader.readexactly(length))
+
+
+def _bind_socket(socket_path: str) -> socket.socket:
+    """Bind a listening Unix socket at ``socket_path``, readable by the owner only.
+
+    A socket file left behind by a crashed server is removed first. A path
+    that is not a socket, or a socket another server still listens on, is
+    left alone and reported as an error.
+    """
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(errno.EEXIST, "Not a socket", socket_path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                raise OSError(errno.EADDRINUSE, "Search server already running", socket_path)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(socket_path)
+        # Restrict before listening, so nobody else can connect in between
+        os.chmod(socket_path, 0o600)
+        sock.listen()
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+async def serve(socket_path: str, model_search: ModelSearch | None = None) -> None:
+    """
+    Serve search requests from one warm ModelSearch over a Unix socket.
+
+    Keeps caches, HTTP sessions and backend instances alive across CLI runs.
+    Each frame is a 4-byte big-endian length followed by a JSON object
+    ``{"models": [...], "backends": [...] | null, "use_cache": bool}``; the
+    reply is ``{"results": [...]}`` or ``{"error": "..."}``. Runs until
+    cancelled; the socket file is removed on the way out.
+
+    Args:
+        socket_path: Path of the Unix socket to listen on
+        model_search: Instance to serve from; created (and closed) here if None
+    """
+    owned = model_search is None
+    searcher = ModelSearch() if owned else model_search
+    logger = searcher.logger
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    # The batch path prefetches cache rows and searches repeats once
+                    results = await asyncio.to_thread(
+                        searcher.search_multiple_models,
+                        request["models"],
+                        backends=request.get("backends"),
+                        use_cache=request.get("use_cache", True),
+                    )
+                    reply: dict[str, Any] = {"results": [r.to_dict() for r in results]}
+                except Exception as e:
+                    logger.error(f"Search server request failed: {e}")
+                    reply = {"error": str(e)}
+                payload = _json_dumps(reply)
+                writer.write(_FRAME_HEADER.pack(len(payload)) + payload)
+                await writer.drain()
+        except Exception as e:
+            logger.warning(f"Search server connection dropped: {e}")
+        finally:
+            writer.close()
+
+    try:
+        server = await asyncio.start_unix_server(handle, sock=_bind_socket(socket_path))
+        logger.info(f"Search server listening on {socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            try:
+                os.unlink(socket_path)
+            except OSError:
+                pass
+    finally:
+        if owned:
+            searcher.close()
+
+
+def search_models_via_server(
+    socket_path: str,
+    models: list[dict[str, Any]],
+    backends: list[str] | None = None,
+    use_cache: bool = True,
+) -> list[SearchResult] | None:
+    """
+    Search for ``models`` through a running ``serve`` instance.
+
+    Connecting is given ``_CONNECT_TIMEOUT`` seconds and the reply
+    ``config.search.server_timeout``, so a wedged server cannot hang the caller.
+
+    Args:
+        socket_path: Path of the server's Unix socket
+        models: List of model info dictionaries
+        backends: List of backend names to try
+        use_cache: Whether to use cached results
+
+    Returns:
+        SearchResult objects in input order, or None if no server is reachable,
+        it times out, fails the request or sends a malformed reply (callers
+        then search in-process)
+    """
+    payload = _json_dumps({"models": models, "backends": backends, "use_cache": use_cache})
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(_CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+            sock.settimeout(max(config.search.server_timeout, 1))
+            sock.sendall(_FRAME_HEADER.pack(len(payload)) + payload)
+            with sock.makefile("rb") as stream:
+                header = stream.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    return None
+                (length,) = _FRAME_HEADER.unpack(header)
+                body = stream.read(length)
+                if len(body) < length:
+                    return None
+                reply = _json_loads(body)
+    except (OSError, ValueError):
+        return None
+
+    results = reply.get("results") if isinstance(reply, dict) else None
+    if not isinstance(results, list) or len(results) != len(models):
+        return None
+    try:
+        return [SearchResult(**item) for item in results]
+    except TypeError:
+        return None
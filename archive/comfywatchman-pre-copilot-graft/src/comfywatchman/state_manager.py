@@ -20,11 +20,17 @@ from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from .config import config
 from .logging import get_logger
 
+# orjson is an optional speedup for state file (de)serialization
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class DownloadStatus(Enum):
     """Enumeration of possible download statuses."""
@@ -35,7 +41,7 @@ class DownloadStatus(Enum):
     PENDING = "pending"
 
 
-@dataclass
+@dataclass(slots=True)
 class DownloadAttempt:
     """Represents a single download attempt."""
 
@@ -83,6 +89,17 @@ class AbstractStateManager(ABC):
     ):
         pass
 
+    def mark_downloads_attempted(
+        self,
+        attempts: Iterable[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]],
+    ):
+        """Record several ``(filename, model_info, civitai_info)`` attempts.
+
+        Backends that can persist in one write should override this.
+        """
+        for filename, model_info, civitai_info in attempts:
+            self.mark_download_attempted(filename, model_info, civitai_info)
+
     @abstractmethod
     def mark_download_success(
         self,
@@ -143,8 +160,9 @@ class JsonStateManager(AbstractStateManager):
             return StateData()
 
         try:
-            with open(self.state_file, encoding="utf-8") as f:
-                data = json.load(f)
+            with open(self.state_file, "rb") as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
             version = data.get("version", "1.0")
             if version != "2.0":
                 self._log(f"Migrating state from version {version} to 2.0")
@@ -195,8 +213,16 @@ class JsonStateManager(AbstractStateManager):
                 self._create_backup("auto")
             try:
                 data = asdict(self.state)
-                with open(self.state_file, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                if orjson is not None:
+                    # Same indented, non-ASCII-preserving layout as the stdlib path
+                    payload = orjson.dumps(
+                        data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                    )
+                    with open(self.state_file, "wb") as f:
+                        f.write(payload)
+                else:
+                    with open(self.state_file, "w", encoding="utf-8") as f:
+                        json.dump(data, f, indent=2, ensure_ascii=False)
                 self._log("State saved successfully")
             except Exception as e:
                 self._log(f"Error saving state: {e}")
@@ -225,14 +251,15 @@ class JsonStateManager(AbstractStateManager):
     @contextmanager
     def transaction(self):
         """Context manager for atomic state operations."""
-        original_state = self._dict_to_state_data(asdict(self.state))
-        try:
-            yield
-            self._save_state()
-        except Exception as e:
-            self.state = original_state
-            self._log(f"Transaction failed, state restored: {e}")
-            raise
+        with self.lock:
+            original_state = self._dict_to_state_data(asdict(self.state))
+            try:
+                yield
+                self._save_state()
+            except Exception as e:
+                self.state = original_state
+                self._log(f"Transaction failed, state restored: {e}")
+                raise
 
     def mark_download_attempted(
         self,
@@ -242,24 +269,45 @@ class JsonStateManager(AbstractStateManager):
     ):
         """Mark that a download was attempted."""
         with self.transaction():
-            attempt = DownloadAttempt(
-                timestamp=datetime.now().isoformat(),
-                filename=filename,
-                status=DownloadStatus.ATTEMPTED.value,
-                model_type=model_info.get("type"),
-                node_type=model_info.get("node_type"),
-            )
-            if civitai_info:
-                attempt.civitai_id = civitai_info.get("civitai_id")
-                attempt.civitai_name = civitai_info.get("civitai_name")
-                attempt.version_id = civitai_info.get("version_id")
-                attempt.download_url = civitai_info.get("download_url")
-
-            self.state.history.append(attempt)
-            if filename not in self.state.downloads:
-                self.state.downloads[filename] = []
-            self.state.downloads[filename].append(attempt)
-            self._log(f"Marked download attempted: {filename}")
+            self._record_attempt(filename, model_info, civitai_info)
+
+    def mark_downloads_attempted(
+        self,
+        attempts: Iterable[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]],
+    ):
+        """Mark several download attempts with a single state save."""
+        attempts = list(attempts)
+        if not attempts:
+            return
+        with self.transaction():
+            for filename, model_info, civitai_info in attempts:
+                self._record_attempt(filename, model_info, civitai_info)
+
+    def _record_attempt(
+        self,
+        filename: str,
+        model_info: Dict[str, Any],
+        civitai_info: Optional[Dict[str, Any]],
+    ):
+        """Append an attempt to the in-memory state (caller saves)."""
+        attempt = DownloadAttempt(
+            timestamp=datetime.now().isoformat(),
+            filename=filename,
+            status=DownloadStatus.ATTEMPTED.value,
+            model_type=model_info.get("type"),
+            node_type=model_info.get("node_type"),
+        )
+        if civitai_info:
+            attempt.civitai_id = civitai_info.get("civitai_id")
+            attempt.civitai_name = civitai_info.get("civitai_name")
+            attempt.version_id = civitai_info.get("version_id")
+            attempt.download_url = civitai_info.get("download_url")
+
+        self.state.history.append(attempt)
+        if filename not in self.state.downloads:
+            self.state.downloads[filename] = []
+        self.state.downloads[filename].append(attempt)
+        self._log(f"Marked download attempted: {filename}")
 
     def mark_download_success(
         self,
@@ -13,6 +13,7 @@ import hashlib
 import json
 import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Union
 from urllib.parse import urlparse
@@ -579,6 +580,55 @@ def validate_and_sanitize_filename(filename) -> tuple[bool, str, Optional[str]]:
     if not isinstance(filename, str):
         return False, "", "Empty or non-string filename"
 
+    return _validate_and_sanitize_str(filename)
+
+
+# Control characters (ASCII 0-31, excluding TAB=9, LF=10, CR=13) plus DEL
+_CONTROL_CHARS = frozenset(chr(i) for i in range(32) if i not in (9, 10, 13)) | {"\x7f"}
+
+# Invalid filesystem characters, each replaced by "_" in sanitized filenames
+_INVALID_FILENAME_CHARS = str.maketrans(dict.fromkeys('<>:"/\\|?*', "_"))
+
+# URL schemes that mark a "filename" as a pasted link
+_URL_SCHEME_RE = re.compile(r"https?://|ftp://|file://", re.IGNORECASE)
+
+# Parent-directory segments with either separator
+_PATH_TRAVERSAL_RE = re.compile(r"\.\./|\.\.\\")
+
+# Executable/script extensions that must not appear in the middle of a filename
+_SUSPICIOUS_EXTENSIONS = frozenset(
+    {
+        "exe",
+        "bat",
+        "cmd",
+        "com",
+        "scr",
+        "pif",
+        "vbs",
+        "js",
+        "jar",
+        "php",
+        "asp",
+        "jsp",
+        "sh",
+        "ps1",
+        "dll",
+    }
+)
+
+# Shell metacharacter sequences rejected in filenames
+_COMMAND_INJECTION_PATTERNS = ("$(", "`", ";", "|", "&", "!", "&&", "||")
+
+# HTML/script injection patterns; the matching source is reported in the error
+_HTML_INJECTION_RES = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (r"<script", r"</script>", r"javascript:", r"on\w+\s*=", r"<\w+>")
+)
+
+
+@lru_cache(maxsize=4096)
+def _validate_and_sanitize_str(filename: str) -> tuple[bool, str, Optional[str]]:
+    """Memoized core of validate_and_sanitize_filename for string inputs."""
     if not filename:
         return False, "", "Empty or non-string filename"
 
@@ -587,30 +637,19 @@ def validate_and_sanitize_filename(filename) -> tuple[bool, str, Optional[str]]:
         return False, "", f"Filename too long ({len(filename)} characters, max 500)"
 
     # Pattern 1: URL Detection (check first before path traversal)
-    url_patterns = [
-        r"https?://",  # http:// or https://
-        r"ftp://",  # ftp://
-        r"file://",  # file://
-    ]
-
-    for pattern in url_patterns:
-        if re.search(pattern, filename, re.IGNORECASE):
-            return False, "", "URL pattern detected"
+    if _URL_SCHEME_RE.search(filename):
+        return False, "", "URL pattern detected"
 
     # Pattern 2: Newline characters
-    if any(char in filename for char in ["\n", "\r", "\r\n"]):
+    if "\n" in filename or "\r" in filename:
         return False, "", "Newline characters detected in filename"
 
     # Pattern 3: Path traversal attempts
-    traversal_patterns = [r"\.\./", r"\.\.\\"]
-    for pattern in traversal_patterns:
-        if re.search(pattern, filename):
-            return False, "", "Path traversal pattern detected"
-
-    # Pattern 4: Control characters (ASCII 0-31, excluding TAB=9, LF=10, CR=13)
-    control_chars = set(chr(i) for i in range(32) if i not in [9, 10, 13])
-    control_chars.add("\x7f")  # DEL character
-    if any(char in filename for char in control_chars):
+    if _PATH_TRAVERSAL_RE.search(filename):
+        return False, "", "Path traversal pattern detected"
+
+    # Pattern 4: Control characters
+    if not _CONTROL_CHARS.isdisjoint(filename):
         return False, "", "Control characters detected in filename"
 
     # Pattern 5: Suspicious file extensions (before sanitization)
@@ -622,23 +661,7 @@ def validate_and_sanitize_filename(filename) -> tuple[bool, str, Optional[str]]:
             # If more than 2 parts, check if any middle part looks like an extension
             for i in range(1, len(parts) - 1):
                 part = parts[i].lower()
-                if part in [
-                    "exe",
-                    "bat",
-                    "cmd",
-                    "com",
-                    "scr",
-                    "pif",
-                    "vbs",
-                    "js",
-                    "jar",
-                    "php",
-                    "asp",
-                    "jsp",
-                    "sh",
-                    "ps1",
-                    "dll",
-                ]:
+                if part in _SUSPICIOUS_EXTENSIONS:
                     return (
                         False,
                         "",
@@ -665,23 +688,16 @@ def validate_and_sanitize_filename(filename) -> tuple[bool, str, Optional[str]]:
         return False, "", "Null bytes detected in filename"
 
     # Pattern 8: Potential command injection patterns
-    command_patterns = ["$(", "`", ";", "|", "&", "!", "&&", "||"]
-    if any(pattern in filename for pattern in command_patterns):
+    if any(pattern in filename for pattern in _COMMAND_INJECTION_PATTERNS):
         return False, "", f"Potential command injection pattern detected"
 
     # Pattern 9: HTML/script injection patterns
-    html_patterns = [r"<script", r"</script>", r"javascript:", r"on\w+\s*=", r"<\w+>"]
-    for pattern in html_patterns:
-        if re.search(pattern, filename, re.IGNORECASE):
-            return False, "", f"HTML/script injection pattern detected: {pattern}"
-
-    # Sanitize valid filename
-    sanitized = filename
+    for pattern in _HTML_INJECTION_RES:
+        if pattern.search(filename):
+            return False, "", f"HTML/script injection pattern detected: {pattern.pattern}"
 
-    # Replace invalid filesystem characters
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        sanitized = sanitized.replace(char, "_")
+    # Sanitize valid filename: replace invalid filesystem characters
+    sanitized = filename.translate(_INVALID_FILENAME_CHARS)
 
     # Remove leading/trailing whitespace and dots
     sanitized = sanitized.strip(" .")
@@ -707,9 +723,8 @@ def sanitize_filename(filename: str) -> str:
     if not isinstance(filename, str):
         return "unnamed_file"
 
-    # Use the enhanced validation but always return the sanitized result
-    is_valid, sanitized, _ = validate_and_sanitize_filename(filename)
-    return sanitized
+    # Use the memoized validation core but always return the sanitized result
+    return _validate_and_sanitize_str(filename)[1]
 
 
 def get_relative_path(
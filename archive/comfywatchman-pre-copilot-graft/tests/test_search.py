@@ -0,0 +1,2317 @@
+"""
+Unit tests for ModelSearch (search.py).
+
+Backends are never contacted here: tests exercise the cache layer and the
+coordinator logic with stub backends swapped in for the real ones.
+"""
+import os
+
+import pytest
+
+
+def SearchResult(*args, **kwargs):
+    from comfywatchman.search import SearchResult as _SearchResult
+
+    return _SearchResult(*args, **kwargs)
+
+
+@pytest.fixture
+def model_search(tmp_path, monkeypatch):
+    """ModelSearch with an isolated cache directory and a dummy Civitai key."""
+    from comfywatchman.config import config
+    from comfywatchman.search import ModelSearch
+
+    monkeypatch.setattr(config.search, "civitai_api_key", "test-key")
+    return ModelSearch(cache_dir=str(tmp_path))
+
+
+class StubBackend:
+    """Backend double that returns FOUND for names in ``known`` and records calls."""
+
+    def __init__(self, name, known=(), delay=0.0, miss_status="NOT_FOUND"):
+        self.name = name
+        self.known = set(known)
+        self.delay = delay
+        self.miss_status = miss_status
+        self.calls = []
+
+    def get_name(self):
+        return self.name
+
+    def search(self, model_info):
+        import time
+
+        filename = model_info["filename"]
+        self.calls.append(filename)
+        time.sleep(self.delay)
+        if filename in self.known:
+            result = _found(filename)
+            result.source = self.name
+            return result
+        return SearchResult(status=self.miss_status, filename=filename, source=self.name)
+
+
+def _install_backends(model_search, *backends):
+    """Replace the real backends with stubs."""
+    import threading
+
+    model_search._backend_factories = {b.name: (lambda b=b: b) for b in backends}
+    model_search.backends = {}
+    model_search._backend_semaphores = {
+        b.name: threading.BoundedSemaphore(2) for b in backends
+    }
+
+
+def _found(filename="model.safetensors"):
+    return SearchResult(
+        status="FOUND",
+        filename=filename,
+        source="civitai",
+        civitai_id=1,
+        version_id=2,
+        download_url="https://civitai.com/api/download/models/2",
+        metadata={"search_attempts": 1},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Test: search result cache
+# ---------------------------------------------------------------------------
+
+class TestSearchCache:
+    def test_cache_miss_returns_none(self, model_search):
+        """Uncached filenames return None."""
+        assert model_search._get_cached_result("missing.safetensors") is None
+
+    def test_cache_round_trip(self, model_search):
+        """A cached result is returned unchanged apart from the cached flag."""
+        result = _found()
+        model_search._cache_result(result)
+        cached = model_search._get_cached_result("model.safetensors")
+        assert cached.metadata.pop("cached") is True
+        assert cached == result
+
+    def test_cache_round_trip_without_orjson(self, model_search, monkeypatch):
+        """The stdlib json fallback reads and writes the same cache format."""
+        import comfywatchman.search as search_module
+
+        monkeypatch.setattr(search_module, "orjson", None)
+        result = _found()
+        model_search._cache_result(result)
+        model_search._mem_cache.clear()
+        cached = model_search._get_cached_result("model.safetensors")
+        assert cached.metadata.pop("cached") is True
+        assert cached == result
+
+    def test_cache_is_persistent(self, model_search, tmp_path):
+        """A second ModelSearch over the same directory sees earlier entries."""
+        from comfywatchman.search import ModelSearch
+
+        model_search._cache_result(_found())
+        model_search.flush_cache()
+        other = ModelSearch(cache_dir=str(tmp_path))
+        assert other._get_cached_result("model.safetensors") is not None
+
+    def test_cache_writes_are_buffered_until_flushed(self, model_search, tmp_path):
+        """Rows reach the database on flush_cache(), but lookups see them at once."""
+        from comfywatchman.search import ModelSearch
+
+        model_search._mem_cache_size = 0
+        model_search._cache_result(_found())
+        other = ModelSearch(cache_dir=str(tmp_path))
+        assert other._get_cached_result("model.safetensors") is None
+        assert model_search._get_cached_result("model.safetensors") is not None
+        assert other._get_cached_result("model.safetensors") is not None
+
+    def test_search_model_flushes_cache_writes(self, model_search, tmp_path):
+        from comfywatchman.search import ModelSearch
+
+        _install_backends(model_search, StubBackend("civitai", known={"model.safetensors"}))
+        model_search.search_model({"filename": "model.safetensors"}, backends=["civitai"])
+        other = ModelSearch(cache_dir=str(tmp_path))
+        assert other._get_cached_result("model.safetensors") is not None
+
+    def test_disabled_cache_is_neither_read_nor_written(self, model_search, monkeypatch):
+        from comfywatchman.config import config
+
+        stub = StubBackend("civitai", known={"model.safetensors"})
+        _install_backends(model_search, stub)
+        monkeypatch.setattr(config.search, "enable_cache", False)
+        models = [{"filename": "model.safetensors"}, {"filename": "ghost.safetensors"}]
+
+        model_search.search_multiple_models(models, backends=["civitai"])
+        model_search.search_model(models[0], backends=["civitai"])
+
+        assert sorted(stub.calls) == [
+            "ghost.safetensors",
+            "model.safetensors",
+            "model.safetensors",
+        ]
+        assert model_search.get_search_stats()["cached_results"] == 0
+
+    def test_legacy_json_files_are_imported(self, tmp_path, monkeypatch):
+        """Per-file JSON entries from the old cache layout move into SQLite."""
+        import json
+        from dataclasses import asdict
+
+        from comfywatchman.config import config
+        from comfywatchman.search import ModelSearch
+
+        legacy_dir = tmp_path / "search_cache"
+        legacy_dir.mkdir()
+        (legacy_dir / "model.safetensors.json").write_text(json.dumps(asdict(_found())))
+        (legacy_dir / "broken.json").write_text("{not json")
+        monkeypatch.setattr(config.search, "civitai_api_key", "test-key")
+
+        search = ModelSearch(cache_dir=str(tmp_path))
+
+        cached = search._get_cached_result("model.safetensors")
+        assert cached.metadata.pop("cached") is True
+        assert cached == _found()
+        assert not list(legacy_dir.glob("*.json"))
+
+    def test_stats_count_entries(self, model_search):
+        """get_search_stats reports the number of cached results."""
+        model_search._cache_result(_found("a.safetensors"))
+        model_search._cache_result(_found("b.safetensors"))
+        model_search._cache_result(_found("a.safetensors"))
+        assert model_search.get_search_stats()["cached_results"] == 2
+
+    def test_found_entries_expire_after_ttl(self, model_search, monkeypatch):
+        import comfywatchman.search as search_module
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "cache_ttl", 60)
+        model_search._cache_result(_found())
+        now = search_module.time.time()
+        monkeypatch.setattr(search_module.time, "time", lambda: now + 61)
+
+        assert model_search._get_cached_result("model.safetensors") is None
+        assert not model_search._mem_cache
+
+    def test_expired_rows_are_not_decoded(self, model_search, monkeypatch):
+        import comfywatchman.search as search_module
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "cache_ttl", 60)
+        model_search._cache_result(_found())
+        model_search._mem_cache.clear()
+        now = search_module.time.time()
+        monkeypatch.setattr(search_module.time, "time", lambda: now + 61)
+        monkeypatch.setattr(search_module, "_json_loads", lambda data: pytest.fail("decoded"))
+
+        assert model_search._get_cached_result("model.safetensors") is None
+
+    def test_zero_ttl_keeps_found_entries(self, model_search, monkeypatch):
+        import comfywatchman.search as search_module
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "cache_ttl", 0)
+        model_search._cache_result(_found())
+        now = search_module.time.time()
+        monkeypatch.setattr(search_module.time, "time", lambda: now + 10**9)
+
+        assert model_search._get_cached_result("model.safetensors") is not None
+
+    def test_memory_hit_skips_database(self, model_search):
+        """Repeat lookups are served from the in-memory LRU."""
+        model_search._cache_result(_found())
+        model_search._cache_db.execute("DELETE FROM cache")
+        assert model_search._get_cached_result("model.safetensors") is not None
+
+    def test_mutating_results_leaves_the_cache_intact(self, model_search):
+        result = _found()
+        result.metadata["files"] = ["a"]
+        model_search._cache_result(result)
+        result.metadata["download_status"] = "done"
+        result.metadata["files"].append("b")
+
+        hit = model_search._get_cached_result("model.safetensors")
+        hit.metadata["download_status"] = "failed"
+        hit.metadata["files"].append("c")
+
+        again = model_search._get_cached_result("model.safetensors")
+        assert "download_status" not in again.metadata
+        assert again.metadata["files"] == ["a"]
+
+    def test_stats_count_hits_and_misses(self, model_search):
+        model_search._get_cached_result("model.safetensors")
+        model_search._cache_result(_found())
+        model_search._get_cached_result("model.safetensors")
+        model_search._mem_cache.clear()
+        model_search._get_cached_result("model.safetensors")
+
+        stats = model_search.get_search_stats()
+        assert (stats["cache_hits"], stats["cache_memory_hits"], stats["cache_misses"]) == (
+            2,
+            1,
+            1,
+        )
+
+    def test_hit_counts_survive_re_caching(self, model_search):
+        model_search._cache_result(_found())
+        model_search._get_cached_result("model.safetensors")
+        model_search._get_cached_result("model.safetensors")
+        model_search.flush_cache()
+        model_search._cache_result(_found())
+        model_search.flush_cache()
+
+        (hits,) = model_search._cache_db.execute("SELECT hit_count FROM cache").fetchone()
+        assert hits == 2
+
+    def test_eviction_drops_least_used_entries(self, model_search, monkeypatch):
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "max_cache_entries", 2)
+        model_search._cache_result(_found("used.safetensors"))
+        model_search._cache_result(_found("old.safetensors"))
+        model_search._get_cached_result("used.safetensors")
+        model_search.flush_cache()
+        model_search._cache_result(_found("new.safetensors"))
+        model_search.flush_cache()
+
+        rows = model_search._cache_db.execute("SELECT filename FROM cache").fetchall()
+        assert {name for (name,) in rows} == {"used.safetensors", "new.safetensors"}
+
+    def test_alias_shares_entry_across_case_and_separators(self, model_search):
+        model_search._cache_result(_found("Foo_V1.safetensors"))
+
+        cached = model_search._get_cached_result("foo-v1.safetensors")
+
+        assert cached.status == "FOUND"
+        assert cached.filename == "foo-v1.safetensors"
+        assert cached.metadata["cache_alias_of"] == "Foo_V1.safetensors"
+        assert "foo-v1.safetensors" not in model_search._mem_cache
+
+    def test_alias_keeps_the_extension(self, model_search):
+        model_search._cache_result(_found("foo_v1.ckpt"))
+
+        assert model_search._get_cached_result("foo_v1.safetensors") is None
+
+    def test_alias_keeps_separated_versions_apart(self, model_search):
+        model_search._cache_result(_found("model-v1.5.safetensors"))
+        model_search._cache_result(_found("sd_xl_base.safetensors"))
+
+        assert model_search._get_cached_result("model_v15.safetensors") is None
+        assert model_search._get_cached_result("sdxl_base.safetensors") is None
+        assert model_search._get_cached_result("Model_V1_5.safetensors") is not None
+        assert model_search._get_cached_results(
+            ["model_v15.safetensors", "sdxl_base.safetensors"]
+        ) == {}
+
+    def test_not_found_is_not_served_for_an_alias(self, model_search):
+        model_search._cache_result(
+            SearchResult(status="NOT_FOUND", filename="Foo-V1.safetensors")
+        )
+
+        assert model_search._get_cached_result("foo_v1.safetensors") is None
+        assert model_search._get_cached_results(["foo_v1.safetensors"]) == {}
+
+    def test_own_entry_wins_over_alias(self, model_search):
+        model_search._cache_result(_found("foo_v1.safetensors"))
+        model_search._cache_result(
+            SearchResult(status="NOT_FOUND", filename="Foo-V1.safetensors")
+        )
+        model_search._mem_cache.clear()
+
+        cached = model_search._get_cached_result("foo_v1.safetensors")
+
+        assert cached.status == "FOUND"
+        assert "cache_alias_of" not in cached.metadata
+
+    def test_warmup_preloads_cache_and_backends(self, model_search):
+        warmed = []
+        stub = StubBackend("civitai")
+        stub.warmup = lambda: warmed.append("civitai")
+        _install_backends(model_search, stub)
+        model_search._backend_order = ("civitai",)
+        model_search._cache_result(_found("a.safetensors"))
+        model_search._cache_result(_found("b.safetensors"))
+        model_search._mem_cache.clear()
+
+        model_search._warmup()
+
+        assert list(model_search._mem_cache) == ["a.safetensors", "b.safetensors"]
+        assert warmed == ["civitai"]
+
+        model_search._cache_db.close()
+        model_search._warmup()  # failures are logged, not raised
+
+    def test_bulk_lookup_matches_single_lookups(self, model_search):
+        model_search._cache_result(_found("a.safetensors"))
+        model_search._cache_result(_found("Foo_V1.safetensors"))
+        model_search._mem_cache.clear()
+        names = ["a.safetensors", "foo-v1.safetensors", "missing.safetensors", "a.safetensors"]
+
+        bulk = model_search._get_cached_results(names)
+
+        assert set(bulk) == {"a.safetensors", "foo-v1.safetensors"}
+        for name, result in bulk.items():
+            assert result == model_search._get_cached_result(name)
+
+    def test_batch_search_reads_cache_in_one_query(self, model_search):
+        stub = StubBackend("civitai")
+        _install_backends(model_search, stub)
+        for name in ("a.safetensors", "b.safetensors", "c.safetensors"):
+            model_search._cache_result(_found(name))
+        model_search._mem_cache.clear()
+        queries = []
+        model_search._cache_db.set_trace_callback(queries.append)
+
+        results = model_search.search_multiple_models(
+            [{"filename": n} for n in ("a.safetensors", "b.safetensors", "a.safetensors")],
+            backends=["civitai"],
+        )
+
+        assert [r.status for r in results] == ["FOUND"] * 3
+        assert results[0] is not results[2]
+        assert len([q for q in queries if q.startswith("SELECT")]) == 1
+        assert stub.calls == []
+
+    def test_memory_cache_size_comes_from_config(self, tmp_path, monkeypatch):
+        """search.memory_cache_size = 0 keeps nothing in RAM."""
+        from comfywatchman.config import config
+        from comfywatchman.search import ModelSearch
+
+        monkeypatch.setattr(config.search, "civitai_api_key", "test-key")
+        monkeypatch.setattr(config.search, "memory_cache_size", 0)
+        search = ModelSearch(cache_dir=str(tmp_path))
+        search._cache_result(_found())
+
+        assert not search._mem_cache
+        assert search._get_cached_result("model.safetensors") is not None
+
+    def test_memory_cache_is_bounded(self, model_search):
+        """The least recently used entry is evicted past the size cap."""
+        model_search._mem_cache_size = 2
+        model_search._cache_result(_found("a.safetensors"))
+        model_search._cache_result(_found("b.safetensors"))
+        model_search._get_cached_result("a.safetensors")
+        model_search._cache_result(_found("c.safetensors"))
+        assert list(model_search._mem_cache) == ["a.safetensors", "c.safetensors"]
+
+    def test_metadata_of_returned_result_is_a_copy(self, model_search):
+        """Callers may edit a cached result's metadata without touching the cache."""
+        model_search._cache_result(_found())
+        model_search._get_cached_result("model.safetensors").metadata["note"] = "x"
+        assert "note" not in model_search._get_cached_result("model.safetensors").metadata
+
+    def test_returned_result_is_a_copy(self, model_search):
+        """Mutating a cached result does not alter the cache entry."""
+        model_search._cache_result(_found())
+        model_search._get_cached_result("model.safetensors").status = "ERROR"
+        assert model_search._get_cached_result("model.safetensors").status == "FOUND"
+
+    def test_clear_single_entry(self, model_search):
+        """clear_cache(filename) only removes that entry."""
+        model_search._cache_result(_found("a.safetensors"))
+        model_search._cache_result(_found("b.safetensors"))
+        model_search.clear_cache("a.safetensors")
+        assert model_search._get_cached_result("a.safetensors") is None
+        assert model_search._get_cached_result("b.safetensors") is not None
+
+    def test_clear_all(self, model_search):
+        """clear_cache() empties the cache."""
+        model_search._cache_result(_found("a.safetensors"))
+        model_search._cache_result(_found("b.safetensors"))
+        model_search.clear_cache()
+        assert model_search.get_search_stats()["cached_results"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Test: search_multiple_models
+# ---------------------------------------------------------------------------
+
+class TestSearchMultipleModels:
+    def test_results_preserve_input_order(self, model_search):
+        """Results come back in the same order as the requested models."""
+        stub = StubBackend("civitai", known={"b.safetensors"})
+        _install_backends(model_search, stub)
+        models = [{"filename": f"{name}.safetensors"} for name in "abcdef"]
+
+        results = model_search.search_multiple_models(
+            models, backends=["civitai"], use_cache=False
+        )
+
+        assert [r.filename for r in results] == [m["filename"] for m in models]
+        assert results[1].status == "FOUND"
+        assert all(r.status == "NOT_FOUND" for i, r in enumerate(results) if i != 1)
+
+    def test_every_model_is_searched(self, model_search):
+        """Each model reaches the backend exactly once."""
+        stub = StubBackend("civitai")
+        _install_backends(model_search, stub)
+        models = [{"filename": f"m{i}.safetensors"} for i in range(10)]
+
+        model_search.search_multiple_models(models, backends=["civitai"], use_cache=False)
+
+        assert sorted(stub.calls) == sorted(m["filename"] for m in models)
+
+    def test_default_order_is_resolved_once(self, model_search, monkeypatch):
+        """search_model uses the order resolved at construction until reload_backends."""
+        from comfywatchman.config import config
+
+        civitai = StubBackend("civitai")
+        qwen = StubBackend("qwen")
+        _install_backends(model_search, qwen, civitai)
+        monkeypatch.setattr(config.search, "backend_order", ["qwen", "civitai"])
+        model_search._backend_order = ("civitai",)
+
+        model_search.search_model({"filename": "x.safetensors"}, use_cache=False)
+        assert qwen.calls == []
+
+        model_search.reload_backends()
+        model_search.search_model({"filename": "y.safetensors"}, use_cache=False)
+        assert qwen.calls == ["y.safetensors"]
+
+    def test_async_batch_preserves_order_and_bounds_concurrency(
+        self, model_search, monkeypatch
+    ):
+        """The asyncio entry point keeps input order and honours max_parallel_searches."""
+        import asyncio
+        import threading
+
+        from comfywatchman.config import config
+
+        # Below the stub's per-backend semaphore of 2, so the cap seen is ours
+        monkeypatch.setattr(config.search, "max_parallel_searches", 1)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        class CountingBackend(StubBackend):
+            def search(self, model_info):
+                with lock:
+                    in_flight.append(1)
+                    peak.append(len(in_flight))
+                try:
+                    return super().search(model_info)
+                finally:
+                    with lock:
+                        in_flight.pop()
+
+        backend = CountingBackend("civitai", known={"c.safetensors"}, delay=0.05)
+        _install_backends(model_search, backend)
+        models = [{"filename": f"{name}.safetensors"} for name in "abcdef"]
+
+        results = asyncio.run(
+            model_search.search_multiple_models_async(
+                models, backends=["civitai"], use_cache=False
+            )
+        )
+
+        assert [r.filename for r in results] == [m["filename"] for m in models]
+        assert results[2].status == "FOUND"
+        assert max(peak) == 1
+
+    def test_backend_override_leaves_config_untouched(self, model_search):
+        """An explicit backend list is used without rewriting the global order."""
+        from comfywatchman.config import config
+
+        civitai = StubBackend("civitai")
+        qwen = StubBackend("qwen")
+        _install_backends(model_search, qwen, civitai)
+        before = list(config.search.backend_order)
+
+        model_search.search_multiple_models(
+            [{"filename": "x.safetensors"}], backends=["civitai"], use_cache=False
+        )
+
+        assert config.search.backend_order == before
+        assert civitai.calls == ["x.safetensors"]
+        assert qwen.calls == []
+
+    def test_cache_hits_bypass_thread_pool(self, model_search, monkeypatch):
+        """Only models that need a backend are handed to the pool."""
+        import comfywatchman.search as search_module
+
+        stub = StubBackend("civitai", known={"c.safetensors"})
+        _install_backends(model_search, stub)
+        model_search._cache_result(_found("a.safetensors"))
+        model_search._cache_result(_found("b.safetensors"))
+        monkeypatch.setattr(
+            search_module, "ThreadPoolExecutor", lambda **kw: pytest.fail("pool used")
+        )
+        models = [{"filename": name} for name in ("a.safetensors", "../x", "b.safetensors")]
+
+        results = model_search.search_multiple_models(models, backends=["civitai"])
+
+        assert [r.status for r in results] == ["FOUND", "INVALID_FILENAME", "FOUND"]
+        assert stub.calls == []
+
+    def test_repeated_filename_is_searched_once(self, model_search):
+        stub = StubBackend("civitai", known={"base.safetensors"})
+        _install_backends(model_search, stub)
+        models = [{"filename": "base.safetensors"}, {"filename": "base.safetensors"}]
+
+        first, second = model_search.search_multiple_models(
+            models, backends=["civitai"], use_cache=False
+        )
+
+        assert stub.calls == ["base.safetensors"]
+        assert first.status == second.status == "FOUND"
+        assert first is not second and first.metadata is not second.metadata
+
+    def test_concurrent_searches_share_one_backend_call(self, model_search):
+        """search_model calls racing on the same filename coalesce."""
+        import threading
+
+        stub = StubBackend("civitai", known={"base.safetensors"}, delay=0.2)
+        _install_backends(model_search, stub)
+        results = []
+
+        def search():
+            results.append(
+                model_search.search_model(
+                    {"filename": "base.safetensors"}, use_cache=False, backends=["civitai"]
+                )
+            )
+
+        threads = [threading.Thread(target=search) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert stub.calls == ["base.safetensors"]
+        assert [r.status for r in results] == ["FOUND"] * 3
+        assert not model_search._inflight
+
+
+class TestSearchServer:
+    def test_client_uses_warm_server(self, model_search, tmp_path):
+        """Requests over the socket are answered by the served instance and its cache."""
+        import asyncio
+
+        from comfywatchman.search_server import search_models_via_server, serve
+
+        stub = StubBackend("civitai", known={"model.safetensors"})
+        _install_backends(model_search, stub)
+        socket_path = str(tmp_path / "search.sock")
+        models = [{"filename": "model.safetensors"}, {"filename": "ghost.safetensors"}]
+
+        async def scenario():
+            server = asyncio.create_task(serve(socket_path, model_search))
+            while not os.path.exists(socket_path):
+                await asyncio.sleep(0.01)
+            first = await asyncio.to_thread(
+                search_models_via_server, socket_path, models, ["civitai"]
+            )
+            second = await asyncio.to_thread(
+                search_models_via_server, socket_path, models[:1], ["civitai"]
+            )
+            server.cancel()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        assert [r.status for r in first] == ["FOUND", "NOT_FOUND"]
+        assert second[0].metadata["cached"] is True
+        assert sorted(stub.calls) == ["ghost.safetensors", "model.safetensors"]
+        assert not os.path.exists(socket_path)
+
+    def test_server_answers_through_the_batch_path(self, model_search, tmp_path, monkeypatch):
+        """One cache prefetch per request, and repeated filenames are searched once."""
+        import asyncio
+
+        from comfywatchman.search_server import search_models_via_server, serve
+
+        stub = StubBackend("civitai", known={"model.safetensors"})
+        _install_backends(model_search, stub)
+        prefetches = []
+        get_cached_results = model_search._get_cached_results
+        monkeypatch.setattr(
+            model_search,
+            "_get_cached_results",
+            lambda filenames: prefetches.append(filenames) or get_cached_results(filenames),
+        )
+        socket_path = str(tmp_path / "search.sock")
+        models = [{"filename": "model.safetensors"}] * 3 + [{"filename": "ghost.safetensors"}]
+
+        async def scenario():
+            server = asyncio.create_task(serve(socket_path, model_search))
+            while not os.path.exists(socket_path):
+                await asyncio.sleep(0.01)
+            results = await asyncio.to_thread(
+                search_models_via_server, socket_path, models, ["civitai"]
+            )
+            server.cancel()
+            return results
+
+        results = asyncio.run(scenario())
+
+        assert [r.status for r in results] == ["FOUND"] * 3 + ["NOT_FOUND"]
+        assert len(prefetches) == 1
+        assert sorted(stub.calls) == ["ghost.safetensors", "model.safetensors"]
+
+    def test_core_records_attempts_for_server_searches(self, model_search, tmp_path, monkeypatch):
+        """The server searches without the core's state manager, so the core records them."""
+        import asyncio
+        from datetime import datetime
+
+        from comfywatchman.config import config
+        from comfywatchman.core import ComfyFixerCore, WorkflowRun
+        from comfywatchman.search_server import serve
+        from comfywatchman.state_manager import JsonStateManager
+
+        stub = StubBackend("civitai", known={"model.safetensors"})
+        _install_backends(model_search, stub)
+        socket_path = str(tmp_path / "search.sock")
+        monkeypatch.setattr(config.search, "server_socket", socket_path)
+        state_manager = JsonStateManager(tmp_path / "state")
+        # Only the search step runs, so skip the scanner/inventory/download setup
+        core = ComfyFixerCore.__new__(ComfyFixerCore)
+        core.logger = model_search.logger
+        core.state_manager = state_manager
+        core.search = model_search
+        core.current_run = WorkflowRun(run_id="test", start_time=datetime.now())
+        models = [{"filename": "model.safetensors"}, {"filename": "ghost.safetensors"}]
+
+        async def scenario():
+            server = asyncio.create_task(serve(socket_path, model_search))
+            while not os.path.exists(socket_path):
+                await asyncio.sleep(0.01)
+            results = await asyncio.to_thread(core._search_missing_models, models, ["civitai"])
+            server.cancel()
+            return results
+
+        results = asyncio.run(scenario())
+
+        assert [r.status for r in results] == ["FOUND", "NOT_FOUND"]
+        assert sorted(stub.calls) == ["ghost.safetensors", "model.safetensors"]
+        assert state_manager.get_download_status("model.safetensors") == "attempted"
+        assert state_manager.was_recently_attempted("ghost.safetensors", hours=1)
+
+    def test_stale_socket_is_replaced_with_private_one(self, model_search, tmp_path):
+        import asyncio
+        import socket
+        import stat
+
+        from comfywatchman.search_server import serve
+
+        socket_path = str(tmp_path / "search.sock")
+        # A crashed server leaves its socket file behind
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+
+        async def scenario():
+            server = asyncio.create_task(serve(socket_path, model_search))
+            for _ in range(500):
+                if os.path.exists(socket_path) and os.stat(socket_path).st_mode & 0o777 == 0o600:
+                    break
+                await asyncio.sleep(0.01)
+            mode = os.stat(socket_path).st_mode
+            server.cancel()
+            return mode
+
+        mode = asyncio.run(scenario())
+
+        assert stat.S_ISSOCK(mode)
+        assert mode & 0o777 == 0o600
+        assert not os.path.exists(socket_path)
+
+    def test_client_gives_up_on_wedged_server(self, tmp_path, monkeypatch):
+        import socket
+        import time
+
+        from comfywatchman.config import config
+        from comfywatchman.search_server import search_models_via_server
+
+        monkeypatch.setattr(config.search, "server_timeout", 1)
+        socket_path = str(tmp_path / "wedged.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wedged:
+            wedged.bind(socket_path)
+            wedged.listen()
+            started = time.monotonic()
+
+            result = search_models_via_server(socket_path, [{"filename": "m.safetensors"}])
+
+        assert result is None
+        assert time.monotonic() - started < 5
+
+    def test_client_rejects_malformed_reply(self, tmp_path):
+        import socket
+        import threading
+
+        from comfywatchman.search_server import _FRAME_HEADER, search_models_via_server
+
+        socket_path = str(tmp_path / "odd.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(socket_path)
+        listener.listen()
+
+        def reply_once():
+            conn, _ = listener.accept()
+            with conn:
+                conn.recv(65536)
+                payload = b'{"results": [{"bogus": 1}]}'
+                conn.sendall(_FRAME_HEADER.pack(len(payload)) + payload)
+
+        thread = threading.Thread(target=reply_once)
+        thread.start()
+        try:
+            result = search_models_via_server(socket_path, [{"filename": "m.safetensors"}])
+        finally:
+            thread.join(5)
+            listener.close()
+
+        assert result is None
+
+    def test_client_without_server_returns_none(self, tmp_path):
+        from comfywatchman.search_server import search_models_via_server
+
+        models = [{"filename": "model.safetensors"}]
+
+        assert search_models_via_server(str(tmp_path / "missing.sock"), models) is None
+
+
+# ---------------------------------------------------------------------------
+# Test: HuggingFaceSearch file matching
+# ---------------------------------------------------------------------------
+
+class TestHuggingFaceFileMatching:
+    @pytest.fixture
+    def hf(self):
+        from comfywatchman.search import HuggingFaceSearch
+
+        return HuggingFaceSearch()
+
+    def test_exact_base_name_matches(self, hf):
+        assert hf._is_matching_model_file("SAM_vit_b.pth", "sam_vit_b")
+
+    def test_containment_requires_model_extension(self, hf):
+        assert hf._is_matching_model_file("sam_vit_b_01ec64.pth", "sam_vit_b")
+        assert not hf._is_matching_model_file("sam_vit_b_notes.txt", "sam_vit_b")
+
+    def test_unrelated_file_does_not_match(self, hf):
+        assert not hf._is_matching_model_file("rife49.pth", "sam_vit_b")
+
+    def test_select_best_file_prefers_exact_name(self, hf):
+        files = [
+            ("big/sam_vit_b_full.pth", 900, "sam_vit_b_full.pth"),
+            ("sam_vit_b.safetensors", 100, "sam_vit_b.safetensors"),
+        ]
+        assert hf._select_best_file(files, "SAM_vit_b") == files[1]
+
+    def test_select_best_file_falls_back_to_largest(self, hf):
+        files = [
+            ("a/sam_vit_b_small.pth", 10, "sam_vit_b_small.pth"),
+            ("b/sam_vit_b_large.pth", 500, "sam_vit_b_large.pth"),
+        ]
+        assert hf._select_best_file(files, "sam_vit_b") == files[1]
+
+
+# ---------------------------------------------------------------------------
+# Test: state manager batching
+# ---------------------------------------------------------------------------
+
+class RecordingStateManager:
+    """State manager double that records each batch it is asked to write."""
+
+    def __init__(self):
+        self.batches = []
+        self.infos = {}
+
+    def mark_downloads_attempted(self, attempts):
+        attempts = list(attempts)
+        self.batches.append([filename for filename, _, _ in attempts])
+        self.infos.update((filename, info) for filename, _, info in attempts)
+
+
+class TestStateBatching:
+    def test_single_search_flushes_immediately(self, model_search):
+        state = RecordingStateManager()
+        model_search.state_manager = state
+        _install_backends(model_search, StubBackend("civitai"))
+
+        model_search.search_model(
+            {"filename": "a.safetensors"}, use_cache=False, backends=["civitai"]
+        )
+
+        assert state.batches == [["a.safetensors"]]
+
+    def test_batch_search_writes_once(self, model_search):
+        state = RecordingStateManager()
+        model_search.state_manager = state
+        _install_backends(model_search, StubBackend("civitai"))
+        models = [{"filename": f"{name}.safetensors"} for name in "abcde"]
+
+        model_search.search_multiple_models(models, backends=["civitai"], use_cache=False)
+
+        assert len(state.batches) == 1
+        assert sorted(state.batches[0]) == sorted(m["filename"] for m in models)
+
+    def test_found_attempt_gets_unaliased_copy(self, model_search):
+        """The state manager receives the cached payload, not the live result."""
+        state = RecordingStateManager()
+        model_search.state_manager = state
+        _install_backends(model_search, StubBackend("civitai", known={"a.safetensors"}))
+
+        result = model_search.search_model({"filename": "a.safetensors"}, backends=["civitai"])
+        result.metadata["mutated"] = True
+
+        info = state.infos["a.safetensors"]
+        assert info["status"] == "FOUND"
+        assert info["civitai_id"] == result.civitai_id
+        assert "mutated" not in info["metadata"]
+
+    def test_buffer_flushes_at_threshold(self, model_search, monkeypatch):
+        import comfywatchman.search as search_module
+
+        monkeypatch.setattr(search_module, "_STATE_FLUSH_THRESHOLD", 2)
+        monkeypatch.setattr(search_module.config.search, "max_parallel_searches", 1)
+        state = RecordingStateManager()
+        model_search.state_manager = state
+        _install_backends(model_search, StubBackend("civitai"))
+        models = [{"filename": f"{name}.safetensors"} for name in "abcde"]
+
+        model_search.search_multiple_models(models, backends=["civitai"], use_cache=False)
+
+        assert [len(batch) for batch in state.batches] == [2, 2, 1]
+
+    def test_json_state_manager_saves_batch_once(self, tmp_path, monkeypatch):
+        from comfywatchman.state_manager import JsonStateManager
+
+        manager = JsonStateManager(tmp_path / "state")
+        saves = []
+        real_save = manager._save_state
+        monkeypatch.setattr(manager, "_save_state", lambda: saves.append(1) or real_save())
+
+        manager.mark_downloads_attempted(
+            [("a.safetensors", {"type": "loras"}, None), ("b.safetensors", {}, {"civitai_id": 3})]
+        )
+
+        assert len(saves) == 1
+        assert [a.filename for a in manager.state.history] == ["a.safetensors", "b.safetensors"]
+        assert manager.state.downloads["b.safetensors"][0].civitai_id == 3
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_state_file_round_trip(self, tmp_path, monkeypatch, use_orjson):
+        """State saved with either JSON codec reloads identically."""
+        import comfywatchman.state_manager as state_module
+        from comfywatchman.state_manager import JsonStateManager
+
+        if not use_orjson:
+            monkeypatch.setattr(state_module, "orjson", None)
+        manager = JsonStateManager(tmp_path / "state")
+        manager.mark_download_attempted("é.safetensors", {"type": "loras"}, None)
+
+        reloaded = JsonStateManager(tmp_path / "state")
+
+        assert reloaded.state.history == manager.state.history
+        assert "é" in manager.state_file.read_text(encoding="utf-8")
+
+    def test_download_attempt_is_slotted(self):
+        """History entries accumulate per search, so they carry no __dict__."""
+        from comfywatchman.state_manager import DownloadAttempt
+
+        attempt = DownloadAttempt(timestamp="t", filename="f", status="attempted")
+        assert not hasattr(attempt, "__dict__")
+
+
+# ---------------------------------------------------------------------------
+# Test: invalid filenames
+# ---------------------------------------------------------------------------
+
+class TestInvalidFilename:
+    @pytest.mark.parametrize(
+        "filename",
+        ["", "../../etc/passwd", "https://example.com/model.pt", "a\nb.pt", "notes.txt"],
+    )
+    def test_rejected_before_backends(self, model_search, filename):
+        stub = StubBackend("civitai")
+        _install_backends(model_search, stub)
+
+        result = model_search.search_model({"filename": filename}, backends=["civitai"])
+
+        assert result.status == "INVALID_FILENAME"
+        assert result.error_message
+        assert stub.calls == []
+        assert model_search.get_search_stats()["cached_results"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Test: negative-result cache
+# ---------------------------------------------------------------------------
+
+class TestNegativeCache:
+    def test_not_found_is_cached(self, model_search):
+        """A NOT_FOUND outcome is served from cache on the next search."""
+        stub = StubBackend("civitai")
+        _install_backends(model_search, stub)
+        model = {"filename": "ghost.safetensors"}
+
+        first = model_search.search_model(model, backends=["civitai"])
+        second = model_search.search_model(model, backends=["civitai"])
+
+        assert first.status == second.status == "NOT_FOUND"
+        assert stub.calls == ["ghost.safetensors"]
+        assert model_search.get_search_stats()["negative_cached_results"] == 1
+
+    def test_not_found_expires_after_ttl(self, model_search, monkeypatch):
+        """Expired NOT_FOUND entries are ignored and the backends are retried."""
+        import comfywatchman.search as search_module
+        from comfywatchman.config import config
+
+        stub = StubBackend("civitai")
+        _install_backends(model_search, stub)
+        monkeypatch.setattr(config.search, "negative_cache_ttl", 60)
+        model = {"filename": "ghost.safetensors"}
+
+        model_search.search_model(model, backends=["civitai"])
+        now = search_module.time.time()
+        monkeypatch.setattr(search_module.time, "time", lambda: now + 61)
+        model_search.search_model(model, backends=["civitai"])
+
+        assert stub.calls == ["ghost.safetensors", "ghost.safetensors"]
+
+    def test_zero_ttl_disables_negative_cache(self, model_search, monkeypatch):
+        """negative_cache_ttl = 0 turns the negative cache off."""
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "negative_cache_ttl", 0)
+        stub = StubBackend("civitai")
+        _install_backends(model_search, stub)
+
+        model_search.search_model({"filename": "ghost.safetensors"}, backends=["civitai"])
+
+        assert model_search.get_search_stats()["cached_results"] == 0
+
+    def test_found_entries_do_not_expire_with_negative_ttl(self, model_search, monkeypatch):
+        """FOUND entries are unaffected by the negative-cache TTL."""
+        import comfywatchman.search as search_module
+
+        model_search._cache_result(_found())
+        now = search_module.time.time()
+        monkeypatch.setattr(search_module.time, "time", lambda: now + 10_000)
+
+        assert model_search._get_cached_result("model.safetensors") is not None
+
+    def test_clear_negative_cache_keeps_found_entries(self, model_search):
+        stub = StubBackend("civitai")
+        _install_backends(model_search, stub)
+        model_search._cache_result(_found())
+        model_search.search_model({"filename": "ghost.safetensors"}, backends=["civitai"])
+
+        assert model_search.clear_negative_cache() == 1
+
+        assert model_search._get_cached_result("model.safetensors") is not None
+        model_search.search_model({"filename": "ghost.safetensors"}, backends=["civitai"])
+        assert stub.calls == ["ghost.safetensors", "ghost.safetensors"]
+
+
+# ---------------------------------------------------------------------------
+# Test: lazy backend construction
+# ---------------------------------------------------------------------------
+
+class TestLazyBackends:
+    def test_no_backend_constructed_at_init(self, model_search):
+        """ModelSearch() registers backends without instantiating them."""
+        assert model_search.backends == {}
+        assert {"qwen", "civitai", "huggingface"} <= set(
+            model_search.get_search_stats()["backends_available"]
+        )
+
+    def test_backend_constructed_once_on_first_use(self, model_search):
+        """_get_backend builds a backend on demand and reuses the instance."""
+        first = model_search._get_backend("huggingface")
+        assert first is model_search._get_backend("huggingface")
+        assert list(model_search.backends) == ["huggingface"]
+
+    def test_unknown_backend_returns_none(self, model_search):
+        assert model_search._get_backend("nope") is None
+
+    def test_disabled_modelscope_is_never_imported(self, tmp_path, monkeypatch):
+        import comfywatchman.search as search_module
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(search_module, "MODELSCOPE_AVAILABLE", True)
+        monkeypatch.setattr(config.copilot, "enable_modelscope", False)
+        monkeypatch.setattr(
+            search_module, "_load_modelscope_search", lambda: pytest.fail("imported")
+        )
+
+        search = search_module.ModelSearch(cache_dir=str(tmp_path))
+        assert "modelscope" not in search._backend_factories
+
+    def test_enabled_modelscope_registers_loaded_class(self, tmp_path, monkeypatch):
+        import comfywatchman.search as search_module
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(search_module, "MODELSCOPE_AVAILABLE", True)
+        monkeypatch.setattr(config.copilot, "enable_modelscope", True)
+        monkeypatch.setattr(
+            search_module, "_load_modelscope_search", lambda: lambda logger: "backend"
+        )
+
+        search = search_module.ModelSearch(cache_dir=str(tmp_path))
+        assert search._backend_factories["modelscope"]() == "backend"
+
+
+# ---------------------------------------------------------------------------
+# Test: QwenSearch result cache
+# ---------------------------------------------------------------------------
+
+class TestQwenCache:
+    @pytest.fixture
+    def qwen(self, tmp_path):
+        from comfywatchman.search import QwenSearch
+
+        return QwenSearch(temp_dir=str(tmp_path / "tmp"), cache_dir=str(tmp_path / "qwen"))
+
+    def test_store_and_load(self, qwen):
+        payload = {"status": "FOUND", "source": "civitai", "civitai_id": 5, "version_id": 6}
+        qwen._store_cached_result("model.safetensors", payload)
+
+        result = qwen._load_cached_result("model.safetensors")
+
+        assert result.status == "FOUND"
+        assert result.civitai_id == 5
+        assert result.metadata["cached"] is True
+
+    def test_store_leaves_no_temporary_files(self, qwen):
+        import os
+
+        qwen._store_cached_result("model.safetensors", {"status": "NOT_FOUND"})
+        qwen._store_cached_result("model.safetensors", {"status": "NOT_FOUND"})
+
+        assert os.listdir(qwen.cache_dir) == [qwen._cache_file_name("model.safetensors")]
+
+    def test_missing_entry_returns_none(self, qwen):
+        assert qwen._load_cached_result("nothing.safetensors") is None
+
+    def test_key_covers_all_prompt_inputs(self, qwen):
+        """Entries are shared only when filename, model type and node type all match."""
+        qwen._store_cached_result("m.safetensors", {"status": "NOT_FOUND"}, "loras", "LoraLoader")
+
+        assert qwen._load_cached_result("m.safetensors", "loras", "LoraLoader") is not None
+        assert qwen._load_cached_result("m.safetensors", "checkpoints", "LoraLoader") is None
+        assert qwen._load_cached_result("m.safetensors", "loras", "") is None
+
+    def test_reads_legacy_pretty_printed_entries(self, qwen):
+        """Cache files written by the old indented json.dump still load."""
+        import json
+
+        path = qwen._cache_file_path("model.safetensors")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"cached_at": 0, "result": {"status": "NOT_FOUND"}}, fh, indent=2)
+        qwen._cache_index = None
+
+        assert qwen._load_cached_result("model.safetensors").status == "NOT_FOUND"
+
+    def test_expired_entry_is_removed(self, qwen, monkeypatch):
+        import os
+
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "qwen_cache_ttl", 10)
+        qwen._store_cached_result("model.safetensors", {"status": "NOT_FOUND"})
+        path = qwen._cache_file_path("model.safetensors")
+        os.utime(path, (0, 0))
+
+        assert qwen._load_cached_result("model.safetensors") is None
+        assert not os.path.exists(path)
+
+    def test_directory_is_scanned_once(self, qwen, monkeypatch):
+        """Lookups after the first reuse the scandir snapshot."""
+        import os
+
+        qwen._store_cached_result("a.safetensors", {"status": "NOT_FOUND"})
+        scans = []
+        real_scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda p: scans.append(p) or real_scandir(p))
+        qwen._cache_index = None
+
+        qwen._load_cached_result("a.safetensors")
+        qwen._load_cached_result("b.safetensors")
+        qwen._load_cached_result("c.safetensors")
+
+        assert len(scans) == 1
+
+    def test_store_updates_snapshot(self, qwen):
+        """Entries written after the snapshot are visible to later lookups."""
+        assert qwen._load_cached_result("late.safetensors") is None
+        qwen._store_cached_result("late.safetensors", {"status": "NOT_FOUND"})
+        assert qwen._load_cached_result("late.safetensors") is not None
+
+
+# ---------------------------------------------------------------------------
+# Test: parallel backend race
+# ---------------------------------------------------------------------------
+
+class TestParallelBackends:
+    @pytest.fixture(autouse=True)
+    def enable_race(self, monkeypatch):
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "parallel_backends", True)
+
+    def test_first_found_wins(self, model_search):
+        """A fast lower-priority FOUND beats a slow higher-priority backend."""
+        slow = StubBackend("qwen", known={"m.safetensors"}, delay=0.5)
+        fast = StubBackend("civitai", known={"m.safetensors"})
+        _install_backends(model_search, slow, fast)
+
+        result = model_search.search_model(
+            {"filename": "m.safetensors"}, use_cache=False, backends=["qwen", "civitai"]
+        )
+
+        assert result.status == "FOUND"
+        assert result.source == "civitai"
+
+    def test_losers_write_nothing_after_the_race_returns(self, model_search):
+        """A backend still running when the winner arrives has its result discarded."""
+        slow = StubBackend("qwen", known={"m.safetensors"}, delay=0.3)
+        fast = StubBackend("civitai", known={"m.safetensors"})
+        _install_backends(model_search, slow, fast)
+
+        result = model_search.search_model(
+            {"filename": "m.safetensors"}, backends=["qwen", "civitai"]
+        )
+        model_search._race_pool.shutdown(wait=True)
+
+        assert result.source == "civitai"
+        assert not model_search._cache_buffer
+        assert set(model_search._backend_outcomes) == {("civitai", "other")}
+
+    def test_races_share_one_pool(self, model_search):
+        _install_backends(model_search, StubBackend("qwen"), StubBackend("civitai"))
+
+        model_search.search_model({"filename": "a.safetensors"}, use_cache=False)
+        pool = model_search._race_pool
+        model_search.search_model({"filename": "b.safetensors"}, use_cache=False)
+
+        assert pool is not None
+        assert model_search._race_pool is pool
+
+    def test_error_from_higher_priority_backend_wins_without_found(self, model_search):
+        """With no FOUND, the highest-priority terminal result is returned."""
+        first = StubBackend("qwen", miss_status="ERROR", delay=0.1)
+        second = StubBackend("civitai", miss_status="INVALID_FILENAME")
+        _install_backends(model_search, first, second)
+
+        result = model_search.search_model(
+            {"filename": "m.safetensors"}, use_cache=False, backends=["qwen", "civitai"]
+        )
+
+        assert result.status == "ERROR"
+        assert result.source == "qwen"
+
+    def test_all_not_found(self, model_search):
+        _install_backends(model_search, StubBackend("qwen"), StubBackend("civitai"))
+
+        result = model_search.search_model(
+            {"filename": "m.safetensors"}, use_cache=False, backends=["qwen", "civitai"]
+        )
+
+        assert result.status == "NOT_FOUND"
+        assert result.metadata["backends_tried"] == ["qwen", "civitai"]
+
+
+class TestAdaptiveBackendOrder:
+    @pytest.fixture(autouse=True)
+    def enable_adaptive(self, monkeypatch):
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "adaptive_backend_order", True)
+
+    def _record(self, model_search, backend, filename, found, times):
+        for _ in range(times):
+            model_search._record_backend_outcome(backend, {"filename": filename}, found)
+
+    def test_backend_that_finds_the_tag_goes_first(self, model_search):
+        qwen = StubBackend("qwen", known={"style_lora.safetensors", "base.safetensors"})
+        civitai = StubBackend("civitai", known={"style_lora.safetensors", "base.safetensors"})
+        _install_backends(model_search, qwen, civitai)
+        model_search._backend_order = ("qwen", "civitai")
+        self._record(model_search, "qwen", "a_lora.safetensors", False, 20)
+        self._record(model_search, "civitai", "b_lora.safetensors", True, 20)
+
+        lora = model_search.search_model({"filename": "style_lora.safetensors"}, use_cache=False)
+        base = model_search.search_model({"filename": "base.safetensors"}, use_cache=False)
+
+        assert lora.source == "civitai"
+        assert base.source == "qwen"
+        assert qwen.calls == ["base.safetensors"]
+
+    def test_configured_order_until_every_backend_has_samples(self, model_search):
+        model_search._backend_order = ("qwen", "civitai")
+        self._record(model_search, "qwen", "a_lora.safetensors", False, 20)
+        self._record(model_search, "civitai", "b_lora.safetensors", True, 19)
+
+        order = model_search._learned_backend_order({"filename": "c_lora.safetensors"})
+
+        assert order == ("qwen", "civitai")
+
+    def test_outcomes_persist_across_instances(self, model_search, tmp_path):
+        from comfywatchman.search import ModelSearch
+
+        self._record(model_search, "civitai", "a_lora.safetensors", True, 3)
+        model_search.flush_cache()
+        self._record(model_search, "civitai", "a_lora.safetensors", False, 1)
+        model_search.flush_cache()
+
+        other = ModelSearch(cache_dir=str(tmp_path))
+        assert other._backend_outcomes[("civitai", "loras")] == [3, 4]
+
+
+class TestSearchResult:
+    def test_is_slotted(self):
+        """SearchResult instances carry no per-instance __dict__."""
+        result = _found()
+        assert not hasattr(result, "__dict__")
+        with pytest.raises(AttributeError):
+            result.not_a_field = 1
+
+    def test_to_dict_matches_asdict(self):
+        from dataclasses import asdict
+
+        result = _found()
+        assert result.to_dict() == asdict(result)
+        assert result.to_dict()["metadata"] is result.metadata
+
+    def test_result_bytes_decode_the_same_with_and_without_orjson(self, monkeypatch):
+        import json
+
+        import comfywatchman.search as search_module
+
+        result = _found()
+        encoded = search_module._result_bytes(result)
+        monkeypatch.setattr(search_module, "orjson", None)
+        assert json.loads(search_module._result_bytes(result)) == json.loads(encoded)
+        assert json.loads(encoded) == result.to_dict()
+
+
+# ---------------------------------------------------------------------------
+# Test: CivitaiSearch query preparation and matching helpers
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def civitai(monkeypatch):
+    from comfywatchman.config import config
+    from comfywatchman.search import CivitaiSearch, _CivitaiSupervisor
+
+    monkeypatch.setattr(config.search, "civitai_api_key", "test-key")
+    # A private supervisor keeps caches and pools from leaking between tests
+    supervisor = _CivitaiSupervisor()
+    yield CivitaiSearch(supervisor=supervisor)
+    supervisor.close()
+
+
+class TestCivitaiHelpers:
+    def test_prepare_query_strips_extension_and_delimiters(self, civitai):
+        assert civitai._prepare_search_query("detail_tweaker_xl.safetensors") == (
+            "detail tweaker xl"
+        )
+
+    def test_prepare_query_uses_basename(self, civitai):
+        assert civitai._prepare_search_query("loras\\sub/My_Lora.PT") == "My Lora"
+
+    @pytest.mark.parametrize(
+        "name, expected",
+        [
+            ("model.safetensors", "model.safetensors"),
+            ("loras\\sub/My_Lora.PT", "My_Lora.PT"),
+            ("a//b\\\\c.ckpt", "c.ckpt"),
+            ("dir/", ""),
+        ],
+    )
+    def test_normalize_filename_returns_basename(self, civitai, name, expected):
+        assert civitai._normalize_filename(name) == expected
+
+    def test_filename_matches_ignores_version_noise(self, civitai):
+        assert civitai._filename_matches("cool-model_v2.safetensors", "coolmodel.ckpt")
+        assert not civitai._filename_matches("other.safetensors", "coolmodel.ckpt")
+
+    def test_prepare_query_keeps_unknown_extension_text(self, civitai):
+        """Only recognised model extensions are stripped before tokenizing."""
+        assert civitai._prepare_search_query("my.model.zip") == "my model zip"
+        assert civitai._prepare_search_query("my.model.onnx") == "my model"
+
+    def test_nsfw_param_search_scores_similarity(self, civitai, monkeypatch):
+        """Files are matched by name similarity, not by sharing the first query word."""
+        files = [
+            "Detail_Tweaker_XL_v2.safetensors",
+            "detail_unrelated.safetensors",
+            "DETAIL-TWEAKER-XL.ckpt",
+        ]
+        items = [
+            {"id": i, "modelVersions": [{"id": 10 + i, "files": [{"name": name}]}]}
+            for i, name in enumerate(files)
+        ]
+        monkeypatch.setattr(civitai, "_get_json", lambda path, params=None: {"items": items})
+
+        results = civitai._search_with_nsfw_param(
+            {"filename": "detail_tweaker_xl.safetensors"}, nsfw=True
+        )
+
+        assert [r.civitai_id for r in results] == [0, 2]
+        assert all(r.confidence == "fuzzy" for r in results)
+
+    _SIMILARITY_PAIRS = [
+        ("detail tweaker xl", "detail tweaker xl"),
+        ("detail tweaker xl", "xl detail tweaker"),
+        ("detail tweaker xl v2", "detail tweaker xl"),
+        ("detail tweaker xl", "detail unrelated"),
+        ("pony realism", "realistic vision"),
+        ("add detail", "detail slider lora"),
+        ("epic realism", "epicrealism natural sin"),
+        ("", "detail"),
+    ]
+
+    @pytest.mark.parametrize("a, b", _SIMILARITY_PAIRS)
+    def test_name_similarity_fallback_tracks_rapidfuzz(self, a, b, monkeypatch):
+        """Both paths score token sets, so they land on the same side of the threshold."""
+        from comfywatchman import search
+
+        if search._rapidfuzz is None:
+            pytest.skip("rapidfuzz not installed")
+        expected = search._name_similarity(a, b)
+        monkeypatch.setattr(search, "_rapidfuzz", None)
+        fallback = search._name_similarity(a, b)
+
+        assert fallback == pytest.approx(expected, abs=10)
+        assert (fallback >= search._FUZZY_MATCH_THRESHOLD) == (
+            expected >= search._FUZZY_MATCH_THRESHOLD
+        )
+
+    def test_name_similarity_fallback_ignores_token_order(self, monkeypatch):
+        from comfywatchman import search
+
+        monkeypatch.setattr(search, "_rapidfuzz", None)
+
+        assert search._name_similarity("xl detail tweaker", "detail tweaker xl") == 100
+        assert search._name_similarity("detail tweaker xl v2", "detail tweaker xl") == 100
+        assert search._name_similarity("", "detail") == 0
+        assert search._name_similarity("detail tweaker xl", "detail unrelated") < 80
+
+    def test_extract_tags_known_terms_first_without_duplicates(self, civitai):
+        tags = civitai._extract_tags_from_query("Pony detail XL detail eyes glasses hd")
+
+        assert tags == ["detail", "eyes", "hd", "pony", "glasses"]
+
+    def test_type_filter_mapping(self, civitai):
+        assert civitai._get_type_filter("loras") == "LORA"
+        assert civitai._get_type_filter("unet") == "Checkpoint"
+        assert civitai._get_type_filter("custom_nodes") is None
+
+    def test_infer_model_type_from_data(self, civitai):
+        assert civitai._infer_model_type_from_data({"type": "Upscaler"}) == "upscale_models"
+        assert civitai._infer_model_type_from_data({}) == "unknown"
+
+
+class TestTagSearch:
+    @staticmethod
+    def _item(model_id, *names):
+        return {
+            "id": model_id,
+            "modelVersions": [{"id": model_id * 10, "files": [{"name": n} for n in names]}],
+        }
+
+    def test_longest_tags_first_capped_and_deduplicated(self, civitai, monkeypatch):
+        tags = []
+        shared = self._item(1, "other.safetensors")
+
+        def get_json(path, params=None):
+            tags.append(params["tag"])
+            return {"items": [shared, self._item(len(tags) + 1, "x.safetensors")]}
+
+        monkeypatch.setattr(civitai, "_get_json", get_json)
+
+        results = civitai._search_by_tags(
+            {"filename": "aa_bbbb_cccccc_dddddddd_eeeee_fffffff_ggg.safetensors"}
+        )
+
+        assert tags == ["dddddddd", "fffffff", "cccccc", "eeeee", "bbbb"]
+        assert [r.civitai_id for r in results].count(1) == 1
+        assert len(results) == 6
+
+    def test_stops_at_exact_filename(self, civitai, monkeypatch):
+        tags = []
+
+        def get_json(path, params=None):
+            tags.append(params["tag"])
+            return {"items": [self._item(7, "other.ckpt", "Pony_Detail.safetensors")]}
+
+        monkeypatch.setattr(civitai, "_get_json", get_json)
+
+        results = civitai._search_by_tags({"filename": "loras/pony_detail.safetensors"})
+
+        assert tags == ["detail"]
+        assert len(results) == 1
+        assert results[0].confidence == "exact"
+        assert results[0].metadata["tag_source"] == "detail"
+
+
+class TestNsfwLevelSearch:
+    def test_each_level_is_queried_and_recorded(self, civitai, monkeypatch):
+        requests_made = []
+        item = {
+            "id": 3,
+            "nsfwLevel": 4,
+            "modelVersions": [{"id": 30, "files": [{"name": "pony.safetensors"}]}],
+        }
+
+        def get_json(path, params=None):
+            requests_made.append(params)
+            return {"items": [item]}
+
+        monkeypatch.setattr(civitai, "_get_json", get_json)
+
+        results = civitai._search_by_nsfw_levels(
+            {"filename": "pony.safetensors", "type": "loras"}
+        )
+
+        assert sorted(p["nsfwLevel"] for p in requests_made) == [2, 4, 8, 16]
+        assert all(p["types"] == "LORA" for p in requests_made)
+        assert [r.metadata["target_nsfw_level"] for r in results] == [2, 4, 8, 16]
+        assert all(r.metadata["actual_nsfw_level"] == 4 for r in results)
+
+    def test_levels_are_queried_concurrently(self, civitai, monkeypatch):
+        """All four level requests must be in flight at once to pass the barrier."""
+        import threading
+
+        barrier = threading.Barrier(4, timeout=5)
+        item = {"id": 3, "modelVersions": [{"id": 30, "files": [{"name": "pony.safetensors"}]}]}
+
+        def get_json(path, params=None):
+            barrier.wait()
+            return {"items": [item]}
+
+        monkeypatch.setattr(civitai, "_get_json", get_json)
+
+        results = civitai._search_by_nsfw_levels({"filename": "pony.safetensors"})
+
+        assert len(results) == 4
+
+
+class TestMultiStrategy:
+    @pytest.fixture
+    def strategies(self, civitai, monkeypatch):
+        """Stub every strategy; query searches sleep so overlap is measurable."""
+        import time
+
+        class _NoDirectID:
+            def lookup_by_name(self, name):
+                return None
+
+        def tagged(key, value, delay=0.0):
+            def strategy(model_ref, **kwargs):
+                time.sleep(delay)
+                result = _found(model_ref["filename"])
+                result.confidence = "fuzzy"
+                result.metadata = {key: value}
+                return [result]
+
+            return strategy
+
+        monkeypatch.setattr(civitai, "_get_direct_backend", lambda: _NoDirectID())
+        monkeypatch.setattr(
+            civitai, "_search_nsfw_multi_level", lambda model_ref, **kwargs: []
+        )
+        monkeypatch.setattr(civitai, "_search_with_nsfw_param", tagged("nsfw", True, 0.3))
+        monkeypatch.setattr(civitai, "_search_by_tags", tagged("tag_source", "detail"))
+        monkeypatch.setattr(civitai, "_search_by_creator", tagged("creator_search", "bob"))
+
+    def test_fallback_strategies_run_concurrently(self, civitai, strategies):
+        import time
+
+        start = time.monotonic()
+        results = civitai.search_multi_strategy(
+            {"filename": "m.safetensors", "creator": "bob"}
+        )
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.55  # two 0.3s query searches overlapped
+        assert [r.metadata for r in results] == [
+            {"creator_search": "bob"},
+            {"tag_source": "detail"},
+            {"nsfw": True},
+            {"nsfw": True},
+        ]
+
+    def test_async_cascade_matches_sync(self, civitai, strategies):
+        import asyncio
+
+        model_ref = {"filename": "m.safetensors", "creator": "bob"}
+
+        results = asyncio.run(civitai.asearch_multi_strategy(model_ref))
+
+        assert [r.metadata for r in results] == [
+            r.metadata for r in civitai.search_multi_strategy(model_ref)
+        ]
+
+    def test_creator_strategy_needs_creator(self, civitai, strategies):
+        results = civitai.search_multi_strategy({"filename": "m.safetensors"})
+
+        assert all("creator_search" not in r.metadata for r in results)
+        assert len(results) == 3
+
+    def test_strategies_share_one_search_target(self, civitai, monkeypatch):
+        class _NoDirectID:
+            def lookup_by_name(self, name):
+                return None
+
+        prepared = []
+        prepare = civitai._prepare_search_query
+        monkeypatch.setattr(civitai, "_get_direct_backend", lambda: _NoDirectID())
+        monkeypatch.setattr(
+            civitai, "_prepare_search_query", lambda name: prepared.append(name) or prepare(name)
+        )
+        monkeypatch.setattr(civitai, "_get_json", lambda path, params=None: {"items": []})
+
+        civitai.search_multi_strategy(
+            {"filename": "loras/pony_detail.safetensors", "type": "loras", "creator": "bob"}
+        )
+
+        assert prepared == ["loras/pony_detail.safetensors"]
+
+
+class TestCivitaiSession:
+    def test_session_carries_auth_header(self, civitai):
+        assert civitai._session.headers["Authorization"] == "Bearer test-key"
+
+    def test_model_search_close_releases_backends(self, model_search, monkeypatch):
+        """ModelSearch.close() flushes state and closes constructed backends."""
+        import sqlite3
+
+        backend = StubBackend("civitai")
+        closed = []
+        backend.close = lambda: closed.append(True)
+        _install_backends(model_search, backend)
+        model_search._get_backend("civitai")
+        state = RecordingStateManager()
+        model_search.state_manager = state
+        model_search._state_buffer.append(("a.safetensors", {}, None))
+
+        model_search.close()
+
+        assert closed == [True]
+        assert state.batches == [["a.safetensors"]]
+        with pytest.raises(sqlite3.ProgrammingError):
+            model_search.get_search_stats()
+
+    def test_get_uses_shared_session(self, civitai, monkeypatch):
+        """_get routes through the pooled session with the configured timeout."""
+        from comfywatchman.config import config
+
+        calls = []
+        monkeypatch.setattr(
+            civitai._session, "get", lambda url, **kw: calls.append((url, kw)) or "resp"
+        )
+
+        assert civitai._get("/models", params={"query": "x"}) == "resp"
+        assert calls == [
+            (
+                "https://civitai.com/api/v1/models",
+                {"params": {"query": "x"}, "timeout": config.civitai_api_timeout},
+            )
+        ]
+
+    def test_retry_backoff_has_floor_and_cap(self, civitai):
+        from comfywatchman.search import _CivitaiRetry
+
+        retry = civitai._session.get_adapter("https://civitai.com/api/v1").max_retries
+        assert isinstance(retry, _CivitaiRetry)
+        assert 429 in retry.status_forcelist
+        assert retry.get_backoff_time() >= 1.0
+
+        for _ in range(4):
+            retry = retry.increment(method="GET", url="/models")
+        assert 1.0 <= retry.get_backoff_time() <= 8.0
+
+    def test_retry_skips_options_older_urllib3_lacks(self, monkeypatch):
+        from comfywatchman import search
+
+        params = search._RETRY_PARAMS - {"backoff_max", "backoff_jitter"}
+        monkeypatch.setattr(search, "_RETRY_PARAMS", params)
+        session = search._CivitaiSupervisor._build_session(None)
+
+        retry = session.get_adapter("https://civitai.com/api/v1").max_retries
+        assert retry.backoff_jitter == 0.0
+        assert retry.total == 4
+
+    def test_backends_share_the_process_supervisor(self, monkeypatch):
+        from comfywatchman.config import config
+        from comfywatchman.search import CivitaiSearch
+
+        monkeypatch.setattr(config.search, "civitai_api_key", "test-key")
+        first, second = CivitaiSearch(), CivitaiSearch()
+        first.close()
+
+        assert first._session is second._session
+        assert first._json_cache is second._json_cache
+        assert first._supervisor.strategy_pool is second._supervisor.strategy_pool
+
+    def test_convenience_search_reuses_its_backend(self, monkeypatch):
+        from comfywatchman import search as search_module
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "civitai_api_key", "test-key")
+        backends = []
+        monkeypatch.setattr(
+            search_module.CivitaiSearch,
+            "search",
+            lambda self, model: backends.append(self) or _found(model["filename"]),
+        )
+        search_module._convenience_civitai.cache_clear()
+        try:
+            search_module.search_civitai({"filename": "a.safetensors"})
+            search_module.search_civitai({"filename": "b.safetensors"})
+        finally:
+            search_module._convenience_civitai.cache_clear()
+
+        assert len(backends) == 2
+        assert backends[0] is backends[1]
+
+    def test_sessions_are_per_api_key(self):
+        from comfywatchman.search import _CivitaiSupervisor
+
+        supervisor = _CivitaiSupervisor()
+        try:
+            assert supervisor.session("a") is supervisor.session("a")
+            assert supervisor.session("b").headers["Authorization"] == "Bearer b"
+            assert "Authorization" not in supervisor.session(None).headers
+        finally:
+            supervisor.close()
+
+    def test_direct_id_backend_is_built_once_on_shared_session(self, civitai):
+        first = civitai._get_direct_backend()
+
+        assert civitai._get_direct_backend() is first
+        assert first._session is civitai._session
+        assert first._rate_limiter is civitai._rate_limiter
+
+    def test_direct_id_lookups_wait_on_the_rate_limiter(self, civitai, monkeypatch):
+        from types import SimpleNamespace
+
+        events = []
+        backend = civitai._get_direct_backend()
+        monkeypatch.setattr(backend._rate_limiter, "acquire", lambda: events.append("acquire"))
+        monkeypatch.setattr(
+            backend._session,
+            "get",
+            lambda url, **kw: events.append(url) or SimpleNamespace(status_code=404),
+        )
+
+        assert backend.lookup_by_id(5) is None
+        assert events == ["acquire", "https://civitai.com/api/v1/models/5"]
+
+
+class TestQwenPrompt:
+    def test_fields_are_substituted(self, tmp_path):
+        from comfywatchman.search import QwenSearch
+
+        qwen = QwenSearch(temp_dir=str(tmp_path / "tmp"), cache_dir=str(tmp_path / "qwen"))
+        prompt = qwen._build_agentic_prompt(
+            {"filename": "weird{name}.safetensors", "type": "loras", "node_type": "LoraLoader"}
+        )
+
+        assert "- Filename: weird{name}.safetensors" in prompt
+        assert "- Node Type: LoraLoader" in prompt
+        assert "https://civitai.com/api/v1/models/{id}" in prompt
+
+    def test_pattern_section_matches_recognition(self, tmp_path):
+        from comfywatchman.search import QwenSearch
+
+        qwen = QwenSearch(temp_dir=str(tmp_path / "tmp"), cache_dir=str(tmp_path / "qwen"))
+
+        hf_prompt = qwen._build_agentic_prompt({"filename": "RIFE49.pth"})
+        civitai_prompt = qwen._build_agentic_prompt({"filename": "my_lora.safetensors"})
+        qwen.enable_pattern_recognition = False
+        disabled_prompt = qwen._build_agentic_prompt({"filename": "RIFE49.pth"})
+
+        assert "Early Termination Decision: SKIP Civitai search" in hf_prompt
+        assert "Reason: Likely HF model" in hf_prompt
+        assert "Early Termination Decision: SEARCH Civitai" in civitai_prompt
+        assert "SMART PATTERN RECOGNITION: DISABLED" in disabled_prompt
+
+    def test_hf_pattern_detection(self, tmp_path):
+        from comfywatchman.search import QwenSearch
+
+        qwen = QwenSearch(temp_dir=str(tmp_path / "tmp"), cache_dir=str(tmp_path / "qwen"))
+
+        assert qwen._detect_hf_pattern("RIFE49.pth") == "rife_patterns"
+        assert qwen._detect_hf_pattern("Facebook_thing.bin") == "hf_prefix_match"
+        assert qwen._detect_hf_pattern("my_lora.safetensors") is None
+
+    def test_template_has_only_named_fields(self):
+        import string
+
+        from comfywatchman.search import _QWEN_PROMPT_TEMPLATE
+
+        fields = {
+            name for _, name, _, _ in string.Formatter().parse(_QWEN_PROMPT_TEMPLATE) if name
+        }
+        assert fields == {
+            "knowledge_base",
+            "pattern_info",
+            "filename",
+            "model_type",
+            "node_type",
+            "web_search_context",
+        }
+
+
+class TestQwenStdout:
+    @pytest.fixture
+    def qwen(self, tmp_path):
+        from comfywatchman.search import QwenSearch
+
+        return QwenSearch(temp_dir=str(tmp_path / "tmp"), cache_dir=str(tmp_path / "qwen"))
+
+    def test_parses_padded_json_object(self, qwen):
+        assert qwen._parse_qwen_stdout('\n  {"status": "NOT_FOUND"}\n') == {"status": "NOT_FOUND"}
+
+    @pytest.mark.parametrize("stdout", ["", "   \n", "not json", "[1, 2]"])
+    def test_unusable_output_returns_none(self, qwen, stdout):
+        assert qwen._parse_qwen_stdout(stdout) is None
+
+    def test_invalid_output_is_reported(self, qwen, monkeypatch):
+        """Non-JSON stdout yields NOT_FOUND with a diagnostic tail of the output."""
+        import subprocess
+
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "enable_qwen", True)
+        qwen.enable_pattern_recognition = False
+        monkeypatch.setattr(
+            subprocess,
+            "run",
+            lambda *a, **kw: subprocess.CompletedProcess(a, 0, stdout="thinking...", stderr=""),
+        )
+
+        result = qwen.search({"filename": "model.safetensors", "type": "checkpoints"})
+
+        assert result.status == "NOT_FOUND"
+        assert result.metadata["stdout_tail"] == "thinking..."
+
+
+_ECHO_WORKER = """
+import json, os, sys
+for line in sys.stdin:
+    req = json.loads(line)
+    out = json.dumps({"status": "NOT_FOUND", "metadata": {"pid": os.getpid()}})
+    print(json.dumps({"id": req["id"], "output": out}), flush=True)
+"""
+
+
+class TestQwenWorker:
+    @pytest.fixture
+    def echo_command(self, tmp_path):
+        import sys
+
+        script = tmp_path / "worker.py"
+        script.write_text(_ECHO_WORKER)
+        return [sys.executable, str(script)]
+
+    def test_requests_reuse_one_process(self, echo_command):
+        import json
+        import logging
+
+        from comfywatchman.search import _QwenWorker
+
+        worker = _QwenWorker(echo_command, logging.getLogger("test"))
+        try:
+            first = json.loads(worker.request("a", timeout=10))
+            second = json.loads(worker.request("b", timeout=10))
+        finally:
+            worker.close()
+
+        assert first["metadata"]["pid"] == second["metadata"]["pid"]
+
+    def test_start_spawns_the_process_used_by_requests(self, echo_command):
+        import json
+        import logging
+
+        from comfywatchman.search import _QwenWorker
+
+        worker = _QwenWorker(echo_command, logging.getLogger("test"))
+        try:
+            worker.start()
+            pid = worker._proc.pid
+            reply = json.loads(worker.request("a", timeout=10))
+        finally:
+            worker.close()
+
+        assert reply["metadata"]["pid"] == pid
+
+    def test_worker_stalling_mid_line_times_out(self, tmp_path):
+        import logging
+        import subprocess
+        import sys
+        import time
+
+        from comfywatchman.search import _QwenWorker
+
+        script = tmp_path / "stall.py"
+        script.write_text(
+            "import sys, time\n"
+            "sys.stdin.readline()\n"
+            "sys.stdout.write('{\"id\": ')\n"
+            "sys.stdout.flush()\n"
+            "time.sleep(30)\n"
+        )
+        worker = _QwenWorker([sys.executable, str(script)], logging.getLogger("test"))
+        started = time.monotonic()
+        try:
+            with pytest.raises(subprocess.TimeoutExpired):
+                worker.request("a", timeout=1)
+        finally:
+            worker.close()
+
+        assert time.monotonic() - started < 10
+        assert worker._proc is None
+
+    def test_worker_without_protocol_is_disabled(self):
+        import logging
+        import sys
+
+        from comfywatchman.search import _QwenWorker
+
+        worker = _QwenWorker([sys.executable, "-c", "pass"], logging.getLogger("test"))
+
+        assert worker.request("a", timeout=10) is None
+        assert worker.disabled
+
+    def test_search_falls_back_to_one_shot_run(self, tmp_path, monkeypatch):
+        import subprocess
+        import sys
+
+        from comfywatchman.config import config
+        from comfywatchman.search import QwenSearch
+
+        monkeypatch.setattr(config.search, "enable_qwen", True)
+        monkeypatch.setattr(config.search, "qwen_persistent_worker", True)
+        monkeypatch.setattr(config.search, "qwen_binary", sys.executable)
+        monkeypatch.setattr(config.search, "qwen_worker_args", ["-c", "pass"])
+        runs = []
+        monkeypatch.setattr(
+            subprocess,
+            "run",
+            lambda cmd, **kw: runs.append(cmd)
+            or subprocess.CompletedProcess(cmd, 0, stdout='{"status": "NOT_FOUND"}', stderr=""),
+        )
+        qwen = QwenSearch(temp_dir=str(tmp_path / "tmp"), cache_dir=str(tmp_path / "qwen"))
+        qwen.enable_pattern_recognition = False
+
+        result = qwen.search({"filename": "model.safetensors", "type": "checkpoints"})
+
+        assert result.status == "NOT_FOUND"
+        assert len(runs) == 1
+        assert qwen._worker.disabled
+
+
+class TestQwenBatch:
+    @pytest.fixture
+    def qwen(self, tmp_path, monkeypatch):
+        from comfywatchman.config import config
+        from comfywatchman.search import QwenSearch
+
+        monkeypatch.setattr(config.search, "enable_qwen", True)
+        monkeypatch.setattr(config.search, "qwen_persistent_worker", False)
+        monkeypatch.setattr(config.search, "qwen_batch_size", 3)
+        qwen = QwenSearch(temp_dir=str(tmp_path / "tmp"), cache_dir=str(tmp_path / "qwen"))
+        qwen.enable_pattern_recognition = False
+        return qwen
+
+    @staticmethod
+    def _answer(monkeypatch, qwen, payload):
+        import json
+        import subprocess
+
+        prompts = []
+        monkeypatch.setattr(
+            qwen,
+            "_run_qwen",
+            lambda cmd, prompt: prompts.append(prompt)
+            or subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(payload), stderr=""),
+        )
+        return prompts
+
+    def test_one_run_answers_several_models(self, qwen, monkeypatch):
+        models = [{"filename": f"{n}.safetensors", "type": "loras"} for n in "abcd"]
+        prompts = self._answer(
+            monkeypatch,
+            qwen,
+            {
+                "a.safetensors": {"status": "FOUND", "source": "civitai", "civitai_id": 1},
+                "b.safetensors": {"status": "NOT_FOUND"},
+            },
+        )
+
+        assert qwen.prefetch(models) == 2
+
+        # Batches of three; the lone fourth model is left to the single-file prompt
+        assert len(prompts) == 1
+        assert all(m["filename"] in prompts[0] for m in models[:3])
+        assert "d.safetensors" not in prompts[0]
+        result = qwen.search(models[0])
+        assert len(prompts) == 1
+        assert result.civitai_id == 1
+        assert result.metadata["cached"] is True
+
+    def test_batch_size_one_disables(self, qwen, monkeypatch):
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "qwen_batch_size", 1)
+        prompts = self._answer(monkeypatch, qwen, {})
+
+        assert qwen.prefetch([{"filename": "a.safetensors"}, {"filename": "b.pt"}]) == 0
+        assert prompts == []
+
+    def test_model_search_prefetches_only_when_qwen_leads(self, model_search, monkeypatch):
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "qwen_batch_size", 4)
+        qwen, civitai = StubBackend("qwen"), StubBackend("civitai")
+        batches = []
+        qwen.prefetch = lambda models: batches.append([m["filename"] for m in models])
+        _install_backends(model_search, qwen, civitai)
+        models = [{"filename": "a.safetensors"}, {"filename": "b.safetensors"}]
+
+        model_search.search_multiple_models(models, backends=["civitai", "qwen"])
+        model_search.search_multiple_models(models, backends=["qwen", "civitai"], use_cache=False)
+
+        assert batches == [["a.safetensors", "b.safetensors"]]
+
+
+class TestHashFallback:
+    def test_missing_file_is_skipped(self, civitai, tmp_path):
+        info = {"filename": "m.safetensors", "local_path": str(tmp_path / "missing")}
+        assert civitai._try_hash_fallback(info) is None
+
+    def test_small_file_is_skipped(self, civitai, tmp_path, monkeypatch):
+        small = tmp_path / "m.safetensors"
+        small.write_bytes(b"x" * 10)
+        monkeypatch.setattr(civitai, "search_by_hash", lambda *a: pytest.fail("hashed"))
+
+        assert civitai._try_hash_fallback({"filename": "m", "local_path": str(small)}) is None
+
+
+class TestCivitaiResponseCache:
+    ITEMS = [
+        {
+            "id": 10,
+            "name": "Foo Bar",
+            "modelVersions": [
+                {
+                    "id": 20,
+                    "name": "v1",
+                    "files": [{"name": "Foo_Bar.safetensors"}, {"name": "foo_bar.ckpt"}],
+                }
+            ],
+        }
+    ]
+
+    @pytest.fixture
+    def api_calls(self, civitai, monkeypatch):
+        """Stub out DirectIDBackend and the HTTP layer; return the list of GETs."""
+        import json
+
+        from comfywatchman.civitai_tools import direct_id_backend
+
+        class _NoDirectID:
+            def __init__(self, **kwargs):
+                pass
+
+            def lookup_by_name(self, name):
+                return None
+
+        class _Response:
+            status_code = 200
+            content = json.dumps({"items": TestCivitaiResponseCache.ITEMS}).encode()
+
+        calls = []
+        monkeypatch.setattr(direct_id_backend, "DirectIDBackend", _NoDirectID)
+        monkeypatch.setattr(
+            civitai, "_get", lambda path, params=None: calls.append(params) or _Response()
+        )
+        return calls
+
+    def test_same_query_hits_api_once(self, civitai, api_calls):
+        """Filenames normalizing to the same query share one API response."""
+        first = civitai.search({"filename": "Foo_Bar.safetensors", "type": "checkpoints"})
+        second = civitai.search({"filename": "foo_bar.ckpt", "type": "checkpoints"})
+
+        assert first.status == second.status == "FOUND"
+        assert second.filename == "foo_bar.ckpt"
+        assert len(api_calls) == 1
+
+    def test_type_filter_is_part_of_the_key(self, civitai, api_calls):
+        civitai.search({"filename": "Foo_Bar.safetensors", "type": "checkpoints"})
+        civitai.search({"filename": "Foo_Bar.safetensors", "type": "loras"})
+
+        assert len(api_calls) == 2
+
+    def test_concurrent_identical_queries_share_one_request(self, civitai, api_calls, monkeypatch):
+        """A search arriving while the same query is in flight waits for it."""
+        import threading
+
+        release = threading.Event()
+        real_get = civitai._get
+
+        def slow_get(path, params=None):
+            release.wait(5)
+            return real_get(path, params)
+
+        monkeypatch.setattr(civitai, "_get", slow_get)
+        results = {}
+
+        def run(name):
+            results[name] = civitai.search({"filename": name, "type": "checkpoints"})
+
+        threads = [
+            threading.Thread(target=run, args=(name,))
+            for name in ("Foo_Bar.safetensors", "foo_bar.ckpt")
+        ]
+        for thread in threads:
+            thread.start()
+        while not civitai._in_flight:
+            pass
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(api_calls) == 1
+        assert {r.status for r in results.values()} == {"FOUND"}
+        assert not civitai._in_flight
+
+    def test_timeout_is_reported_distinctly(self, civitai, api_calls, monkeypatch):
+        import requests
+
+        def timeout(path, params=None):
+            raise requests.Timeout("slow")
+
+        monkeypatch.setattr(civitai, "_get", timeout)
+        result = civitai.search({"filename": "Foo_Bar.safetensors", "type": "checkpoints"})
+
+        assert result.status == "ERROR"
+        assert result.error_message == "timeout"
+
+    def test_connection_error_becomes_error_result(self, civitai, api_calls, monkeypatch):
+        import requests
+
+        def refuse(path, params=None):
+            raise requests.ConnectionError("refused")
+
+        monkeypatch.setattr(civitai, "_get", refuse)
+        result = civitai.search({"filename": "Foo_Bar.safetensors", "type": "checkpoints"})
+
+        assert result.status == "ERROR"
+        assert "refused" in result.error_message
+
+    def test_get_json_memoizes_identical_requests(self, civitai, api_calls):
+        first = civitai._get_json("/models", {"query": "x", "nsfw": "true"})
+        second = civitai._get_json("/models", {"nsfw": "true", "query": "x"})
+        civitai._get_json("/models", {"query": "x"})
+
+        assert first is second
+        assert len(api_calls) == 2
+
+    def test_get_json_entries_expire(self, civitai, api_calls, monkeypatch):
+        import comfywatchman.search as search_module
+
+        now = [1000.0]
+        monkeypatch.setattr(search_module.time, "monotonic", lambda: now[0])
+        civitai._get_json("/models", {"query": "x"})
+        now[0] += search_module.config.search.civitai_response_ttl
+
+        civitai._get_json("/models", {"query": "x"})
+
+        assert len(api_calls) == 2
+
+    def test_newest_listings_expire_sooner(self, civitai, api_calls, monkeypatch):
+        import comfywatchman.search as search_module
+
+        now = [1000.0]
+        monkeypatch.setattr(search_module.time, "monotonic", lambda: now[0])
+        civitai._get_json("/models", {"query": "x", "sort": "Newest"})
+        civitai._get_json("/models", {"query": "x", "sort": "Highest Rated"})
+        now[0] += search_module._CIVITAI_NEWEST_RESPONSE_TTL
+
+        civitai._get_json("/models", {"query": "x", "sort": "Newest"})
+        civitai._get_json("/models", {"query": "x", "sort": "Highest Rated"})
+
+        assert [p["sort"] for p in api_calls] == ["Newest", "Highest Rated", "Newest"]
+
+    def test_get_indexed_reuses_index_of_memoized_payload(self, civitai, api_calls, monkeypatch):
+        built = []
+        index_files = civitai._index_files
+        monkeypatch.setattr(
+            civitai, "_index_files", lambda items: built.append(1) or index_files(items)
+        )
+
+        first = civitai._get_indexed("/models", {"query": "x"})
+        second = civitai._get_indexed("/models", {"query": "x"})
+
+        assert first[1] is second[1]
+        assert set(first[1]) == {"foo_bar.safetensors", "foo_bar.ckpt"}
+        assert len(built) == 1
+        assert len(api_calls) == 1
+
+    def test_get_indexed_keeps_nothing_without_memoization(self, civitai, api_calls, monkeypatch):
+        from comfywatchman.config import config
+
+        monkeypatch.setattr(config.search, "civitai_response_ttl", 0)
+
+        first = civitai._get_indexed("/models", {"query": "x"})
+        second = civitai._get_indexed("/models", {"query": "x"})
+
+        assert set(first[1]) == set(second[1]) == {"foo_bar.safetensors", "foo_bar.ckpt"}
+        assert len(api_calls) == 2
+        assert not civitai._index_cache
+
+    def test_get_json_does_not_cache_errors(self, civitai, monkeypatch):
+        class _Failed:
+            status_code = 503
+
+        calls = []
+        monkeypatch.setattr(
+            civitai, "_get", lambda path, params=None: calls.append(path) or _Failed()
+        )
+
+        assert civitai._get_json("/models", {"query": "x"}) is None
+        assert civitai._get_json("/models", {"query": "x"}) is None
+        assert len(calls) == 2
+
+    def test_cache_is_bounded(self, civitai, monkeypatch):
+        import comfywatchman.search as search_module
+
+        monkeypatch.setattr(search_module, "_CIVITAI_RESPONSE_CACHE_SIZE", 1)
+        civitai._store_items(("a", None), [])
+        civitai._store_items(("b", None), [])
+
+        assert civitai._cached_items(("a", None)) is None
+        assert civitai._cached_items(("b", None)) == ([], {})
+
+    def test_listings_expire(self, civitai, monkeypatch):
+        import comfywatchman.search as search_module
+
+        now = [1000.0]
+        monkeypatch.setattr(search_module.time, "monotonic", lambda: now[0])
+        civitai._store_items(("full", None), self.ITEMS)
+        civitai._store_items(("empty", None), [])
+
+        now[0] += search_module._CIVITAI_EMPTY_RESPONSE_TTL
+        assert civitai._cached_items(("empty", None)) is None
+        assert civitai._cached_items(("full", None)) is not None
+
+        now[0] = 1000.0 + search_module.config.search.civitai_response_ttl
+        assert civitai._cached_items(("full", None)) is None
+        assert not civitai._response_cache
+
+    def test_find_best_match_prefers_first_occurrence(self, civitai):
+        """The file index keeps the first result/version listing a file name."""
+        dup = {"id": 11, "modelVersions": [{"id": 21, "files": [{"name": "foo_bar.CKPT"}]}]}
+        result, version = civitai._find_best_match(self.ITEMS + [dup], "FOO_BAR.ckpt")
+
+        assert (result["id"], version["id"]) == (10, 20)
+
+    def test_index_files_tolerates_missing_and_null_fields(self, civitai):
+        items = [
+            {"id": 1},
+            {"id": 2, "modelVersions": None},
+            {"id": 3, "modelVersions": [{"id": 4, "files": None}, {"id": 5, "files": [{}]}]},
+        ]
+
+        assert civitai._index_files(items + self.ITEMS) == civitai._index_files(self.ITEMS)
+
+    def test_find_best_match_scan_agrees_with_index(self, civitai):
+        dup = {"id": 11, "modelVersions": [{"id": 21, "files": [{"name": "foo_bar.CKPT"}]}]}
+        items = self.ITEMS + [dup]
+
+        for name in ("FOO_BAR.ckpt", "foo_bar.safetensors", "missing.pt"):
+            assert civitai._find_best_match(items, name) == civitai._find_best_match(
+                items, name, civitai._index_files(items)
+            )
+
+    def test_find_best_match_without_match(self, civitai):
+        assert civitai._find_best_match(self.ITEMS, "other.safetensors") is None
+
+    @pytest.mark.parametrize(
+        "candidate",
+        ["pony.safetensors", "PONY_XL.ckpt", "pon.safetensors", "pony_v2.safetensors"],
+    )
+    def test_filename_matcher_agrees_with_filename_matches(self, civitai, candidate):
+        matches = civitai._filename_matcher("Pony.safetensors")
+
+        assert matches(candidate) is civitai._filename_matches(candidate, "Pony.safetensors")
+        assert matches(candidate)
+
+    def test_filename_matcher_rejects_unrelated_name(self, civitai):
+        assert not civitai._filename_matcher("pony.safetensors")("flux.safetensors")
+
+
+class TestSlidingWindowLimiter:
+    def test_allows_burst_up_to_limit(self):
+        from comfywatchman.search import _SlidingWindowLimiter
+
+        limiter = _SlidingWindowLimiter(3, period=60)
+        for _ in range(3):
+            limiter.acquire()
+        assert len(limiter._timestamps) == 3
+
+    def test_blocks_until_window_frees(self, monkeypatch):
+        import comfywatchman.search as search_module
+
+        clock = [100.0]
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        monkeypatch.setattr(search_module.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(search_module.time, "sleep", fake_sleep)
+        limiter = search_module._SlidingWindowLimiter(2, period=1.0)
+
+        limiter.acquire()
+        limiter.acquire()
+        limiter.acquire()
+
+        assert sleeps == [1.0]
+
+    def test_zero_disables(self):
+        from comfywatchman.search import _SlidingWindowLimiter
+
+        limiter = _SlidingWindowLimiter(0)
+        for _ in range(100):
+            limiter.acquire()
+        assert not limiter._timestamps
+
+    def test_low_remaining_halves_limit_and_recovers(self):
+        from comfywatchman.search import _SlidingWindowLimiter
+
+        limiter = _SlidingWindowLimiter(8)
+        limiter.observe_remaining(3)
+        limiter.observe_remaining(3)
+        assert limiter.limit == 2
+
+        limiter.observe_remaining(100)
+        assert limiter.limit == 4
+        limiter.observe_remaining(100)
+        limiter.observe_remaining(100)
+        assert limiter.limit == 8
+
+    def test_limit_never_drops_below_one(self):
+        from comfywatchman.search import _SlidingWindowLimiter
+
+        limiter = _SlidingWindowLimiter(2)
+        for _ in range(5):
+            limiter.observe_remaining(0)
+        assert limiter.limit == 1
+
+    def test_get_feeds_rate_limit_header(self, civitai, monkeypatch):
+        from types import SimpleNamespace
+
+        from comfywatchman.search import _SlidingWindowLimiter
+
+        response = SimpleNamespace(headers={"X-RateLimit-Remaining": "0"})
+        monkeypatch.setattr(civitai._session, "get", lambda url, **kw: response)
+        civitai._rate_limiter = _SlidingWindowLimiter(4, period=60)
+
+        civitai._get("/models")
+
+        assert civitai._rate_limiter.limit == 2
@@ -0,0 +1,57 @@
+"""
+Unit tests for filename validation helpers in utils.py.
+"""
+
+
+def validate_and_sanitize_filename(filename):
+    from comfywatchman.utils import validate_and_sanitize_filename as _validate
+
+    return _validate(filename)
+
+
+def sanitize_filename(filename):
+    from comfywatchman.utils import sanitize_filename as _sanitize
+
+    return _sanitize(filename)
+
+
+class TestValidateAndSanitizeFilename:
+    def test_valid_filename_passes_through(self):
+        assert validate_and_sanitize_filename("model_v1.safetensors") == (
+            True,
+            "model_v1.safetensors",
+            None,
+        )
+
+    def test_invalid_characters_are_replaced(self):
+        assert sanitize_filename("a:b.safetensors") == "a_b.safetensors"
+        assert sanitize_filename('dir/sub\\a"b?.safetensors') == "dir_sub_a_b_.safetensors"
+
+    def test_non_string_input_is_rejected(self):
+        """Unhashable inputs are handled before the memoized core is reached."""
+        assert validate_and_sanitize_filename(["x"]) == (
+            False,
+            "",
+            "Empty or non-string filename",
+        )
+        assert sanitize_filename(None) == "unnamed_file"
+
+    def test_control_characters_are_rejected(self):
+        is_valid, _, reason = validate_and_sanitize_filename("bad\x07name.pt")
+        assert not is_valid
+        assert reason == "Control characters detected in filename"
+
+    def test_repeated_calls_are_consistent(self):
+        """Memoized results match a fresh evaluation."""
+        first = validate_and_sanitize_filename("https://example.com/model.pt")
+        second = validate_and_sanitize_filename("https://example.com/model.pt")
+        assert first == second == (False, "", "URL pattern detected")
+
+    def test_sanitize_filename_is_memoized(self):
+        """Repeat sanitization of the same name is served from the LRU cache."""
+        from comfywatchman.utils import _validate_and_sanitize_str
+
+        sanitize_filename("memo_check.safetensors")
+        hits = _validate_and_sanitize_str.cache_info().hits
+        assert sanitize_filename("memo_check.safetensors") == "memo_check.safetensors"
+        assert _validate_and_sanitize_str.cache_info().hits == hits + 1